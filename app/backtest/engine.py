@@ -0,0 +1,351 @@
+# app/backtest/engine.py
+import os
+import re
+import time
+import logging
+from datetime import time as dtime
+
+import numpy as np
+import pandas as pd
+
+from app.strategy.stock_selector import rank_stocks
+from app.strategy.nifty_filter import is_nifty_trade_allowed
+from app.broker.position_sizing import calculate_position_size_batch
+from app.broker.instrument_registry import to_security_id
+from app.execution.position_manager import PositionManager
+
+logger = logging.getLogger(__name__)
+
+# Live flow: signals CSV is read once the first 15-min candle is complete
+DECISION_TIME = dtime(9, 30)
+# Intraday positions are squared off by the broker around this time
+SQUARE_OFF_TIME = dtime(15, 15)
+
+_BAR_COLUMNS = {"datetime": "Datetime", "security id": "Security ID",
+                "open": "Open", "high": "High", "low": "Low", "close": "Close"}
+
+
+# ==========================================================
+# DATA LOADING
+# ==========================================================
+def _normalise_columns(df):
+    return df.rename(columns={c: _BAR_COLUMNS.get(c.strip().lower(), c) for c in df.columns})
+
+
+def load_signal_files(paths):
+    """
+    Read archived nifty_15m_breakout_signals CSVs into one frame.
+
+    The trade date comes from a "Date" column if present, otherwise from a
+    YYYYMMDD / YYYY-MM-DD stamp in the file name.
+
+    Returns:
+        pd.DataFrame: signal rows plus a "Date" column (datetime.date)
+    """
+    frames = []
+    for path in paths:
+        df = pd.read_csv(path)
+        if "Date" not in df.columns:
+            m = re.search(r"(\d{4})-?(\d{2})-?(\d{2})", os.path.basename(path))
+            if not m:
+                logger.warning(f"⚠️ No date in {path}, skipped")
+                continue
+            df["Date"] = "-".join(m.groups())
+        frames.append(df)
+
+    if not frames:
+        return pd.DataFrame(columns=["Date"])
+    signals = pd.concat(frames, ignore_index=True)
+    signals["Date"] = pd.to_datetime(signals["Date"]).dt.date
+    return signals
+
+
+def prepare_bars(df, square_off=SQUARE_OFF_TIME):
+    """
+    Normalise intraday bars (Datetime, [Security ID,] Open, High, Low, Close),
+    sorted by instrument and time, with a "Date" column. Bars after
+    `square_off` are dropped.
+    """
+    df = _normalise_columns(df)
+    df["Datetime"] = pd.to_datetime(df["Datetime"])
+    df = df[df["Datetime"].dt.time <= square_off].copy()
+    df["Date"] = df["Datetime"].dt.date
+    keys = ["Security ID", "Datetime"] if "Security ID" in df.columns else ["Datetime"]
+    if "Security ID" in df.columns:
+        df["Security ID"] = df["Security ID"].map(to_security_id)
+    return df.sort_values(keys).reset_index(drop=True)
+
+
+def nifty_levels(nifty_bars, decision_time=DECISION_TIME):
+    """
+    Per-day Nifty "LTP" at decision time (open of the first bar at/after it)
+    and previous session close - the two inputs of is_nifty_trade_allowed.
+
+    Returns:
+        dict: {date: (ltp, prev_close)}
+    """
+    daily_close = nifty_bars.groupby("Date")["Close"].last()
+    prev_close = daily_close.shift(1)
+    at_decision = nifty_bars[nifty_bars["Datetime"].dt.time >= decision_time]
+    ltp = at_decision.groupby("Date")["Open"].first()
+
+    levels = {}
+    for day, value in ltp.items():
+        pc = prev_close.get(day)
+        if pd.notna(pc):
+            levels[day] = (float(value), float(pc))
+    return levels
+
+
+# ==========================================================
+# TRADE SELECTION (same code path as the live scheduler)
+# ==========================================================
+def build_candidates(signals, bars, decision_time=DECISION_TIME):
+    """
+    Ranked candidates per day with the "LTP" the live bot would see (open
+    of the first bar at/after decision time). Independent of the strategy
+    knobs, so it is built once per dataset.
+
+    Returns:
+        list[tuple]: (day, rank, stock, bar_rows, ltp) in day / rank order
+    """
+    groups = bars.groupby(["Date", "Security ID"]).indices
+    times = bars["Datetime"].dt.time.to_numpy()
+    opens = bars["Open"].to_numpy()
+
+    candidates = []
+    for day, day_df in signals.groupby("Date", sort=True):
+        for rank, stock in enumerate(rank_stocks(day_df.drop(columns="Date").copy())):
+            rows = groups.get((day, to_security_id(stock["Security ID"])))
+            if rows is None:
+                continue
+            rows = rows[times[rows] >= decision_time]
+            if len(rows) == 0:
+                continue
+            candidates.append((day, rank, stock, rows, float(opens[rows[0]])))
+    return candidates
+
+
+def select_trades(candidates, nifty, fund, max_loss=1000, leverage=None, target_rr=1.5,
+                  pm_rr=1.5, buy_buffer=50, sell_buffer=30):
+    """
+    For each day: Nifty filter -> skip entries already crossed -> size;
+    the first ranked candidate that passes is traded.
+
+    Returns:
+        list[dict]: one trade per day with entry/sl/target/qty and the row
+                    positions of its bars
+    """
+    candidates = [c for c in candidates if c[0] in nifty]
+    if not candidates:
+        return []
+
+    # Size every candidate in one call (fixed fund: no compounding)
+    ltps = [c[4] for c in candidates]
+    qty, _, _ = calculate_position_size_batch(
+        ltps, ltps, [c[2]["SL"] for c in candidates], [c[2]["Security ID"] for c in candidates],
+        max_loss=max_loss, fund=fund, leverage=leverage,
+    )
+
+    trades, traded_days = [], set()
+    for (day, rank, stock, rows, ltp), q in zip(candidates, qty):
+        if day in traded_days:
+            continue
+        side = stock["Signal"].upper()
+        nifty_ltp, nifty_prev = nifty[day]
+        if not is_nifty_trade_allowed(side, nifty_ltp, nifty_prev, buy_buffer=buy_buffer, sell_buffer=sell_buffer):
+            continue
+        if (side == "BUY" and ltp < stock["Entry"]) or (side == "SELL" and ltp > stock["Entry"]):
+            continue
+        if q <= 0:
+            continue
+
+        sl = float(stock["SL"])
+        risk = abs(ltp - sl)
+        target = stock.get("Target")
+        if not target or pd.isna(target) or target <= 0:
+            target = round(ltp + target_rr * risk if side == "BUY" else ltp - target_rr * risk, 2)
+
+        pm = PositionManager(entry=ltp, sl=sl, qty=int(q), side=side, rr=pm_rr)
+        trades.append({
+            "Date": day,
+            "Stock Name": stock["Stock Name"],
+            "Security ID": to_security_id(stock["Security ID"]),
+            "Signal": side,
+            "Rank": rank,
+            "Entry": ltp,
+            "SL": sl,
+            "Target": float(target),
+            "One R": pm.one_r,
+            "Qty": int(q),
+            "rows": rows,
+        })
+        traded_days.add(day)
+
+    return trades
+
+
+# ==========================================================
+# VECTORISED EXITS
+# ==========================================================
+def _padded(values, rows_list):
+    width = max(len(r) for r in rows_list)
+    out = np.full((len(rows_list), width), np.nan)
+    for i, rows in enumerate(rows_list):
+        out[i, : len(rows)] = values[rows]
+    return out
+
+
+def simulate_exits(trades, ohlc, trailing_multiplier=0.5):
+    """
+    Super Order exit simulation for all trades at once over padded
+    (n_trades, n_bars) arrays, entry at the open of bar 0.
+
+    - Stop-loss leg trails by `trailing_multiplier * risk` for every such
+      move in favour (running maximum of the favourable extreme).
+    - Once 1R is reached the stop moves to entry (PositionManager TRAIL_SL).
+    - Stop and target in the same bar: the stop is assumed hit first.
+    - Open positions are closed at the last bar's close (square-off).
+
+    Args:
+        ohlc: bars DataFrame or dict of "Open"/"High"/"Low"/"Close" arrays
+
+    Returns:
+        dict of arrays: exit, reason, exit_bar
+    """
+    rows = [t["rows"] for t in trades]
+    side = np.array([1.0 if t["Signal"] == "BUY" else -1.0 for t in trades])[:, None]
+    entry = np.array([t["Entry"] for t in trades])[:, None]
+    sl0 = np.array([t["SL"] for t in trades])[:, None]
+    target = np.array([t["Target"] for t in trades])[:, None]
+    one_r = np.array([t["One R"] for t in trades])[:, None]
+
+    o = _padded(np.asarray(ohlc["Open"]), rows)
+    h = _padded(np.asarray(ohlc["High"]), rows)
+    l = _padded(np.asarray(ohlc["Low"]), rows)
+    c = _padded(np.asarray(ohlc["Close"]), rows)
+
+    # Mirror SELL trades so every trade is handled as a long
+    fav_hi = np.where(side > 0, h, -l)
+    adv_lo = np.where(side > 0, l, -h)
+    o, c = o * side, c * side
+    entry, sl0, target, one_r = entry * side, sl0 * side, target * side, one_r * side
+
+    # Best price seen before each bar (stop levels only move between bars)
+    best = np.fmax.accumulate(np.where(np.isnan(fav_hi), -np.inf, fav_hi), axis=1)
+    best_prev = np.concatenate([entry, best[:, :-1]], axis=1)
+    best_prev = np.maximum(best_prev, entry)
+
+    jump = np.round(np.abs(entry - sl0) * trailing_multiplier, 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        steps = np.where(jump > 0, np.floor((best_prev - entry) / jump), 0.0)
+    stop = sl0 + steps * jump
+    stop = np.where(best_prev >= one_r, np.maximum(stop, entry), stop)
+
+    stop_hit = adv_lo <= stop
+    tgt_hit = fav_hi >= target
+    n_bars = (~np.isnan(c)).sum(axis=1)
+    never = c.shape[1]
+
+    first_stop = np.where(stop_hit.any(axis=1), stop_hit.argmax(axis=1), never)
+    first_tgt = np.where(tgt_hit.any(axis=1), tgt_hit.argmax(axis=1), never)
+    exit_bar = np.minimum(np.minimum(first_stop, first_tgt), n_bars - 1)
+
+    idx = np.arange(len(trades))
+    by_stop = first_stop <= np.minimum(first_tgt, n_bars - 1)
+    by_tgt = ~by_stop & (first_tgt <= n_bars - 1)
+
+    stop_at = stop[idx, exit_bar]
+    exit_px = np.where(
+        by_stop, np.minimum(o[idx, exit_bar], stop_at),          # gap through the stop
+        np.where(by_tgt, np.maximum(o[idx, exit_bar], target[:, 0]), c[idx, exit_bar]),
+    )
+
+    trailed = stop_at > sl0[:, 0]
+    reason = np.where(by_stop, np.where(trailed, "TRAIL_SL_HIT", "STOP_LOSS_HIT"),
+                      np.where(by_tgt, "TARGET_HIT", "SQUARE_OFF"))
+
+    return {"exit": exit_px * side[:, 0], "reason": reason, "exit_bar": exit_bar}
+
+
+# ==========================================================
+# RUN
+# ==========================================================
+def evaluate(candidates, nifty, ohlc, fund=100000, leverage=None, max_loss=1000,
+             trailing_multiplier=0.5, target_rr=1.5, pm_rr=1.5, buy_buffer=50, sell_buffer=30):
+    """
+    One parameter set over prepared candidates.
+
+    Returns:
+        pd.DataFrame: one row per trade
+    """
+    trades = select_trades(candidates, nifty, fund, max_loss=max_loss, leverage=leverage,
+                           target_rr=target_rr, pm_rr=pm_rr, buy_buffer=buy_buffer, sell_buffer=sell_buffer)
+    if not trades:
+        return pd.DataFrame()
+
+    exits = simulate_exits(trades, ohlc, trailing_multiplier)
+
+    result = pd.DataFrame([{k: v for k, v in t.items() if k != "rows"} for t in trades])
+    result["Exit"] = np.round(exits["exit"], 2)
+    result["Exit Reason"] = exits["reason"]
+    result["Bars Held"] = exits["exit_bar"] + 1
+    direction = np.where(result["Signal"] == "BUY", 1.0, -1.0)
+    result["PnL"] = (result["Exit"] - result["Entry"]) * result["Qty"] * direction
+    result["R"] = (result["Exit"] - result["Entry"]) * direction / (result["Entry"] - result["SL"]).abs()
+    return result
+
+
+def run_backtest(signals, bars, nifty_bars, fund=100000, leverage=None,
+                 decision_time=DECISION_TIME, **params):
+    """
+    Replay historical breakout signals through the live selection, filter,
+    sizing and position-management rules.
+
+    Args:
+        signals (pd.DataFrame): load_signal_files() output
+        bars (pd.DataFrame): prepare_bars() output for the signal stocks
+        nifty_bars (pd.DataFrame): prepare_bars() output for Nifty 50
+        fund (float): fixed capital used for sizing every day
+        leverage: scalar / None (None uses the S3 leverage table)
+        **params: strategy knobs passed to evaluate() (max_loss,
+                  trailing_multiplier, target_rr, pm_rr, buy_buffer, sell_buffer)
+
+    Returns:
+        pd.DataFrame: one row per trade
+    """
+    start = time.perf_counter()
+    nifty = nifty_levels(nifty_bars, decision_time)
+    candidates = build_candidates(signals, bars, decision_time)
+    result = evaluate(candidates, nifty, bars, fund=fund, leverage=leverage, **params)
+
+    if result.empty:
+        logger.info("📉 Backtest: no trades")
+        return result
+
+    logger.info(
+        f"📊 Backtest: {len(result)} trades over {signals['Date'].nunique()} days "
+        f"in {time.perf_counter() - start:.2f}s | PnL ₹{result['PnL'].sum():,.0f}"
+    )
+    return result
+
+
+def summarize(trades):
+    """Headline metrics for a run_backtest() result."""
+    if trades.empty:
+        return {"trades": 0, "win_rate": 0.0, "total_pnl": 0.0, "avg_r": 0.0,
+                "profit_factor": 0.0, "max_drawdown": 0.0}
+
+    pnl = trades["PnL"].to_numpy()
+    equity = np.cumsum(pnl)
+    drawdown = np.maximum.accumulate(np.maximum(equity, 0)) - equity
+    gains, losses = pnl[pnl > 0].sum(), -pnl[pnl < 0].sum()
+
+    return {
+        "trades": int(len(pnl)),
+        "win_rate": round(float((pnl > 0).mean()), 4),
+        "total_pnl": round(float(pnl.sum()), 2),
+        "avg_r": round(float(trades["R"].mean()), 4),
+        "profit_factor": round(float(gains / losses), 4) if losses > 0 else float("inf"),
+        "max_drawdown": round(float(drawdown.max()), 2),
+    }
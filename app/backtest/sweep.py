@@ -0,0 +1,252 @@
+# app/backtest/sweep.py
+import os
+import time
+import pickle
+import random
+import logging
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from app.backtest.engine import (
+    DECISION_TIME, build_candidates, nifty_levels, evaluate, summarize,
+)
+
+logger = logging.getLogger(__name__)
+
+_OHLC = ("Open", "High", "Low", "Close")
+
+# Knobs of the live strategy and their current defaults
+DEFAULT_PARAMS = {
+    "trailing_multiplier": 0.5,   # place_trade trailing jump, fraction of risk
+    "target_rr": 1.5,             # place_trade target when no 'Target' in the CSV
+    "pm_rr": 1.5,                 # PositionManager rr
+    "max_loss": 1000,             # calculate_position_size max_loss
+    "buy_buffer": 50,             # is_nifty_trade_allowed BUY offset
+    "sell_buffer": 30,            # is_nifty_trade_allowed SELL offset
+}
+
+# summarize() metrics a sweep can rank by, and which way is better
+OBJECTIVES = {
+    "total_pnl": "max",
+    "avg_r": "max",
+    "win_rate": "max",
+    "profit_factor": "max",
+    "trades": "max",
+    "max_drawdown": "min",        # reported as a positive rupee amount
+}
+
+
+def rank(result, objective):
+    """
+    Sort sweep rows best first for `objective`; ties go to the higher total_pnl.
+
+    Raises:
+        ValueError: objective has no declared direction in OBJECTIVES
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective!r}, expected one of {sorted(OBJECTIVES)}")
+    if result.empty or objective not in result.columns:
+        return result
+    by, ascending = [objective], [OBJECTIVES[objective] == "min"]
+    if objective != "total_pnl" and "total_pnl" in result.columns:
+        by.append("total_pnl")
+        ascending.append(False)
+    return result.sort_values(by, ascending=ascending, kind="stable").reset_index(drop=True)
+
+
+# ==========================================================
+# PARAMETER SPACES
+# ==========================================================
+def grid(**space):
+    """
+    Cartesian product of value lists.
+
+        grid(trailing_multiplier=[0.25, 0.5, 1.0], target_rr=[1.5, 2, 3])
+    """
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def random_search(space, n, seed=None):
+    """
+    `n` random parameter sets. A list/tuple of 2 numbers is sampled
+    uniformly (ints stay ints); any other sequence is sampled by choice.
+
+        random_search({"target_rr": (1.0, 3.0), "max_loss": [500, 1000, 1500]}, n=50)
+    """
+    rng = random.Random(seed)
+    sets = []
+    for _ in range(n):
+        params = {}
+        for key, values in space.items():
+            if isinstance(values, tuple) and len(values) == 2:
+                lo, hi = values
+                if isinstance(lo, int) and isinstance(hi, int):
+                    params[key] = rng.randint(lo, hi)
+                else:
+                    params[key] = round(rng.uniform(lo, hi), 4)
+            else:
+                params[key] = rng.choice(list(values))
+        sets.append(params)
+    return sets
+
+
+# ==========================================================
+# SHARED BAR DATA
+# ==========================================================
+class SharedOHLC:
+    """
+    OHLC columns copied once into a shared-memory block, plus the pickled
+    per-dataset context (candidates, Nifty levels, fund, leverage) in a
+    second block. Tasks carry only the spec; workers map the blocks as
+    read-only views instead of receiving a pickled copy per task.
+    """
+
+    def __init__(self, ohlc, context):
+        n = len(ohlc["Close"])
+        self.shape = (len(_OHLC), n)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, 8 * len(_OHLC) * n))
+        block = np.ndarray(self.shape, dtype=np.float64, buffer=self.shm.buf)
+        for i, col in enumerate(_OHLC):
+            block[i] = np.asarray(ohlc[col], dtype=np.float64)
+
+        payload = pickle.dumps(context, protocol=pickle.HIGHEST_PROTOCOL)
+        self.ctx_size = len(payload)
+        self.ctx = shared_memory.SharedMemory(create=True, size=max(1, self.ctx_size))
+        self.ctx.buf[:self.ctx_size] = payload
+
+    @property
+    def spec(self):
+        return self.shm.name, self.shape, self.ctx.name, self.ctx_size
+
+    def close(self):
+        for shm in (self.shm, self.ctx):
+            shm.close()
+            shm.unlink()
+
+
+# Per-process worker state: the dataset last attached by _attach
+_WORKER = {}
+
+
+def _attach(spec):
+    """Map the dataset named by `spec`, reusing it while tasks stay on the same one."""
+    if _WORKER.get("spec") == spec:
+        return _WORKER
+
+    _detach()
+    name, shape, ctx_name, ctx_size = spec
+    shm = shared_memory.SharedMemory(name=name)
+    block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    block.flags.writeable = False
+    ctx = shared_memory.SharedMemory(name=ctx_name)
+    try:
+        context = pickle.loads(bytes(ctx.buf[:ctx_size]))
+    finally:
+        ctx.close()
+
+    _WORKER.update(
+        spec=spec,
+        shm=shm,     # keep the mapping alive
+        ohlc={col: block[i] for i, col in enumerate(_OHLC)},
+        **context,
+    )
+    return _WORKER
+
+
+def _detach():
+    shm = _WORKER.get("shm")
+    _WORKER.clear()          # drop the array views before unmapping
+    if shm is not None:
+        try:
+            shm.close()
+        except BufferError:
+            pass             # a view is still referenced; freed with the process
+
+
+def _run_one(spec, params):
+    start = time.perf_counter()
+    data = _attach(spec)
+    trades = evaluate(
+        data["candidates"], data["nifty"], data["ohlc"],
+        fund=data["fund"], leverage=data["leverage"], **params,
+    )
+    metrics = summarize(trades)
+    metrics["elapsed_s"] = round(time.perf_counter() - start, 3)
+    return params, metrics
+
+
+# ==========================================================
+# SWEEP
+# ==========================================================
+def sweep_prepared(candidates, nifty, ohlc, param_sets, fund=100000, leverage=5.0,
+                   max_workers=None, sort_by="total_pnl", executor=None):
+    """
+    Process-pool sweep over already prepared data (build_candidates /
+    nifty_levels output and the matching OHLC columns).
+
+    Args:
+        executor (ProcessPoolExecutor): pool to run on, left open for the
+                                        caller to reuse; None starts (and
+                                        shuts down) a pool of max_workers
+
+    Returns:
+        pd.DataFrame: one row per parameter set with its metrics, best first
+    """
+    if sort_by not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {sort_by!r}, expected one of {sorted(OBJECTIVES)}")
+    param_sets = [{**DEFAULT_PARAMS, **p} for p in param_sets]
+
+    shared = SharedOHLC(ohlc, {"candidates": candidates, "nifty": nifty, "fund": fund, "leverage": leverage})
+    pool = executor or ProcessPoolExecutor(max_workers=max_workers or os.cpu_count())
+    rows = []
+    try:
+        futures = [pool.submit(_run_one, shared.spec, p) for p in param_sets]
+        for fut in as_completed(futures):
+            try:
+                params, metrics = fut.result()
+                rows.append({**params, **metrics})
+            except Exception:
+                logger.exception("❌ Sweep task failed")
+    finally:
+        if executor is None:
+            pool.shutdown()
+        shared.close()
+
+    return rank(pd.DataFrame(rows), sort_by)
+
+
+def run_sweep(signals, bars, nifty_bars, param_sets, fund=100000, leverage=5.0,
+              decision_time=DECISION_TIME, max_workers=None, sort_by="total_pnl"):
+    """
+    Evaluate every parameter set over the same historical data in a
+    process pool.
+
+    Args:
+        signals, bars, nifty_bars: as for engine.run_backtest
+        param_sets (list[dict]): from grid() / random_search(); missing
+                                 knobs use DEFAULT_PARAMS
+        leverage: fixed leverage (avoids an S3 load in every worker);
+                  None uses the S3 leverage table
+        max_workers (int): pool size, default os.cpu_count()
+        sort_by (str): OBJECTIVES key; drawdown sorts lowest first
+
+    Returns:
+        pd.DataFrame: one row per parameter set with its metrics, best first
+    """
+    start = time.perf_counter()
+    nifty = nifty_levels(nifty_bars, decision_time)
+    candidates = build_candidates(signals, bars, decision_time)
+
+    result = sweep_prepared(candidates, nifty, bars, param_sets, fund=fund, leverage=leverage,
+                            max_workers=max_workers, sort_by=sort_by)
+
+    logger.info(
+        f"🧪 Sweep: {len(result)}/{len(param_sets)} parameter sets over {len(candidates)} candidates "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+    return result
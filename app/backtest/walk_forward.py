@@ -0,0 +1,183 @@
+# app/backtest/walk_forward.py
+import os
+import time
+import pickle
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from app.config.settings import CACHE_DIR
+from app.backtest.engine import DECISION_TIME, build_candidates, nifty_levels, evaluate, summarize
+from app.backtest.sweep import DEFAULT_PARAMS, OBJECTIVES, sweep_prepared
+
+logger = logging.getLogger(__name__)
+
+WALK_FORWARD_CACHE_DIR = os.path.join(CACHE_DIR, "walk_forward")
+
+# Bump when the cached fold layout or candidate building changes
+_CACHE_VERSION = 1
+
+
+# ==========================================================
+# FOLDS
+# ==========================================================
+def make_folds(days, in_sample=120, out_sample=20, step=None):
+    """
+    Rolling in-sample / out-of-sample windows over sorted trading days.
+
+    Args:
+        days (list): trading days (datetime.date)
+        in_sample (int): days used to tune
+        out_sample (int): following days used to score
+        step (int): days between fold starts (default out_sample, so
+                    out-of-sample windows are back to back)
+
+    Returns:
+        list[tuple]: (in_sample_days, out_of_sample_days)
+    """
+    days = sorted(days)
+    step = step or out_sample
+    folds = []
+    for start in range(0, len(days) - in_sample - out_sample + 1, step):
+        is_days = days[start: start + in_sample]
+        oos_days = days[start + in_sample: start + in_sample + out_sample]
+        folds.append((is_days, oos_days))
+    return folds
+
+
+# ==========================================================
+# CACHED FOLD DATASETS
+# ==========================================================
+def _fold_key(signals, bars, nifty, decision_time):
+    """Content hash of everything a fold dataset is built from."""
+    h = hashlib.sha1(f"v{_CACHE_VERSION}|{decision_time}".encode())
+    h.update(pd.util.hash_pandas_object(signals, index=False).to_numpy().tobytes())
+    h.update(pd.util.hash_pandas_object(bars, index=False).to_numpy().tobytes())
+    h.update(repr(sorted(nifty.items())).encode())
+    return h.hexdigest()
+
+
+def fold_dataset(signals, bars, nifty, days, decision_time=DECISION_TIME, cache_dir=WALK_FORWARD_CACHE_DIR):
+    """
+    Bars (OHLC arrays), ranked candidates and Nifty levels for `days`,
+    loaded from the disk cache when the fold's inputs are unchanged.
+
+    Returns:
+        dict: {"ohlc", "candidates", "nifty", "key"}
+    """
+    day_set = set(days)
+    fold_signals = signals[signals["Date"].isin(day_set)].reset_index(drop=True)
+    fold_bars = bars[bars["Date"].isin(day_set)].reset_index(drop=True)
+    fold_nifty = {d: v for d, v in nifty.items() if d in day_set}
+
+    key = _fold_key(fold_signals, fold_bars, fold_nifty, decision_time)
+    path = os.path.join(cache_dir, f"fold_{key}.pkl")
+
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as fh:
+                data = pickle.load(fh)
+            data["key"] = key
+            return data
+        except Exception:
+            logger.warning(f"⚠️ Unreadable fold cache {path}, rebuilding")
+
+    data = {
+        "ohlc": {col: fold_bars[col].to_numpy(dtype=np.float64) for col in ("Open", "High", "Low", "Close")},
+        "candidates": build_candidates(fold_signals, fold_bars, decision_time),
+        "nifty": fold_nifty,
+    }
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as fh:
+        pickle.dump(data, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+    data["key"] = key
+    data["built"] = True
+    return data
+
+
+# ==========================================================
+# WALK-FORWARD
+# ==========================================================
+def walk_forward(signals, bars, nifty_bars, param_sets, in_sample=120, out_sample=20, step=None,
+                 objective="total_pnl", fund=100000, leverage=5.0, decision_time=DECISION_TIME,
+                 max_workers=None, cache_dir=WALK_FORWARD_CACHE_DIR):
+    """
+    Tune on each in-sample window (process-pool sweep), then score the best
+    parameter set on the following out-of-sample window.
+
+    Args:
+        signals, bars, nifty_bars: as for engine.run_backtest
+        param_sets (list[dict]): candidates from sweep.grid() / random_search()
+        objective (str): OBJECTIVES key optimised in-sample (maximised, or
+                         minimised for max_drawdown)
+
+    Returns:
+        (folds, oos_trades):
+            folds (pd.DataFrame): per fold - windows, chosen params,
+                                  in-sample and out-of-sample metrics
+            oos_trades (pd.DataFrame): all out-of-sample trades
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective!r}, expected one of {sorted(OBJECTIVES)}")
+
+    start = time.perf_counter()
+    nifty = nifty_levels(nifty_bars, decision_time)
+    days = sorted(d for d in signals["Date"].unique() if d in nifty)
+    folds = make_folds(days, in_sample, out_sample, step)
+    if not folds:
+        logger.warning(f"⚠️ Not enough days ({len(days)}) for {in_sample}+{out_sample} walk-forward")
+        return pd.DataFrame(), pd.DataFrame()
+
+    rows, oos_frames, rebuilt = [], [], 0
+    # One pool for every fold; each sweep's tasks name their own shared dataset
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        for i, (is_days, oos_days) in enumerate(folds, start=1):
+            is_data = fold_dataset(signals, bars, nifty, is_days, decision_time, cache_dir)
+            oos_data = fold_dataset(signals, bars, nifty, oos_days, decision_time, cache_dir)
+            rebuilt += is_data.get("built", False) + oos_data.get("built", False)
+
+            sweep = sweep_prepared(
+                is_data["candidates"], is_data["nifty"], is_data["ohlc"], param_sets,
+                fund=fund, leverage=leverage, sort_by=objective, executor=pool,
+            )
+            if sweep.empty:
+                logger.warning(f"⚠️ Fold {i}: in-sample sweep returned nothing, skipped")
+                continue
+
+            best = {k: sweep[k].iloc[0].item() for k in [*DEFAULT_PARAMS, objective]}
+            params = {k: best[k] for k in DEFAULT_PARAMS}
+            oos_trades = evaluate(oos_data["candidates"], oos_data["nifty"], oos_data["ohlc"],
+                                  fund=fund, leverage=leverage, **params)
+            oos_metrics = summarize(oos_trades)
+
+            if not oos_trades.empty:
+                oos_trades.insert(0, "Fold", i)
+                oos_frames.append(oos_trades)
+
+            rows.append({
+                "fold": i,
+                "is_start": is_days[0], "is_end": is_days[-1],
+                "oos_start": oos_days[0], "oos_end": oos_days[-1],
+                **params,
+                f"is_{objective}": best[objective],
+                **{f"oos_{k}": v for k, v in oos_metrics.items()},
+            })
+            logger.info(
+                f"🔁 Fold {i}/{len(folds)} {oos_days[0]}..{oos_days[-1]} | params={params} | "
+                f"IS {objective}={best[objective]} | OOS pnl=₹{oos_metrics['total_pnl']:,.0f}"
+            )
+
+    oos = pd.concat(oos_frames, ignore_index=True) if oos_frames else pd.DataFrame()
+    total = summarize(oos)
+    logger.info(
+        f"📊 Walk-forward: {len(rows)} folds, {rebuilt} fold dataset(s) rebuilt, "
+        f"OOS {total['trades']} trades, PnL ₹{total['total_pnl']:,.0f} in {time.perf_counter() - start:.1f}s"
+    )
+    return pd.DataFrame(rows), oos
@@ -3,9 +3,17 @@ from telegram.ext import ContextTypes
 from app.config.settings import *
 from app.bot.telegram_sender import send_telegram_message
 from app.utils.symbol_formatter import format_symbol_string
+from app.utils.sampling_profiler import profile, ProfilerBusy
+from app.config import settings
 
 
+import html
 import asyncio
+import logging
+
+# Bounds for "profile N" (seconds)
+PROFILE_DEFAULT_SECONDS = 30
+PROFILE_MAX_SECONDS = 300
 
 # =============================================
 # Disclaimer Footer (added)
@@ -25,6 +33,10 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     text = update.message.text.lower()
 
+    if text.split()[:1] == ["profile"]:
+        await handle_profile(update, text)
+        return
+
     msg = f"""
 <b>🤖 Trading Bot Online</b>
 
@@ -34,3 +46,38 @@ Received message:
 Scanner features are currently disabled.
 """
     await update.message.reply_text(msg + FOOTER, parse_mode="HTML")
+
+
+
+async def handle_profile(update: Update, text: str):
+    """
+    "profile N": sample the running process for N seconds, reply with the
+    top functions and the collapsed-stack file (flamegraph.pl / speedscope).
+    Only accepted from the configured CHAT_ID.
+    """
+    if str(update.effective_chat.id) != str(settings.CHAT_ID):
+        logging.warning(f"⛔ profile request from unauthorised chat {update.effective_chat.id}")
+        return
+
+    parts = text.split()
+    try:
+        seconds = int(parts[1]) if len(parts) > 1 else PROFILE_DEFAULT_SECONDS
+    except ValueError:
+        await update.message.reply_text("Usage: profile <seconds>")
+        return
+    seconds = max(1, min(seconds, PROFILE_MAX_SECONDS))
+
+    await update.message.reply_text(f"🔬 Profiling for {seconds}s...")
+    try:
+        summary, path = await asyncio.to_thread(profile, seconds)
+    except ProfilerBusy:
+        await update.message.reply_text("⏳ A profile is already running")
+        return
+    except Exception as e:
+        logging.exception("❌ Profiling failed")
+        await update.message.reply_text(f"❌ Profiling failed: {e}")
+        return
+
+    await update.message.reply_text(f"<pre>{html.escape(summary)}</pre>", parse_mode="HTML")
+    with open(path, "rb") as fh:
+        await update.message.reply_document(fh, filename=path.rsplit("/", 1)[-1])
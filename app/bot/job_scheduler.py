@@ -0,0 +1,265 @@
+# app/bot/job_scheduler.py
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from app.config.settings import IST
+from app.utils import clock
+from app.utils.metrics import JOB_RUNS, JOB_DURATION, JOB_LATENESS
+
+logger = logging.getLogger(__name__)
+
+# Longest single sleep; the remaining time is re-measured after each chunk
+# so suspend / NTP steps / slow wakeups don't accumulate drift.
+_MAX_SLEEP_CHUNK = 30.0
+
+
+# ==========================================================
+# TRIGGERS
+# ==========================================================
+def _parse_cron_field(field, lo, hi):
+    """'*', '5', '1-5', '*/15', '0,30', '9-15/2' -> sorted list of ints."""
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step = part.split("/")
+            step = int(step)
+        if part == "*":
+            start, end = lo, hi
+        elif "-" in part:
+            start, end = (int(x) for x in part.split("-"))
+        else:
+            start = end = int(part)
+        if start < lo or end > hi or start > end:
+            raise ValueError(f"Cron field out of range: {field}")
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+
+class CronTrigger:
+    """
+    Five-field cron expression evaluated in `tz`:
+        minute hour day-of-month month day-of-week (0=Sunday)
+
+        CronTrigger("10 15 * * 1-5")   # 15:10 IST on weekdays
+        CronTrigger("*/5 9-15 * * *")  # every 5 minutes, 09:00-15:55 IST
+    """
+
+    def __init__(self, expr, tz=IST):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expr!r}")
+        self.expr = expr
+        self.tz = tz
+        self.minutes = _parse_cron_field(fields[0], 0, 59)
+        self.hours = _parse_cron_field(fields[1], 0, 23)
+        self.days = set(_parse_cron_field(fields[2], 1, 31))
+        self.months = set(_parse_cron_field(fields[3], 1, 12))
+        self.weekdays = {d % 7 for d in _parse_cron_field(fields[4], 0, 7)}   # 7 == Sunday
+        self._dom_any = fields[2] == "*"
+        self._dow_any = fields[4] == "*"
+
+    def _day_matches(self, d):
+        if d.month not in self.months:
+            return False
+        dom = d.day in self.days
+        dow = (d.weekday() + 1) % 7 in self.weekdays
+        if self._dom_any or self._dow_any:
+            return dom and dow
+        return dom or dow      # classic cron: either restriction matches
+
+    def next_after(self, dt: datetime) -> datetime:
+        """First fire time strictly after `dt`."""
+        local = dt.astimezone(self.tz).replace(tzinfo=None, second=0, microsecond=0)
+        start = local + timedelta(minutes=1)
+
+        day = start.replace(hour=0, minute=0)
+        for _ in range(366 * 5):
+            if self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = day.replace(hour=hour, minute=minute)
+                        if candidate >= start:
+                            return self.tz.localize(candidate)
+            day += timedelta(days=1)
+
+        raise ValueError(f"Cron expression never fires: {self.expr!r}")
+
+    def __repr__(self):
+        return f"cron({self.expr})"
+
+
+class IntervalTrigger:
+    """Every `seconds`, aligned to multiples of the interval since midnight (tz)."""
+
+    def __init__(self, seconds, tz=IST):
+        self.seconds = seconds
+        self.tz = tz
+
+    def next_after(self, dt: datetime) -> datetime:
+        local = dt.astimezone(self.tz)
+        midnight = local.replace(hour=0, minute=0, second=0, microsecond=0)
+        elapsed = (local - midnight).total_seconds()
+        steps = int(elapsed // self.seconds) + 1
+        return midnight + timedelta(seconds=steps * self.seconds)
+
+    def __repr__(self):
+        return f"every({self.seconds}s)"
+
+
+def daily_at(t, tz=IST, weekdays="*"):
+    """CronTrigger for a datetime.time, e.g. daily_at(INSIDEBAR_SCAN_TIME)."""
+    return CronTrigger(f"{t.minute} {t.hour} * * {weekdays}", tz)
+
+
+# ==========================================================
+# SLEEP UNTIL
+# ==========================================================
+async def sleep_until(target: datetime):
+    """
+    Sleep until `target` (timezone-aware). Sleeps in chunks and re-measures
+    the remaining time, so wakeups land on the due time instead of drifting.
+    """
+    while True:
+        remaining = target.timestamp() - clock.time_now()
+        if remaining <= 0:
+            return
+        await clock.asleep(min(remaining, _MAX_SLEEP_CHUNK))
+
+
+# ==========================================================
+# JOB REGISTRY
+# ==========================================================
+class Job:
+    def __init__(self, name, func, trigger, max_runs=None):
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.max_runs = max_runs
+
+        self.task = None
+        self.running = False
+        self.next_run = None
+        self.dispatched = 0
+
+        # Metrics
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_run = None
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+        self.last_lateness = 0.0
+
+    def metrics(self):
+        return {
+            "trigger": repr(self.trigger),
+            "next_run": self.next_run.isoformat() if self.next_run else None,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped_overlap": self.skipped,
+            "running": self.running,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "last_duration_s": round(self.last_duration, 3),
+            "avg_duration_s": round(self.total_duration / self.runs, 3) if self.runs else 0.0,
+            "max_duration_s": round(self.max_duration, 3),
+            "last_lateness_s": round(self.last_lateness, 3),
+        }
+
+
+class JobScheduler:
+    """
+    Timezone-aware job registry for the bot's event loop.
+
+    - Each job sleeps exactly until its next due time (no polling).
+    - A job still running when it comes due again is skipped, not overlapped.
+    - Jobs may be added or removed while the scheduler is running.
+    - Sync callables run in the default executor; coroutines run on the loop.
+    """
+
+    def __init__(self, tz=IST):
+        self.tz = tz
+        self.jobs = {}
+        self._runs = set()         # keep references to in-flight run tasks
+        self._started = False
+
+    def add_job(self, name, func, trigger, max_runs=None):
+        if name in self.jobs:
+            raise ValueError(f"Job already registered: {name}")
+
+        job = Job(name, func, trigger, max_runs)
+        self.jobs[name] = job
+        if self._started:
+            job.task = asyncio.create_task(self._job_loop(job), name=f"job:{name}")
+        logger.info(f"🗓️ Job added: {name} ({trigger!r})")
+        return job
+
+    def remove_job(self, name):
+        job = self.jobs.pop(name, None)
+        if job and job.task:
+            job.task.cancel()
+        return job
+
+    def start(self):
+        """Start all registered jobs. Must be called from the running loop."""
+        self._started = True
+        for job in self.jobs.values():
+            if job.task is None:
+                job.task = asyncio.create_task(self._job_loop(job), name=f"job:{job.name}")
+
+    def stop(self):
+        self._started = False
+        for job in self.jobs.values():
+            if job.task:
+                job.task.cancel()
+                job.task = None
+
+    async def _job_loop(self, job):
+        last_due = clock.now(self.tz)
+        while job.max_runs is None or job.dispatched < job.max_runs:
+            job.next_run = job.trigger.next_after(max(last_due, clock.now(self.tz)))
+            await sleep_until(job.next_run)
+            last_due = job.next_run
+
+            if job.running:
+                job.skipped += 1
+                JOB_RUNS.labels(job.name, "skipped").inc()
+                logger.warning(f"⏭️ Job {job.name} still running, skipping run due {job.next_run:%H:%M:%S}")
+                continue
+
+            job.last_lateness = clock.time_now() - job.next_run.timestamp()
+            JOB_LATENESS.labels(job.name).set(job.last_lateness)
+            job.dispatched += 1
+            task = asyncio.create_task(self._run(job), name=f"run:{job.name}")
+            self._runs.add(task)
+            task.add_done_callback(self._runs.discard)
+        job.next_run = None
+
+    async def _run(self, job):
+        job.running = True
+        job.last_run = clock.now(self.tz)
+        start = clock.monotonic()
+        try:
+            if asyncio.iscoroutinefunction(job.func):
+                await job.func()
+            else:
+                await asyncio.get_running_loop().run_in_executor(None, job.func)
+            job.runs += 1
+            JOB_RUNS.labels(job.name, "ok").inc()
+        except Exception:
+            job.failures += 1
+            JOB_RUNS.labels(job.name, "failed").inc()
+            logger.exception(f"❌ Job {job.name} failed")
+        finally:
+            elapsed = clock.monotonic() - start
+            job.running = False
+            job.last_duration = elapsed
+            job.total_duration += elapsed
+            job.max_duration = max(job.max_duration, elapsed)
+            JOB_DURATION.labels(job.name).observe(elapsed)
+            logger.info(f"🗓️ Job {job.name} finished in {elapsed:.2f}s")
+
+    def metrics(self):
+        return {name: job.metrics() for name, job in self.jobs.items()}
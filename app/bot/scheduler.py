@@ -1,46 +1,125 @@
 # app/bot/scheduler.py
 import asyncio
 import logging
-import boto3
-from datetime import datetime, time
-from app.config.settings import IST, INSIDEBAR_SCAN_TIME
+from datetime import time
+from app.config.settings import IST, INSIDEBAR_SCAN_TIME, ENTRY_MAX_SLIPPAGE_R, PATTERN_SCANS, PATTERN_POLL_SECONDS
 from app.config.dhan_auth import dhan
 from app.bot.telegram_sender import send_telegram_message
+from app.utils import clock
+from app.bot.job_scheduler import sleep_until
 
 from app.utils.get_instance_id import get_instance_id  # your existing function
 
-import threading
 from app.config.aws_s3 import read_csv_from_s3
 from app.strategy.stock_selector import select_best_stock,rank_stocks
 from app.strategy.nifty_filter import is_nifty_trade_allowed
-from app.execution.trade_executor import execute_trade
-from app.broker.market_data import get_nifty_ltp_and_prev_close
+from app.execution.trade_executor import execute_trade, resume_trade, MONITOR_POLL_SECONDS
+from app.execution import trade_journal as journal
+from app.execution.reconciler import fetch_broker_snapshot, reconcile
+from app.broker.order_idempotency import ORDER_INDEX
+from app.broker.market_data import get_nifty_ltp_and_prev_close, get_quotes_with_retry, get_ltp
+from app.broker.dhan_super_client import DhanSuperBroker
+from app.broker.instrument_registry import get_registry
+from app.execution.trigger_engine import TriggerEngine
+from app.bot.session_state import get_session
+from app.utils.metrics import TRADE_RUNS
+from app.strategy.pattern_scanner import BoundedAlertSet, PatternScanner, format_alerts, inside_bar, opposite_candle
+from app.strategy.candle_aggregator import CandleAggregator
 import random
 
 # --------------------------
 # InsideBar 5-min scan state
 # --------------------------
-insidebar_done = None
-insidebar_enabled = False
-insidebar_alerted = set()
-insidebar_alert_lock = threading.Lock()
+insidebar_enabled = PATTERN_SCANS
+insidebar_alerted = BoundedAlertSet(maxsize=2000)
 insidebar_lock = asyncio.Lock()
 
 # --------------------------
 # 15-min Opposite Candle state
 # --------------------------
-opposite_done = None
-opposite_enabled = False
-opposite_alerted = set()
-opposite_alert_lock = threading.Lock()
+opposite_enabled = PATTERN_SCANS
+opposite_alerted = BoundedAlertSet(maxsize=2000)
 opposite_lock = asyncio.Lock()
 
 
+def attach_pattern_scanners(aggregator, names=None):
+    """
+    Run the inside-bar (5-min, from INSIDEBAR_SCAN_TIME) and opposite-candle
+    (15-min) scans on every bar close of `aggregator` and alert on Telegram,
+    one message per scan.
+    Must be called from the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+
+    def alerter(done_key):
+        def alert(signals):
+            for msg in format_alerts(signals):
+                asyncio.run_coroutine_threadsafe(send_telegram_message(msg), loop)
+            get_session().increment("alerts_sent", by=len(signals), **{done_key: True})
+        return alert
+
+    scanners = [
+        PatternScanner("InsideBar 5m", inside_bar, 5, alerter("insidebar_done"), insidebar_alerted,
+                       start_time=INSIDEBAR_SCAN_TIME, names=names),
+        PatternScanner("Opposite 15m", opposite_candle, 15, alerter("opposite_done"), opposite_alerted,
+                       names=names),
+    ]
+    scanners[0].enabled = insidebar_enabled
+    scanners[1].enabled = opposite_enabled
+    for scanner in scanners:
+        scanner.attach(aggregator)
+    return scanners
+
+
+async def run_pattern_scans(stop_at=time(15, 30), interval=PATTERN_POLL_SECONDS):
+    """
+    Live pattern alerts (PATTERN_SCANS=1): poll quotes for every instrument
+    in the registry, build 5/15-minute bars in a CandleAggregator and run
+    the attached scanners on each bar close, from 09:15 until `stop_at`.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        open_at = clock.now(IST).replace(hour=9, minute=15, second=0, microsecond=0)
+        await sleep_until(open_at)
+
+        registry = await loop.run_in_executor(None, get_registry)
+        ids = registry.ids.tolist()
+        if not ids:
+            logging.error("❌ Instrument registry is empty, pattern scans not started")
+            return
+
+        aggregator = CandleAggregator(ids, timeframes=(5, 15))
+        attach_pattern_scanners(aggregator, names={sid: registry.name(sid) for sid in ids})
+        logging.info(f"🔍 Pattern scans running on {len(ids)} instruments every {interval:.0f}s")
+
+        def poll():
+            quotes = get_quotes_with_retry(ids, "NSE_EQ")
+            now = clock.time_now()
+            aggregator.ingest_quotes(quotes, now)
+            aggregator.flush(now)       # closes bars even when the poll failed
+
+        while clock.now(IST).time() < stop_at:
+            await loop.run_in_executor(None, poll)
+            await clock.asleep(interval)
+
+        logging.info("⏹️ Pattern scans stopped for the day")
+
+    except Exception as e:
+        logging.exception(f"❌ Error in run_pattern_scans: {e}")
+
+
 
 # --------------------------
 # EC2 Termination Scheduler
 # --------------------------
 def terminate_instance(instance_id, region="ap-south-1"):
+    import boto3
+    from app.config import settings
+
+    if settings.DRY_RUN:
+        logging.info(f"🧪 [dry-run] Not terminating instance {instance_id}")
+        return
+
     try:
         ec2 = boto3.client("ec2", region_name=region)
         ec2.terminate_instances(InstanceIds=[instance_id])
@@ -48,20 +127,14 @@ def terminate_instance(instance_id, region="ap-south-1"):
     except Exception as e:
         logging.error(f"❌ Termination failed: {e}")
 
-async def terminate_at(target_hour=10, target_minute=40):
+async def terminate_instance_now():
     instance_id = get_instance_id()
     if not instance_id or instance_id == "UNKNOWN":
         logging.error("❌ Cannot terminate — instance ID not found")
         return
 
-    while True:
-        now = datetime.now()
-        if now.hour == target_hour and now.minute == target_minute:
-            logging.info(f"🕓 Time reached {target_hour}:{target_minute}, terminating instance...")
-            terminate_instance(instance_id)
-            break
-        await asyncio.sleep(20)
-
+    logging.info(f"🕓 Scheduled termination time reached, terminating instance {instance_id}...")
+    await asyncio.get_running_loop().run_in_executor(None, terminate_instance, instance_id)
 
 
 async def terminate_after_delay(max_delay_minutes=5):
@@ -76,7 +149,7 @@ async def terminate_after_delay(max_delay_minutes=5):
         f"🕒 EC2 will terminate in {delay_minutes} minute(s)"
     )
 
-    await asyncio.sleep(delay_minutes * 60)
+    await clock.asleep(delay_minutes * 60)
 
     instance_id = get_instance_id()
     if not instance_id or instance_id == "UNKNOWN":
@@ -92,27 +165,66 @@ async def terminate_after_delay(max_delay_minutes=5):
 
 BUCKET = "dhan-trading-data"
 CSV_KEY = "uploads/nifty_15m_breakout_signals.csv"
-# --------------------------
-# Daily trade state
-# --------------------------
-trade_executed_today = False  # ✅ Added to prevent multiple trades per day
+async def restore_session():
+    """
+    Rebuild today's trade state before any polling starts: replay the
+    journal, then reconcile it with one parallel broker snapshot.
+    Returns positions that still need a monitor.
+    """
+    session = get_session()
+    logging.info(f"🗂️ Session state: {session.snapshot()}")
+
+    state = journal.replay_today()
+    try:
+        snapshot = await asyncio.to_thread(fetch_broker_snapshot, dhan)
+        live = reconcile(state, snapshot)
+    except Exception:
+        logging.exception("❌ Broker reconciliation failed, using journal state only")
+        live = state.live_positions()
+    ORDER_INDEX.seed(state.positions)
+
+    # A filled or still-pending order counts as today's trade
+    if (state.trades_filled() or live) and not session["trade_executed"]:
+        session.update(trade_executed=True)
+        logging.info("📒 Trade already taken today (journal/broker)")
+
+    return live
 
-async def run_nifty_breakout_trade():
-    global trade_executed_today
+
+async def resume_open_trades(positions):
+    loop = asyncio.get_running_loop()
+    for pos in positions:
+        name = pos["stock"]["Stock Name"]
+        await send_telegram_message(f"♻️ Restart: resuming monitor for {name} | Order ID: {pos['order_id']}")
+        success = await loop.run_in_executor(None, resume_trade, pos, dhan)
+        logging.info(f"♻️ Resumed trade for {name} finished | success={success}")
+        if success:
+            asyncio.create_task(terminate_after_delay(5))
+
+
+async def run_nifty_breakout_trade(df=None):
+    """
+    Trade the best breakout signal of the day.
+    `df` overrides the signals CSV read from S3 (replays / tests).
+    """
+    session = get_session()
 
     # Skip if a trade has already succeeded today
-    if trade_executed_today:
+    if session["trade_executed"]:
         logging.info("⚠️ Trade already executed today, skipping further attempts")
+        TRADE_RUNS.labels("skipped").inc()
         return
 
     try:
-        logging.info("📥 Reading breakout signals from S3")
-        df = read_csv_from_s3(BUCKET, CSV_KEY)
+        if df is None:
+            logging.info("📥 Reading breakout signals from S3")
+            df = read_csv_from_s3(BUCKET, CSV_KEY)
 
         ranked_stocks = rank_stocks(df)
         if not ranked_stocks:
             logging.info("❌ No valid stocks for breakout today")
             await send_telegram_message("❌ No valid stocks for breakout today")
+            TRADE_RUNS.labels("no_signals").inc()
             return
 
         # 2️⃣ Nifty quotes
@@ -120,6 +232,7 @@ async def run_nifty_breakout_trade():
         if not nifty_ltp or not nifty_prev_close:
             logging.error("❌ Failed to fetch Nifty quotes, skipping trade.")
             await send_telegram_message("❌ Failed to fetch Nifty quotes, skipping trade.")
+            TRADE_RUNS.labels("no_nifty_quote").inc()
             return
 
         net_change = nifty_ltp - nifty_prev_close
@@ -143,6 +256,14 @@ async def run_nifty_breakout_trade():
                 continue
 
             logging.info(f"🚀 Attempt {attempt}: Executing trade for {stock['Stock Name']} | {stock['Signal']}")
+            journal.record(
+                journal.SIGNAL,
+                stock=stock["Stock Name"],
+                signal=stock["Signal"],
+                entry=stock["Entry"],
+                sl=stock["SL"],
+                attempt=attempt,
+            )
             await send_telegram_message(
                 f"🚀 Attempt {attempt}: Executing trade for {stock['Stock Name']} | {stock['Signal']}\n"
                 f"Entry: {stock['Entry']}\nSL: {stock['SL']}\nQty: {stock['Quantity']}\n"
@@ -155,7 +276,8 @@ async def run_nifty_breakout_trade():
                 await send_telegram_message(
                     f"✅ Trade executed successfully for {stock['Stock Name']} on attempt {attempt}"
                 )
-                trade_executed_today = True  # ✅ Mark as executed
+                session.increment("trades_taken", trade_executed=True)  # ✅ Mark as executed
+                TRADE_RUNS.labels("executed").inc()
                 # 🔥 Schedule random termination in background (1–5 min)
                 asyncio.create_task(terminate_after_delay(5))
                 break
@@ -167,8 +289,166 @@ async def run_nifty_breakout_trade():
 
         else:
             logging.error("❌ All trade attempts failed")
+            TRADE_RUNS.labels("all_failed").inc()
             await send_telegram_message("❌ All trade attempts failed today")
 
     except Exception as e:
         logging.error(f"❌ Error in run_nifty_breakout_trade: {e}")
+        TRADE_RUNS.labels("error").inc()
+        await send_telegram_message(f"❌ Trade execution error: {e}")
+
+
+
+async def run_breakout_triggers(df=None, stop_at=time(15, 0)):
+    """
+    Trigger variant of run_nifty_breakout_trade (ENTRY_TRIGGERS=1).
+
+    Every candidate that passes the Nifty filter is sized up front
+    (stage_trade) and armed in a TriggerEngine at its Entry, invalidated at
+    its SL. Quotes for the armed symbols are polled back to back (the quote
+    API allows one request per second). When a batch shows price through
+    Entry the symbol is re-quoted, rejected if it is more than
+    ENTRY_MAX_SLIPPAGE_R past Entry, re-sized at the live price if it moved,
+    and sent from its own executor task. While that trade runs, the other
+    triggers are only re-quoted at the monitor's cadence (for invalidations).
+    One trade per day: other triggers are ignored once a trade succeeds.
+    """
+    session = get_session()
+    if session["trade_executed"]:
+        logging.info("⚠️ Trade already executed today, skipping further attempts")
+        TRADE_RUNS.labels("skipped").inc()
+        return
+
+    try:
+        if df is None:
+            logging.info("📥 Reading breakout signals from S3")
+            df = read_csv_from_s3(BUCKET, CSV_KEY)
+
+        ranked_stocks = rank_stocks(df)
+        if not ranked_stocks:
+            logging.info("❌ No valid stocks for breakout today")
+            await send_telegram_message("❌ No valid stocks for breakout today")
+            TRADE_RUNS.labels("no_signals").inc()
+            return
+
+        nifty_ltp, nifty_prev_close = get_nifty_ltp_and_prev_close()
+        if not nifty_ltp or not nifty_prev_close:
+            logging.error("❌ Failed to fetch Nifty quotes, skipping trade.")
+            await send_telegram_message("❌ Failed to fetch Nifty quotes, skipping trade.")
+            TRADE_RUNS.labels("no_nifty_quote").inc()
+            return
+
+        # 1️⃣ Stage and arm every allowed candidate
+        loop = asyncio.get_running_loop()
+        broker = DhanSuperBroker(dhan)
+        engine = TriggerEngine()
+        for rank, stock in enumerate(ranked_stocks, start=1):
+            if not is_nifty_trade_allowed(stock["Signal"], nifty_ltp, nifty_prev_close):
+                logging.info(f"❌ Nifty filter failed for {stock['Stock Name']}, not armed")
+                continue
+            staged = await loop.run_in_executor(None, broker.stage_trade, stock, stock["Entry"])
+            if staged:
+                engine.arm(stock["Security ID"], stock["Signal"], stock["Entry"], stock["SL"],
+                           payload=(rank, stock, staged))
+
+        if not engine.armed:
+            await send_telegram_message("❌ No breakout candidate passed the Nifty filter today")
+            TRADE_RUNS.labels("no_signals").inc()
+            return
+        await send_telegram_message(f"🎯 {engine.armed} breakout trigger(s) armed until {stop_at:%H:%M}")
+
+        # 2️⃣ Take one trigger: re-quote, check slippage, re-size, send
+        def take(ev):
+            rank, stock, staged = ev["payload"]
+            ltp = get_ltp(stock["Security ID"])
+            if ltp is None:
+                engine.arm(ev["security_id"], ev["side"], ev["entry"], ev["invalidation"], ev["payload"])
+                return False
+
+            direction = 1 if ev["side"] == "BUY" else -1
+            chase = direction * (ltp - ev["entry"])
+            if chase < 0:
+                # Back below the level by the time we looked: a wick, keep watching
+                logging.info(f"↩️ {stock['Stock Name']} back through entry (LTP {ltp}), re-armed")
+                engine.arm(ev["security_id"], ev["side"], ev["entry"], ev["invalidation"], ev["payload"])
+                return False
+            risk = abs(ev["entry"] - ev["invalidation"])
+            if chase > ENTRY_MAX_SLIPPAGE_R * risk:
+                logging.warning(
+                    f"⚠️ {stock['Stock Name']} LTP {ltp} is {chase / risk:.2f}R past entry "
+                    f"(cap {ENTRY_MAX_SLIPPAGE_R}R), not chasing"
+                )
+                return False
+
+            if ltp != staged.get("price"):
+                staged = broker.stage_trade(stock, ltp)     # size for the real fill price
+                if not staged:
+                    return False
+
+            journal.record(
+                journal.SIGNAL, stock=stock["Stock Name"], signal=stock["Signal"],
+                entry=stock["Entry"], sl=stock["SL"], attempt=rank, trigger_price=ltp,
+            )
+            asyncio.run_coroutine_threadsafe(send_telegram_message(
+                f"⚡ Breakout trigger | {stock['Stock Name']} | {stock['Signal']} @ {ltp} "
+                f"(entry {stock['Entry']}, SL {stock['SL']})"
+            ), loop)
+            if execute_trade(stock, dhan, staged=staged, price=ltp):
+                session.increment("trades_taken", trade_executed=True)
+                asyncio.run_coroutine_threadsafe(send_telegram_message(
+                    f"✅ Trade executed successfully for {stock['Stock Name']}"
+                ), loop)
+                return True
+            asyncio.run_coroutine_threadsafe(send_telegram_message(
+                f"❌ Trade FAILED for {stock['Stock Name']}, still watching {engine.armed} trigger(s)"
+            ), loop)
+            return False
+
+        def take_safely(ev):
+            try:
+                return take(ev)
+            except Exception:
+                logging.exception(f"❌ Triggered trade failed for {ev['security_id']}")
+                return False
+
+        def poll(limit):
+            return engine.ingest_quotes(get_quotes_with_retry(engine.armed_ids(), "NSE_EQ"), limit=limit)
+
+        # 3️⃣ Poll until traded, nothing left armed, or the cut-off. One trigger
+        # per batch. While a trade runs (which includes monitoring it to exit)
+        # the others stay armed and quotes drop to the monitor's cadence, only
+        # to apply invalidations; full-speed polling resumes if it fails.
+        trade = None
+        while not session["trade_executed"] and clock.now(IST).time() < stop_at:
+            if trade is not None:
+                pause = asyncio.ensure_future(clock.asleep(MONITOR_POLL_SECONDS))
+                await asyncio.wait({trade, pause}, return_when=asyncio.FIRST_COMPLETED)
+                pause.cancel()
+                if trade.done():
+                    trade = None
+                    continue
+                if engine.armed:
+                    await loop.run_in_executor(None, poll, 0)
+                continue
+            if not engine.armed:
+                break
+            events = await loop.run_in_executor(None, poll, 1)
+            if events:
+                trade = loop.run_in_executor(None, take_safely, events[0])
+
+        if trade is not None:
+            await trade
+
+        if session["trade_executed"]:
+            TRADE_RUNS.labels("executed").inc()
+            asyncio.create_task(terminate_after_delay(5))
+        else:
+            engine.disarm()
+            logging.info("⏹️ No breakout trigger traded today")
+            await send_telegram_message("⏹️ No breakout trigger traded today")
+            TRADE_RUNS.labels("no_trigger").inc()
+
+    except Exception as e:
+        logging.error(f"❌ Error in run_breakout_triggers: {e}")
+        TRADE_RUNS.labels("error").inc()
         await send_telegram_message(f"❌ Trade execution error: {e}")
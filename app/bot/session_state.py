@@ -0,0 +1,124 @@
+# app/bot/session_state.py
+import os
+import json
+import logging
+import threading
+from types import MappingProxyType
+
+from app.config.settings import IST, STATE_DIR
+from app.utils import clock
+
+logger = logging.getLogger(__name__)
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def _defaults(day):
+    return {
+        "date": day,
+        "trade_executed": False,    # daily limit: one breakout trade per day
+        "trades_taken": 0,
+        "insidebar_done": False,
+        "opposite_done": False,
+        "alerts_sent": 0,
+        "updated_at": None,
+    }
+
+
+class SessionState:
+    """
+    Per-day bot state (daily trade limit, scan flags, counters).
+
+    - get() returns an immutable snapshot; readers never take a lock.
+    - update() copies the snapshot, applies changes, persists it and swaps
+      the reference, all under one writer lock.
+    - The state is keyed by IST date: the first access on a new day starts
+      from fresh defaults.
+    - Each day's state is written atomically to STATE_DIR/session_YYYYMMDD.json
+      so a restart resumes with the right daily limits immediately.
+    """
+
+    def __init__(self, state_dir=STATE_DIR):
+        self.state_dir = state_dir
+        self._write_lock = threading.Lock()
+        self._snap = self._load(self._today())
+
+    @staticmethod
+    def _today():
+        return clock.now(IST).strftime("%Y%m%d")
+
+    def path(self, day):
+        return os.path.join(self.state_dir, f"session_{day}.json")
+
+    def _load(self, day):
+        data = _defaults(day)
+        try:
+            with open(self.path(day)) as fh:
+                data.update(json.load(fh))
+            logger.info(f"🗂️ Session state restored for {day}: trade_executed={data['trade_executed']}")
+        except FileNotFoundError:
+            pass
+        except Exception:
+            logger.exception(f"❌ Unreadable session state for {day}, starting fresh")
+        data["date"] = day
+        return MappingProxyType(data)
+
+    def _persist(self, data):
+        os.makedirs(self.state_dir, exist_ok=True)
+        path = self.path(data["date"])
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(data, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+
+    def get(self):
+        """Lock-free read of today's snapshot (read-only mapping)."""
+        snap = self._snap
+        if snap["date"] != self._today():
+            with self._write_lock:
+                if self._snap["date"] != self._today():
+                    self._snap = self._load(self._today())
+            snap = self._snap
+        return snap
+
+    def __getitem__(self, key):
+        return self.get()[key]
+
+    def _write(self, make_changes):
+        with self._write_lock:
+            today = self._today()
+            base = self._snap if self._snap["date"] == today else self._load(today)
+            data = dict(base, **make_changes(base))
+            data["updated_at"] = clock.now(IST).isoformat()
+            try:
+                self._persist(data)
+            except Exception:
+                logger.exception("❌ Failed to persist session state")
+            self._snap = MappingProxyType(data)
+            return self._snap
+
+    def update(self, **changes):
+        """Copy-on-write update of today's state. Returns the new snapshot."""
+        return self._write(lambda base: changes)
+
+    def increment(self, key, by=1, **changes):
+        """Atomically add `by` to a counter (plus any other changes)."""
+        return self._write(lambda base: {**changes, key: base.get(key, 0) + by})
+
+    def snapshot(self):
+        """Plain dict copy, e.g. for logging or a status message."""
+        return dict(self.get())
+
+
+def get_session() -> SessionState:
+    global _SESSION
+
+    # Lock only for the first call; afterwards a plain read
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                _SESSION = SessionState()
+    return _SESSION
@@ -3,7 +3,7 @@ import os
 import logging
 import asyncio
 import requests
-from app.config.settings import BOT_TOKEN, CHAT_ID
+from app.config import settings
 
 # Standard footer for all messages
 TELEGRAM_FOOTER = "\n\n⚠️ This is for educational purposes only. Not a buy/sell recommendation. Trade at your own risk."
@@ -11,9 +11,13 @@ TELEGRAM_FOOTER = "\n\n⚠️ This is for educational purposes only. Not a buy/s
 async def send_telegram_message(message: str):
     # Append footer automatically
     full_message = f"{message}{TELEGRAM_FOOTER}"
+
+    if settings.DRY_RUN:
+        logging.info(f"📩 [dry-run] Alert not sent: {message}")
+        return
     
-    url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
-    payload = {"chat_id": CHAT_ID, "text": full_message, "parse_mode": "HTML"}
+    url = f"https://api.telegram.org/bot{settings.BOT_TOKEN}/sendMessage"
+    payload = {"chat_id": settings.CHAT_ID, "text": full_message, "parse_mode": "HTML"}
     
     try:
         requests.post(url, data=payload, timeout=5)
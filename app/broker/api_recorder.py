@@ -0,0 +1,287 @@
+# app/broker/api_recorder.py
+#
+# Record every Dhan SDK call of a live session and replay it later:
+#
+#   DHAN_RECORD=1 python -m app.main            # logs/dhan_api_YYYYMMDD_HHMMSS.jsonl.gz
+#   python -m app.broker.api_recorder logs/dhan_api_....jsonl.gz --speed 60 --signals signals.csv
+#
+# Stdlib-only imports at module level: the replay CLI must set its
+# environment (DRY_RUN, JOURNAL_DIR, STATE_DIR) before settings load.
+import os
+import json
+import gzip
+import time
+import atexit
+import bisect
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Gzip stream is sync-flushed at most this often (a crash loses <= 1s)
+_FLUSH_INTERVAL = 1.0
+
+
+def _jsonable(value):
+    return json.loads(json.dumps(value, default=str))
+
+
+def _arg_key(args, kwargs):
+    return json.dumps([_jsonable(list(args)), _jsonable(kwargs)], sort_keys=True)
+
+
+def default_record_path():
+    from app.config.settings import LOG_DIR
+    return os.path.join(LOG_DIR, time.strftime("dhan_api_%Y%m%d_%H%M%S.jsonl.gz"))
+
+
+# ==========================================================
+# RECORDING
+# ==========================================================
+class RecordingDhan:
+    """
+    Transparent proxy around a dhanhq client. Every method call is written
+    to a gzip JSONL file as
+        {"t": ts, "m": method, "a": args, "k": kwargs, "r": result | "e": error, "ms": latency}
+    The first line is a header with the client's constants (NSE, BUY ...).
+    """
+
+    def __init__(self, client, path):
+        from app.utils import clock
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._client = client
+        self._clock = clock
+        self._path = path
+        self._fh = gzip.open(path, "at", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+        constants = {
+            name: getattr(client, name) for name in dir(client)
+            if name.isupper() and isinstance(getattr(client, name, None), (str, int, float))
+        }
+        self._write({"type": "header", "t": clock.time_now(), "constants": constants})
+        atexit.register(self.close)
+        logger.info(f"🎙️ Recording Dhan API traffic to {path}")
+
+    def _write(self, rec):
+        line = json.dumps(rec, default=str, separators=(",", ":"))
+        with self._lock:
+            if self._fh is None:
+                return
+            self._fh.write(line + "\n")
+            if time.monotonic() - self._last_flush >= _FLUSH_INTERVAL:
+                self._fh.flush()
+                self._last_flush = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            ts = self._clock.time_now()
+            start = time.perf_counter()
+            rec = {"t": ts, "m": name, "a": args, "k": kwargs}
+            try:
+                result = attr(*args, **kwargs)
+                rec["r"] = result
+                return result
+            except Exception as e:
+                rec["e"] = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                rec["ms"] = round((time.perf_counter() - start) * 1000, 2)
+                try:
+                    self._write(rec)
+                except Exception:
+                    logger.exception(f"❌ Failed to record {name}")
+
+        return call
+
+
+# ==========================================================
+# REPLAY
+# ==========================================================
+def load_recording(path):
+    """
+    Returns:
+        (header, records): records sorted by time. A stream truncated by a
+        crash is read up to its last complete line.
+    """
+    header, records = {}, []
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        try:
+            for line in fh:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if rec.get("type") == "header":
+                    header = header or rec
+                else:
+                    records.append(rec)
+        except (EOFError, OSError):
+            logger.warning(f"⚠️ {path} is truncated, replaying {len(records)} complete records")
+    records.sort(key=lambda r: r["t"])
+    return header, records
+
+
+class ReplayMiss(RuntimeError):
+    """The replayed code made a call the recording has no response for."""
+
+
+class ReplayDhan:
+    """
+    Stand-in for the dhanhq client that answers from a recording.
+
+    A call is matched on method + arguments (falling back to method only).
+    Among the matching records it returns the latest one recorded at or
+    before the current (simulated) clock time, but always moves forward at
+    least one record per call - so polling loops see the order states in
+    the order they happened, whatever the replay speed.
+    """
+
+    def __init__(self, path):
+        from app.utils import clock
+
+        self._clock = clock
+        header, records = load_recording(path)
+        self.constants = header.get("constants", {})
+        self.start_ts = records[0]["t"] if records else header.get("t", time.time())
+
+        self._by_key, self._by_method = {}, {}
+        for rec in records:
+            key = (rec["m"], _arg_key(rec.get("a", []), rec.get("k", {})))
+            self._by_key.setdefault(key, []).append(rec)
+            self._by_method.setdefault(rec["m"], []).append(rec)
+        self._times = {id(v): [r["t"] for r in v] for v in (*self._by_key.values(), *self._by_method.values())}
+        self._cursor = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.misses = 0
+        logger.info(f"▶️ Loaded {len(records)} recorded Dhan calls from {path}")
+
+    def __getattr__(self, name):
+        constants = self.__dict__.get("constants", {})
+        if name in constants:
+            return constants[name]
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self._respond(name, args, kwargs)
+
+    def _respond(self, name, args, kwargs):
+        recs = self._by_key.get((name, _arg_key(args, kwargs))) or self._by_method.get(name)
+        with self._lock:
+            self.calls += 1
+            if not recs:
+                self.misses += 1
+                raise ReplayMiss(f"No recorded response for {name}")
+
+            cursor = self._cursor.get(id(recs), 0)
+            by_time = bisect.bisect_right(self._times[id(recs)], self._clock.time_now()) - 1
+            idx = min(max(cursor, by_time), len(recs) - 1)
+            self._cursor[id(recs)] = idx + 1
+
+        rec = recs[idx]
+        if "e" in rec:
+            raise RuntimeError(f"[replayed] {rec['e']}")
+        return rec.get("r")
+
+    def stats(self):
+        return {"calls": self.calls, "misses": self.misses}
+
+
+# ==========================================================
+# REPLAY DRIVER
+# ==========================================================
+async def _drive_session(signals, sim_clock):
+    import asyncio
+    from app.bot import scheduler
+
+    if hasattr(sim_clock, "install"):
+        sim_clock.install(asyncio.get_running_loop())
+
+    live = await scheduler.restore_session()
+    tasks = []
+    if live:
+        tasks.append(scheduler.resume_open_trades(live))
+    tasks.append(scheduler.run_nifty_breakout_trade(signals))
+    await asyncio.gather(*tasks)
+
+
+def replay_session(path, speed=None, signals=None):
+    """
+    Re-run restore_session + run_nifty_breakout_trade against a recording.
+
+    Args:
+        path (str): recording written with DHAN_RECORD
+        speed (float): N x wall-clock speed; None/0 runs on a VirtualClock
+                       (sleeps complete instantly, in wake-time order)
+        signals (pd.DataFrame): breakout signals for the day (otherwise read from S3)
+
+    Returns:
+        dict: replay call statistics
+    """
+    import asyncio
+    from datetime import datetime
+    from app.config.settings import IST
+    from app.config.dhan_auth import dhan
+    from app.utils import clock
+
+    replay = ReplayDhan(path)
+    start = datetime.fromtimestamp(replay.start_ts, IST)
+    sim_clock = clock.ScaledClock(start, speed) if speed else clock.VirtualClock(start)
+
+    old_clock = clock.set_clock(sim_clock)
+    dhan._reset(replay)
+    began = time.perf_counter()
+    try:
+        asyncio.run(_drive_session(signals, sim_clock))
+    finally:
+        dhan._reset(None)
+        clock.set_clock(old_clock)
+
+    stats = replay.stats()
+    stats["wall_s"] = round(time.perf_counter() - began, 2)
+    logger.info(f"⏹️ Replay finished: {stats}")
+    return stats
+
+
+def main(argv=None):
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Replay a recorded Dhan API session")
+    parser.add_argument("recording")
+    parser.add_argument("--speed", type=float, default=0, help="N x speed (0 = instant virtual time)")
+    parser.add_argument("--signals", help="breakout signals CSV (default: read from S3)")
+    parser.add_argument("--workdir", help="journal/state directory (default: temp dir)")
+    opts = parser.parse_args(argv)
+
+    # Isolate replay side effects before any settings are imported
+    workdir = opts.workdir or tempfile.mkdtemp(prefix="replay_")
+    os.environ["DRY_RUN"] = "1"
+    os.environ["JOURNAL_DIR"] = os.path.join(workdir, "journal")
+    os.environ["STATE_DIR"] = os.path.join(workdir, "state")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    signals = None
+    if opts.signals:
+        import pandas as pd
+        signals = pd.read_csv(opts.signals)
+
+    replay_session(opts.recording, speed=opts.speed or None, signals=signals)
+    logger.info(f"📁 Replay journal/state in {workdir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,77 @@
 
 import logging
 import json
-import time
 from app.config.dhan_auth import dhan  # DHAN SDK with enums
 from app.broker.super_order import SuperOrder
 from app.broker.market_data import get_ltp
 from app.broker.fund_manager import init_fund_cache
 from app.broker.leverage_manager import init_leverage_cache
 from app.broker.position_sizing import calculate_position_size
+from app.broker.instrument_registry import to_security_id
+from app.broker.order_idempotency import ORDER_INDEX, PLACED, find_order_by_correlation, is_ambiguous_failure
+from app.utils import clock
+from app.utils.metrics import DHAN_API_CALLS, DHAN_API_ERRORS, DHAN_API_RETRIES, ORDER_RTT, ORDERS
 
+_PLACE_CALLS = DHAN_API_CALLS.labels("place_super_order")
+_PLACE_ERRORS = DHAN_API_ERRORS.labels("place_super_order")
+_PLACE_RETRIES = DHAN_API_RETRIES.labels("place_super_order")
+_PLACE_RTT = ORDER_RTT.labels("place")
+_MODIFY_RTT = ORDER_RTT.labels("modify")
+_CANCEL_RTT = ORDER_RTT.labels("cancel")
+_STATUS_CALLS = DHAN_API_CALLS.labels("get_order_by_id")
+_STATUS_ERRORS = DHAN_API_ERRORS.labels("get_order_by_id")
+_LIST_CALLS = DHAN_API_CALLS.labels("get_super_order_list")
+_LIST_ERRORS = DHAN_API_ERRORS.labels("get_super_order_list")
 
 
 
+
+def super_order_exit_status(order):
+    """
+    Classify one entry of the Super Order list.
+
+    Returns:
+    "STOP_LOSS_HIT"
+    "TARGET_HIT"
+    "EXIT_CANCELLED"
+    "PARENT_CANCELLED"
+    "PARENT_REJECTED"
+    None (still active)
+    """
+    parent_status = order.get("orderStatus")
+     # 🔴 Parent cancelled or rejected
+    if parent_status == "CANCELLED":
+        return "PARENT_CANCELLED"
+    if parent_status == "REJECTED":
+        return "PARENT_REJECTED"
+
+    legs = order.get("legDetails", [])
+
+    sl_status = None
+    tgt_status = None
+
+    for leg in legs:
+        if leg.get("legName") == "STOP_LOSS_LEG":
+            sl_status = leg.get("orderStatus")
+
+        if leg.get("legName") == "TARGET_LEG":
+            tgt_status = leg.get("orderStatus")
+
+    # 🔴 SL Hit
+    if sl_status == "TRADED":
+        return "STOP_LOSS_HIT"
+
+    # 🟢 Target Hit
+    if tgt_status == "TRADED":
+        return "TARGET_HIT"
+
+    # ⚫ Both cancelled (manual exit)
+    if sl_status == "CANCELLED" and tgt_status == "CANCELLED":
+        return "EXIT_CANCELLED"
+
+    return None
+
+
 class DhanSuperBroker:
     """
     Broker wrapper for DHAN Super Orders
@@ -22,7 +82,8 @@ class DhanSuperBroker:
     def __init__(self, dhan_context):
         self.super = SuperOrder(dhan_context)
 
-    def place_trade(self, stock, trailing_multiplier=0.5, max_ltp_retries=3, ltp_sleep=1):
+    def place_trade(self, stock, trailing_multiplier=0.5, max_ltp_retries=3, ltp_sleep=1,
+                    max_place_retries=3, place_retry_sleep=1, target_rr=1.5):
         """
         Place a Super Order on DHAN with robust LTP fetching, trailing stop-loss,
         and calculated target if not provided.
@@ -33,26 +94,30 @@ class DhanSuperBroker:
             trailing_multiplier (float): fraction of risk to use for trailing jump
             max_ltp_retries (int): max attempts to fetch LTP if None
             ltp_sleep (int/float): seconds to wait between retries
+            max_place_retries (int): attempts when placement gets no (or an ambiguous) response;
+                                     each retry is preceded by an order-book check
+            place_retry_sleep (int/float): seconds between placement attempts
+            target_rr (float): target distance in multiples of risk when no 'Target' is given
 
         Returns:
              dict: {
             "order_id": str,
             "entry": float,
             "sl": float,
-            "qty": int
+            "qty": int,
+            "correlation_id": str
         } or None if failed
     
         """
         try:
             # Extract stock info
             name = stock.get("Stock Name", "UNKNOWN")
-            instrument_id = str(stock["Security ID"])
+            instrument_id = str(to_security_id(stock["Security ID"]))
             
             strategy_entry = stock["Entry"]
             sl = stock["SL"]
             #qty = stock["Quantity"]
             side_str = stock["Signal"].upper()  # "BUY" or "SELL"
-            side_enum = dhan.BUY if side_str == "BUY" else dhan.SELL
             # -------------------------------
             # Init fund & leverage cache (SAFE)
             # -------------------------------
@@ -68,7 +133,7 @@ class DhanSuperBroker:
                 if ltp is not None:
                     break
                 logging.warning(f"LTP fetch failed for {name}, retry {attempt + 1}/{max_ltp_retries}")
-                time.sleep(ltp_sleep)
+                clock.sleep(ltp_sleep)
 
             if ltp is None:
                 logging.error(f"❌ Unable to fetch LTP for {name}. Aborting order.")
@@ -88,27 +153,89 @@ class DhanSuperBroker:
            
             
 
-            qty, risk_amt, exposure = calculate_position_size(price=ltp,entry=ltp,sl=sl,sec_id=instrument_id,max_loss=1000)
-
-            if qty <= 0:
-                logging.error(f"❌ Qty zero after validation | {name} | "f"LTP={ltp}, SL={sl}")
+            staged = self.stage_trade(stock, ltp, trailing_multiplier=trailing_multiplier, target_rr=target_rr)
+            if not staged:
                 return None
+            return self.place_staged(staged, ltp, max_place_retries=max_place_retries,
+                                     place_retry_sleep=place_retry_sleep)
+
+        except Exception:
+            logging.exception(f"❌ Exception placing Super Order for {stock.get('Stock Name', 'UNKNOWN')}")
+            return None
 
-            logging.info(f"✅ Final Execution Check | {name} | "f"Qty={qty}, Entry={ltp}, SL={sl}, Risk=₹{risk_amt}")
+    def stage_trade(self, stock, price, trailing_multiplier=0.5, target_rr=1.5):
+        """
+        Everything a Super Order needs except the send: size, SL, target and
+        trailing jump for an entry at `price`. Staged ahead of time (see
+        execution.trigger_engine), the order goes out with no sizing work.
 
-            
-            
-            # -------------------------------
-            # Risk, trailing jump, and target calculation
-            # -------------------------------
-            risk = abs(ltp - sl)
-            
-            trailing_jump = round(risk * trailing_multiplier, 2)
+        Args:
+            stock (dict): signal row ('Stock Name', 'Security ID', 'SL', 'Signal', optionally 'Target')
+            price (float): expected entry / limit price
+            trailing_multiplier (float): fraction of risk to use for trailing jump
+            target_rr (float): target distance in multiples of risk when no 'Target' is given
+
+        Returns:
+            dict: staged order, or None when the size works out to zero
+        """
+        name = stock.get("Stock Name", "UNKNOWN")
+        instrument_id = str(to_security_id(stock["Security ID"]))
+        sl = stock["SL"]
+        side_str = stock["Signal"].upper()
+        ltp = price
+
+        init_fund_cache()
+        init_leverage_cache()
+
+        qty, risk_amt, exposure = calculate_position_size(price=ltp,entry=ltp,sl=sl,sec_id=instrument_id,max_loss=1000)
+
+        if qty <= 0:
+            logging.error(f"❌ Qty zero after validation | {name} | "f"LTP={ltp}, SL={sl}")
+            return None
+
+        logging.info(f"✅ Final Execution Check | {name} | "f"Qty={qty}, Entry={ltp}, SL={sl}, Risk=₹{risk_amt}")
+
+        
+        
+        # -------------------------------
+        # Risk, trailing jump, and target calculation
+        # -------------------------------
+        risk = abs(ltp - sl)
+        
+        trailing_jump = round(risk * trailing_multiplier, 2)
+
+        target = stock.get("Target")
+        if not target or target <= 0:
+            # Use entry as base for target (safer than LTP)
+            target = round(ltp + target_rr * risk if side_str == "BUY" else ltp - target_rr * risk, 2)
+
+        return {
+            "name": name,
+            "price": price,
+            "instrument_id": instrument_id,
+            "side": side_str,
+            "qty": qty,
+            "sl": sl,
+            "target": target,
+            "trailing_jump": trailing_jump,
+            "risk_amt": risk_amt,
+        }
 
-            target = stock.get("Target")
-            if not target or target <= 0:
-                # Use entry as base for target (safer than LTP)
-                target = round(ltp + 1.5 * risk if side_str == "BUY" else ltp - 1.5 * risk, 2)
+    def place_staged(self, staged, price, max_place_retries=3, place_retry_sleep=1):
+        """
+        Send a staged Super Order as a LIMIT at `price`, at most once per
+        correlation ID.
+
+        Returns:
+            dict: {"order_id", "entry", "sl", "qty", "correlation_id"} or None if failed
+        """
+        try:
+            name = staged["name"]
+            instrument_id = staged["instrument_id"]
+            side_str = staged["side"]
+            side_enum = dhan.BUY if side_str == "BUY" else dhan.SELL
+            qty, sl, target, trailing_jump = staged["qty"], staged["sl"], staged["target"], staged["trailing_jump"]
+            ltp = price
 
             # -------------------------------
             # Prepare payload for logging
@@ -126,72 +253,134 @@ class DhanSuperBroker:
                 "trailingJump": trailing_jump,
                 "correlationId": f"{name}_AUTO"
             }
-            logging.info("📦 DHAN SuperOrder Payload:\n%s", json.dumps(order_payload, indent=2))
+            # Lazy %-formatting: the dict is only rendered by the log listener thread
+            logging.info("📦 DHAN SuperOrder Payload: %s", order_payload)
+
+            # -------------------------------
+            # Idempotency: one live order per correlation ID
+            # -------------------------------
+            cid = f"{name}_AUTO"
+            existing = ORDER_INDEX.claim(cid)
+            if existing:
+                ORDERS.labels("duplicate").inc()
+                if existing["state"] == PLACED:
+                    logging.warning(f"♻️ {cid} already placed (ID {existing['order_info']['order_id']}), not re-sending")
+                    return existing["order_info"]
+                logging.warning(f"⏳ {cid} placement already in flight, skipping duplicate")
+                return None
+
+            order_info = {"entry": ltp, "sl": sl, "qty": qty, "correlation_id": cid}
 
             # -------------------------------
             # Place Super Order (using DHAN enums)
             # -------------------------------
-            resp = self.super.place_super_order(
-                security_id=instrument_id,
-                exchange_segment=dhan.NSE,
-                transaction_type=side_enum,
-                quantity=qty,
-                order_type=dhan.LIMIT,
-                product_type=dhan.INTRA,
-                price=ltp,
-                targetPrice=target,
-                stopLossPrice=sl,
-                trailingJump=trailing_jump,
-                tag=f"{name}_AUTO"
-            )
+            for attempt in range(1, max_place_retries + 1):
+                if attempt > 1:
+                    _PLACE_RETRIES.inc()
+                _PLACE_CALLS.inc()
+                with _PLACE_RTT.time():
+                    resp = self.super.place_super_order(
+                        security_id=instrument_id,
+                        exchange_segment=dhan.NSE,
+                        transaction_type=side_enum,
+                        quantity=qty,
+                        order_type=dhan.LIMIT,
+                        product_type=dhan.INTRA,
+                        price=ltp,
+                        targetPrice=target,
+                        stopLossPrice=sl,
+                        trailingJump=trailing_jump,
+                        tag=cid
+                    )
+
+                # Convert response if string
+                if isinstance(resp, str):
+                    resp = json.loads(resp)
+
+                if resp and resp.get("status") == "success":
+                    order_info["order_id"] = resp["data"]["orderId"]
+                    break
 
-            # Convert response if string
-            if isinstance(resp, str):
-                resp = json.loads(resp)
+                if not is_ambiguous_failure(resp):
+                    # Broker rejected it with an error code: the order was definitely not created
+                    logging.error(f"❌ Failed to place Super Order for {name}: {resp}")
+                    _PLACE_ERRORS.inc()
+                    ORDERS.labels("rejected").inc()
+                    ORDER_INDEX.mark_failed(cid)
+                    return None
 
-            if resp.get("status") != "success":
-                logging.error(f"❌ Failed to place Super Order for {name}: {resp}")
+                # No response, or an SDK-wrapped transport error: the order may exist.
+                # Check the order book once before retrying.
+                _PLACE_ERRORS.inc()
+                logging.warning(
+                    f"⚠️ Ambiguous response placing {cid} (attempt {attempt}/{max_place_retries}): {resp}, checking order book"
+                )
+                try:
+                    order = find_order_by_correlation(self.super, cid)
+                except Exception:
+                    # Unknown outcome: leave the ID in flight so nothing re-sends it blindly
+                    logging.exception(f"❌ Could not verify {cid}, not retrying")
+                    ORDERS.labels("unknown").inc()
+                    return None
+
+                if order:
+                    logging.info(f"🔎 {cid} found in order book after ambiguous placement")
+                    order_info["order_id"] = order["orderId"]
+                    break
+
+                clock.sleep(place_retry_sleep)
+            else:
+                ORDER_INDEX.mark_failed(cid)
+                ORDERS.labels("failed").inc()
+                logging.error(f"❌ Super Order for {name} not placed after {max_place_retries} attempts")
                 return None
 
-            order_id = resp["data"]["orderId"]
-            logging.info(f"✅ Super Order placed for {name} | Entry: {ltp}, SL: {sl}, Target: {target} | ID: {order_id}")
+            ORDER_INDEX.mark_placed(cid, order_info)
+            ORDERS.labels("placed").inc()
+            logging.info(
+                f"✅ Super Order placed for {name} | Entry: {ltp}, SL: {sl}, Target: {target} | ID: {order_info['order_id']}"
+            )
             return {
-            "order_id": order_id,
+            "order_id": order_info["order_id"],
             "entry": ltp,
             "sl": sl,
-            "qty": qty
+            "qty": qty,
+            "correlation_id": cid
         }
 
         except Exception:
-            logging.exception(f"❌ Exception placing Super Order for {stock.get('Stock Name', 'UNKNOWN')}")
+            logging.exception(f"❌ Exception placing Super Order for {staged.get('name', 'UNKNOWN')}")
             return None
 
     def partial_book(self, order_id, new_qty):
         logging.info(f"🔹 Partial booking → Qty {new_qty}")
-        resp = self.super.modify_super_order(
-            order_id=order_id,
-            order_type=dhan.MARKET,
-            leg_name="ENTRY_LEG",
-            quantity=new_qty
-        )
+        with _MODIFY_RTT.time():
+            resp = self.super.modify_super_order(
+                order_id=order_id,
+                order_type=dhan.MARKET,
+                leg_name="ENTRY_LEG",
+                quantity=new_qty
+            )
         logging.info(f"Partial book response: {resp}")
         return resp
 
     def trail_sl(self, order_id, new_sl, trailing_jump=1.0):
         logging.info(f"🔁 Trailing SL → {new_sl}, jump: {trailing_jump}")
-        resp = self.super.modify_super_order(
-            order_id=order_id,
-            order_type=None,
-            leg_name="STOP_LOSS_LEG",
-            stopLossPrice=new_sl,
-            trailingJump=trailing_jump
-        )
+        with _MODIFY_RTT.time():
+            resp = self.super.modify_super_order(
+                order_id=order_id,
+                order_type=None,
+                leg_name="STOP_LOSS_LEG",
+                stopLossPrice=new_sl,
+                trailingJump=trailing_jump
+            )
         logging.info(f"Trail SL response: {resp}")
         return resp
 
     def exit_trade(self, order_id):
         logging.warning(f"🛑 Cancelling Super Order {order_id}")
-        resp = self.super.cancel_super_order(order_id, "ENTRY_LEG")
+        with _CANCEL_RTT.time():
+            resp = self.super.cancel_super_order(order_id, "ENTRY_LEG")
         logging.info(f"Exit trade response: {resp}")
         return resp
     
@@ -221,13 +410,14 @@ class DhanSuperBroker:
 
         logging.info(f"🛑 Exiting trade | Order ID: {order_id} | Side: {side} | Trigger Price: {stop_price}")
 
-        resp = self.super.modify_super_order(
-            order_id=order_id,
-            order_type=dhan.MARKET,
-            leg_name="STOP_LOSS_LEG",
-            stopLossPrice=stop_price,
-            trailingJump=1  # can be 0 if you want instant exit
-        )
+        with _MODIFY_RTT.time():
+            resp = self.super.modify_super_order(
+                order_id=order_id,
+                order_type=dhan.MARKET,
+                leg_name="STOP_LOSS_LEG",
+                stopLossPrice=stop_price,
+                trailingJump=1  # can be 0 if you want instant exit
+            )
 
         logging.info(f"Exit trade MARKET response: {resp}")
         return resp
@@ -239,12 +429,14 @@ class DhanSuperBroker:
         """
         try:
             # Using global dhan (as per your architecture)
+            _STATUS_CALLS.inc()
             resp = dhan.get_order_by_id(order_id)
 
             if isinstance(resp, str):
                 resp = json.loads(resp)
 
             if resp.get("status") != "success":
+                _STATUS_ERRORS.inc()
                 logging.error(f"❌ Failed to fetch order status: {resp}")
                 return None
 
@@ -261,6 +453,7 @@ class DhanSuperBroker:
             
 
         except Exception:
+            _STATUS_ERRORS.inc()
             logging.exception(f"❌ Exception fetching order status for {order_id}")
             return None
     
@@ -277,6 +470,7 @@ class DhanSuperBroker:
         """
 
         try:
+            _LIST_CALLS.inc()
             resp = self.super.get_super_order_list()
 
             if isinstance(resp, str):
@@ -284,6 +478,7 @@ class DhanSuperBroker:
                 resp = json.loads(resp)
 
             if resp.get("status") != "success":
+                _LIST_ERRORS.inc()
                 return None
 
             orders = resp.get("data", [])
@@ -291,41 +486,11 @@ class DhanSuperBroker:
             # Find our order
             for order in orders:
                 if order.get("orderId") == order_id:
-                    parent_status = order.get("orderStatus")
-                     # 🔴 Parent cancelled or rejected
-                    if parent_status == "CANCELLED":
-                        return "PARENT_CANCELLED"
-                    if parent_status == "REJECTED":
-                        return "PARENT_REJECTED"
-
-                    legs = order.get("legDetails", [])
-
-                    sl_status = None
-                    tgt_status = None
-
-                    for leg in legs:
-                        if leg.get("legName") == "STOP_LOSS_LEG":
-                            sl_status = leg.get("orderStatus")
-
-                        if leg.get("legName") == "TARGET_LEG":
-                            tgt_status = leg.get("orderStatus")
-
-                    # 🔴 SL Hit
-                    if sl_status == "TRADED":
-                        return "STOP_LOSS_HIT"
-
-                    # 🟢 Target Hit
-                    if tgt_status == "TRADED":
-                        return "TARGET_HIT"
-
-                    # ⚫ Both cancelled (manual exit)
-                    if sl_status == "CANCELLED" and tgt_status == "CANCELLED":
-                        return "EXIT_CANCELLED"
-
-                    return None
+                    return super_order_exit_status(order)
 
             return None
 
         except Exception:
+            _LIST_ERRORS.inc()
             logging.exception("❌ Error checking super order exit")
             return None
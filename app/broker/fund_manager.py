@@ -1,37 +1,177 @@
 import logging
+import threading
+import time
 from app.config.dhan_auth import dhan
 
 logger = logging.getLogger(__name__)
 
+# Broker balance is re-read in the background after this many seconds
+FUND_TTL_SECONDS = 60
+
 _AVAILABLE_FUND = 0.0
+_FUND_FETCHED_AT = None          # monotonic time of last successful fetch
+_FUND_LOCK = threading.Lock()
+_FUND_GEN = 0                    # bumped by local adjustments; older broker reads are discarded
+_INIT_LOCK = threading.Lock()    # one blocking first load, however many callers
+_REFRESH_EVENT = threading.Event()
+_REFRESHER = None
+
+
+def _fetch_fund_limits() -> float:
+    r = dhan.get_fund_limits()
+    data = r.get("data", {})
+    return float(data.get("availabelBalance", 0))
 
 
 def fetch_available_fund() -> float:
     try:
-        r = dhan.get_fund_limits()
-        data = r.get("data", {})
-        return float(data.get("availabelBalance", 0))
+        return _fetch_fund_limits()
     except Exception:
         logger.exception("❌ Failed to fetch fund limits")
         return 0.0
 
 
+def _refresh_fund() -> bool:
+    """
+    Re-read the broker balance into the cache.
+    On failure the previous value is kept.
+
+    A reserve / release made while the request was in flight wins: the
+    broker figure may predate it, so it is dropped and the refresh that
+    adjustment scheduled reads again.
+    """
+    global _AVAILABLE_FUND, _FUND_FETCHED_AT
+
+    with _FUND_LOCK:
+        gen = _FUND_GEN
+
+    try:
+        fund = _fetch_fund_limits()
+    except Exception:
+        logger.exception("❌ Failed to refresh fund limits, keeping cached value")
+        return False
+
+    with _FUND_LOCK:
+        if gen != _FUND_GEN:
+            logger.debug(f"💰 Discarded fund read {fund} (adjusted while in flight)")
+            return False
+        changed = fund != _AVAILABLE_FUND
+        _AVAILABLE_FUND = fund
+        _FUND_FETCHED_AT = time.monotonic()
+
+    if changed:
+        logger.info(f"💰 Fund refreshed: {fund}")
+    return True
+
+
+# ==========================================================
+# BACKGROUND REFRESHER
+# ==========================================================
+def _refresher_loop(ttl):
+    while True:
+        _REFRESH_EVENT.wait(timeout=ttl)
+        _REFRESH_EVENT.clear()
+        _refresh_fund()
+
+
+def start_fund_refresher(ttl=FUND_TTL_SECONDS):
+    """
+    Start the daemon thread that refreshes the fund every `ttl` seconds
+    or as soon as the cache is invalidated. Safe to call more than once.
+    """
+    global _REFRESHER
+
+    with _FUND_LOCK:
+        if _REFRESHER is not None and _REFRESHER.is_alive():
+            return
+        _REFRESHER = threading.Thread(
+            target=_refresher_loop, args=(ttl,), name="fund-refresher", daemon=True
+        )
+        _REFRESHER.start()
+
+    logger.info(f"🔄 Fund refresher started (ttl={ttl}s)")
+
+
+def invalidate_fund_cache():
+    """Ask the background refresher to re-read the balance now (non-blocking)."""
+    _REFRESH_EVENT.set()
+
+
+# ==========================================================
+# LOCAL ADJUSTMENTS FROM OUR OWN ORDERS
+# ==========================================================
+def reserve_fund(amount: float) -> float:
+    """
+    Deduct margin blocked by a fill so the next sizing sees it immediately,
+    then schedule a refresh to pick up the broker's figure.
+    """
+    global _AVAILABLE_FUND, _FUND_GEN
+
+    with _FUND_LOCK:
+        _FUND_GEN += 1
+        _AVAILABLE_FUND = max(0.0, _AVAILABLE_FUND - amount)
+        fund = _AVAILABLE_FUND
+
+    logger.info(f"💰 Fund reserved {amount:.2f} → {fund:.2f}")
+    invalidate_fund_cache()
+    return fund
+
+
+def release_fund(amount: float) -> float:
+    """Return margin released by an exit, then schedule a refresh."""
+    global _AVAILABLE_FUND, _FUND_GEN
+
+    with _FUND_LOCK:
+        _FUND_GEN += 1
+        _AVAILABLE_FUND += amount
+        fund = _AVAILABLE_FUND
+
+    logger.info(f"💰 Fund released {amount:.2f} → {fund:.2f}")
+    invalidate_fund_cache()
+    return fund
+
+
+# ==========================================================
+# READ API
+# ==========================================================
 def init_fund_cache(force=False) -> float:
-    global _AVAILABLE_FUND
+    """
+    Blocking load, used at startup. Afterwards the background refresher
+    keeps the value current and this returns from memory.
+    """
+    global _FUND_FETCHED_AT
 
-    if force or _AVAILABLE_FUND <= 0:
-        _AVAILABLE_FUND = fetch_available_fund()
+    if force or _FUND_FETCHED_AT is None:
+        with _INIT_LOCK:
+            # Concurrent first callers wait here for a single load
+            if force or _FUND_FETCHED_AT is None:
+                if not _refresh_fund() and _FUND_FETCHED_AT is None:
+                    # Mark as stale-but-loaded so readers don't block retrying;
+                    # the refresher keeps trying in the background.
+                    _FUND_FETCHED_AT = 0.0
 
-        if _AVAILABLE_FUND <= 0:
-            logger.warning("⚠️ Available fund is zero")
-        else:
-            logger.info(f"💰 Fund initialized: {_AVAILABLE_FUND}")
+                if _AVAILABLE_FUND <= 0:
+                    logger.warning("⚠️ Available fund is zero")
+                else:
+                    logger.info(f"💰 Fund initialized: {_AVAILABLE_FUND}")
+
+                start_fund_refresher()
 
     return _AVAILABLE_FUND
 
 
 def get_cached_fund(refresh=False) -> float:
-    return init_fund_cache(force=refresh)
+    """
+    Cached fund from memory. Never blocks on the broker once initialised;
+    a stale value triggers a background refresh instead.
+    """
+    if refresh or _FUND_FETCHED_AT is None:
+        return init_fund_cache(force=refresh)
+
+    if time.monotonic() - _FUND_FETCHED_AT > FUND_TTL_SECONDS:
+        invalidate_fund_cache()
+
+    return _AVAILABLE_FUND
 if __name__ == "__main__":
     import logging
     logging.basicConfig(level=logging.DEBUG)
@@ -47,4 +187,4 @@ if __name__ == "__main__":
 
     # Test get_cached_fund
     fund_cached2 = get_cached_fund(refresh=True)
-    print(f"get_cached_fund(refresh=True): {fund_cached2}")
\ No newline at end of file
+    print(f"get_cached_fund(refresh=True): {fund_cached2}")
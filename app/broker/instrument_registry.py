@@ -0,0 +1,198 @@
+# app/broker/instrument_registry.py
+import io
+import os
+import glob
+import logging
+from datetime import datetime
+
+import numpy as np
+
+from app.config.settings import S3_BUCKET, MAP_FILE_KEY, NIFTYMAP_FILE_KEY, IST, CACHE_DIR
+from app.config.aws_s3 import s3
+from app.utils.symbol_formatter import nse_symbol
+
+logger = logging.getLogger(__name__)
+
+_REGISTRY = None
+
+
+# ==========================================================
+# ID NORMALISATION
+# ==========================================================
+def to_security_id(value) -> int:
+    """
+    Normalise a security ID coming from CSVs, quote payloads or stock dicts.
+    Accepts 2885, "2885", "2885.0" and numpy integers.
+    """
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return int(float(str(value).strip()))
+
+
+# ==========================================================
+# REGISTRY
+# ==========================================================
+class InstrumentRegistry:
+    """
+    Instrument master backed by a structured numpy array:
+        security_id (int64) | name (fixed width bytes)
+
+    Rows are sorted by security_id. The array may be a read-only memory map
+    shared by every process; hash indexes are built lazily on first lookup.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self._by_id = None
+        self._by_name = None
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self.table["security_id"]
+
+    def __len__(self):
+        return len(self.table)
+
+    def __contains__(self, sec_id):
+        return self.row(sec_id) is not None
+
+    def _build_indexes(self):
+        ids = self.table["security_id"].tolist()
+        names = [n.decode() for n in self.table["name"].tolist()]
+        self._by_id = {sid: i for i, sid in enumerate(ids)}
+        self._by_name = {name: i for i, name in enumerate(names)}
+
+    def row(self, sec_id):
+        if self._by_id is None:
+            self._build_indexes()
+        try:
+            return self._by_id.get(to_security_id(sec_id))
+        except (TypeError, ValueError):
+            return None
+
+    def name(self, sec_id):
+        i = self.row(sec_id)
+        if i is None:
+            return None
+        return self.table["name"][i].decode()
+
+    def symbol(self, sec_id):
+        name = self.name(sec_id)
+        return nse_symbol(name) if name else None
+
+    def security_id(self, name: str):
+        if self._by_name is None:
+            self._build_indexes()
+        i = self._by_name.get(name.strip().upper())
+        if i is None:
+            return None
+        return int(self.table["security_id"][i])
+
+    def rows(self, sec_ids) -> np.ndarray:
+        """
+        Batch lookup. Returns row positions for an array of IDs, -1 where missing.
+        """
+        sec_ids = np.asarray(sec_ids, dtype=np.int64)
+        ids = self.table["security_id"]
+        if len(ids) == 0:
+            return np.full(sec_ids.shape, -1, dtype=np.int64)
+
+        pos = np.minimum(np.searchsorted(ids, sec_ids), len(ids) - 1)
+        return np.where(ids[pos] == sec_ids, pos, -1)
+
+
+# ==========================================================
+# BUILD FROM MAPPING CSVs
+# ==========================================================
+def _read_mapping(key):
+    import pandas as pd
+
+    obj = s3.get_object(Bucket=S3_BUCKET, Key=key)
+    return pd.read_csv(
+        io.BytesIO(obj["Body"].read()),
+        usecols=lambda c: c in ("Stock Name", "Instrument ID"),
+        dtype={"Stock Name": "string"},
+    )
+
+
+def build_table(frames) -> np.ndarray:
+    """
+    Merge mapping frames into one sorted, de-duplicated structured array.
+    """
+    import pandas as pd
+
+    df = pd.concat(
+        [
+            f[["Stock Name", "Instrument ID"]]
+            for f in frames
+            if not f.empty and {"Stock Name", "Instrument ID"} <= set(f.columns)
+        ],
+        ignore_index=True,
+    ).dropna()
+
+    df["Instrument ID"] = df["Instrument ID"].map(to_security_id)
+    df["Stock Name"] = df["Stock Name"].str.strip().str.upper()
+    df = df.drop_duplicates("Instrument ID").sort_values("Instrument ID")
+
+    width = max(int(df["Stock Name"].str.len().max() or 1), 1)
+    table = np.empty(len(df), dtype=[("security_id", "<i8"), ("name", f"S{width}")])
+    table["security_id"] = df["Instrument ID"].to_numpy(dtype=np.int64)
+    table["name"] = df["Stock Name"].str.encode("ascii", errors="replace").to_numpy()
+    return table
+
+
+def _cache_path(day=None):
+    day = day or datetime.now(IST).strftime("%Y%m%d")
+    return os.path.join(CACHE_DIR, f"instruments_{day}.npy")
+
+
+def _write_table(table, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, table, allow_pickle=False)
+    os.replace(tmp, path)  # atomic: readers never see a half-written file
+
+
+def _prune_cache(keep):
+    """Delete earlier days' builds (processes still mapping one keep their view)."""
+    for old in glob.glob(os.path.join(CACHE_DIR, "instruments_*.npy")):
+        if os.path.abspath(old) == os.path.abspath(keep):
+            continue
+        try:
+            os.remove(old)
+            logger.info(f"🧹 Removed stale instrument cache {old}")
+        except OSError:
+            logger.warning(f"⚠️ Could not remove stale instrument cache {old}")
+
+
+def init_registry(force=False) -> InstrumentRegistry:
+    """
+    Load today's instrument registry.
+    Memory-maps the day's cached build when present, otherwise builds it
+    from the mapping CSVs in S3 and writes the cache for other processes.
+    """
+    global _REGISTRY
+
+    if _REGISTRY is not None and not force:
+        return _REGISTRY
+
+    path = _cache_path()
+    if not force and os.path.exists(path):
+        table = np.load(path, mmap_mode="r", allow_pickle=False)
+        logger.info(f"📚 Instrument registry mapped from {path} ({len(table)} instruments)")
+    else:
+        table = build_table([_read_mapping(MAP_FILE_KEY), _read_mapping(NIFTYMAP_FILE_KEY)])
+        try:
+            _write_table(table, path)
+            _prune_cache(keep=path)
+        except OSError:
+            logger.exception(f"⚠️ Could not write instrument cache {path}")
+        logger.info(f"📚 Instrument registry built from S3 ({len(table)} instruments)")
+
+    _REGISTRY = InstrumentRegistry(table)
+    return _REGISTRY
+
+
+def get_registry() -> InstrumentRegistry:
+    return init_registry()
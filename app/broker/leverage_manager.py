@@ -1,52 +1,137 @@
 import logging
-import pandas as pd
 import io
-import boto3
 
-from app.config.settings import S3_BUCKET, NIFTYMAP_FILE_KEY,AWS_REGION
+import numpy as np
+
+from app.config.settings import S3_BUCKET, NIFTYMAP_FILE_KEY
 from app.config.aws_s3 import s3
+from app.broker.instrument_registry import to_security_id
 
 logger = logging.getLogger(__name__)
 
-_LEVERAGE_MAP = {}
+_LEVERAGE_TABLE = None
+_WARNED_MISSING = set()
+
+
+class LeverageTable:
+    """
+    MIS leverage / margin keyed by integer security ID.
+
+    ids      : int64, sorted
+    leverage : float64, same order
+    margin   : float64, fraction of exposure blocked (1 / leverage)
+    """
+
+    def __init__(self, ids, leverage):
+        ids = np.asarray(ids, dtype=np.int64)
+        order = np.argsort(ids, kind="stable")
+        ids, leverage = ids[order], np.asarray(leverage, dtype=np.float64)[order]
+        # Duplicate IDs: the last row wins, for lookup() and lookup_many() alike
+        last = np.append(ids[1:] != ids[:-1], True) if len(ids) else np.ones(0, dtype=bool)
+        self.ids = ids[last]
+        self.leverage = leverage[last]
+        self.margin = 1.0 / self.leverage
+        self._index = {sid: i for i, sid in enumerate(self.ids.tolist())}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def lookup(self, sec_id, default=1.0) -> float:
+        i = self._index.get(sec_id)
+        return default if i is None else float(self.leverage[i])
+
+    def _take(self, values, sec_ids, default) -> np.ndarray:
+        sec_ids = np.asarray(sec_ids, dtype=np.int64)
+        if len(self.ids) == 0:
+            return np.full(sec_ids.shape, default, dtype=np.float64)
+
+        pos = np.minimum(np.searchsorted(self.ids, sec_ids), len(self.ids) - 1)
+        return np.where(self.ids[pos] == sec_ids, values[pos], default)
 
+    def lookup_many(self, sec_ids, default=1.0) -> np.ndarray:
+        return self._take(self.leverage, sec_ids, default)
+
+    def margin_many(self, sec_ids, default=1.0) -> np.ndarray:
+        return self._take(self.margin, sec_ids, default)
 
 
 def _load_leverage_from_s3():
-    global _LEVERAGE_MAP
+    global _LEVERAGE_TABLE
+    import pandas as pd
 
     obj = s3.get_object(Bucket=S3_BUCKET, Key=NIFTYMAP_FILE_KEY)
-    df = pd.read_csv(io.BytesIO(obj["Body"].read()))
+    df = pd.read_csv(
+        io.BytesIO(obj["Body"].read()),
+        usecols=lambda c: c in ("Instrument ID", "MIS_LEVERAGE"),
+        dtype={"Instrument ID": "float64", "MIS_LEVERAGE": "float64"},     # blanks -> NaN
+    )
 
     if "Instrument ID" not in df.columns:
         raise ValueError("Instrument ID missing in leverage CSV")
 
     if "MIS_LEVERAGE" not in df.columns:
         logger.warning("⚠️ MIS_LEVERAGE missing, defaulting to 1")
+        df["MIS_LEVERAGE"] = 1.0
 
-    _LEVERAGE_MAP = dict(
-        zip(
-            df["Instrument ID"].astype(str),
-            df.get("MIS_LEVERAGE", 1)
-        )
-    )
+    # Blank / fractional IDs can't be looked up: drop those rows
+    ids = df["Instrument ID"]
+    bad_ids = ids.isna() | (ids != ids.round())
+    if bad_ids.any():
+        logger.warning(f"⚠️ Dropped {int(bad_ids.sum())} leverage row(s) with a bad Instrument ID")
+    df = df[~bad_ids].assign(**{"Instrument ID": ids[~bad_ids].astype("int64")})
+
+    dupes = df["Instrument ID"].duplicated(keep="last")
+    if dupes.any():
+        logger.warning(f"⚠️ {int(dupes.sum())} duplicate Instrument ID row(s) in leverage CSV, keeping the last")
+        df = df[~dupes]
+    ids = df["Instrument ID"]
+
+    # Leverage below 1 (or blank) would inflate the margin, treat as 1x
+    leverage = df["MIS_LEVERAGE"]
+    bad_lev = leverage.isna() | (leverage < 1.0)
+    if bad_lev.any():
+        sample = ", ".join(f"{i}={v}" for i, v in zip(ids[bad_lev].head(5), df["MIS_LEVERAGE"][bad_lev].head(5)))
+        logger.warning(f"⚠️ {int(bad_lev.sum())} instrument(s) with blank or < 1 MIS_LEVERAGE set to 1x ({sample})")
+    leverage = leverage.where(~bad_lev, 1.0)
 
-    logger.info(f"📊 Loaded leverage for {len(_LEVERAGE_MAP)} instruments")
+    _LEVERAGE_TABLE = LeverageTable(ids.to_numpy(), leverage.to_numpy(dtype=np.float64))
+
+    logger.info(f"📊 Loaded leverage for {len(_LEVERAGE_TABLE)} instruments")
 
 
 def init_leverage_cache(force=False):
-    if force or not _LEVERAGE_MAP:
+    if force or _LEVERAGE_TABLE is None:
         _load_leverage_from_s3()
-    return _LEVERAGE_MAP
+    return _LEVERAGE_TABLE
+
+
+def get_leverage(sec_id) -> float:
+    table = init_leverage_cache()
+    try:
+        sec_id = to_security_id(sec_id)
+    except (TypeError, ValueError):
+        logger.warning(f"⚠️ Invalid security ID {sec_id!r} for leverage lookup, default=1")
+        return 1.0
+
+    lev = table.lookup(sec_id, default=None)
+    if lev is None:
+        if sec_id not in _WARNED_MISSING:
+            _WARNED_MISSING.add(sec_id)
+            logger.warning(f"⚠️ Missing leverage for {sec_id}, default=1")
+        return 1.0
 
+    return lev
 
-def get_leverage(sec_id: str) -> float:
-    if not _LEVERAGE_MAP:
-        init_leverage_cache()
 
-    lev = _LEVERAGE_MAP.get(str(sec_id), 1)
+def get_leverage_batch(sec_ids) -> np.ndarray:
+    """
+    Vectorised leverage lookup for an array of security IDs (1.0 where missing).
+    """
+    return init_leverage_cache().lookup_many(sec_ids)
 
-    if str(sec_id) not in _LEVERAGE_MAP:
-        logger.warning(f"⚠️ Missing leverage for {sec_id}, default=1")
 
-    return float(lev)
+def get_margin_batch(sec_ids) -> np.ndarray:
+    """
+    Margin fraction (1 / leverage) for an array of security IDs (1.0 where missing).
+    """
+    return init_leverage_cache().margin_many(sec_ids)
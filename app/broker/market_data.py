@@ -1,12 +1,23 @@
 #app/broker/market_data.py
 from app.config.dhan_auth import dhan
-import time
 import logging
-logger = logging.getLogger(__name__)
 import json
+import threading
+from app.utils.logging_setup import log_sampled
+from app.utils import clock
+from app.utils.metrics import DHAN_API_CALLS, DHAN_API_ERRORS, DHAN_API_RETRIES, RATE_LIMIT_WAIT, QUOTE_LATENCY
+from app.execution.watchdog import get_watchdog, call_with_timeout, QUOTES
+from app.config.settings import BROKER_CALL_TIMEOUT
 
 logger = logging.getLogger(__name__)
 
+# Pre-bound metric children (no label lookup on the hot path)
+_QUOTE_CALLS = DHAN_API_CALLS.labels("quote_data")
+_QUOTE_ERRORS = DHAN_API_ERRORS.labels("quote_data")
+_QUOTE_RETRIES = DHAN_API_RETRIES.labels("quote_data")
+_BATCH_LATENCY = QUOTE_LATENCY.labels("quotes")
+_LTP_LATENCY = QUOTE_LATENCY.labels("ltp")
+
 # ==========================================================
 # DHAN QUOTE WITH RETRY (GENERIC SEGMENT)
 # ==========================================================
@@ -28,61 +39,75 @@ def get_quotes_with_retry(security_ids, segment, retry_delay=1, max_retries=10):
     BATCH_SIZE = 1000
     all_quotes = {}
 
-    # Split into batches of 1000
-    for i in range(0, len(security_ids), BATCH_SIZE):
-        batch_ids = security_ids[i:i + BATCH_SIZE]
-
-        logger.info(f"📦 Processing batch {i//BATCH_SIZE + 1} "
-                    f"({len(batch_ids)} instruments)")
-
-        for attempt in range(1, max_retries + 1):
-            try:
-                logger.info(
-                    f"📡 Fetching DHAN quotes for {segment} "
-                    f"{len(batch_ids)} instruments (attempt {attempt})"
-                )
-
-                quote_data = dhan.quote_data(
-                    securities={segment: batch_ids}
-                )
-
-                if isinstance(quote_data, str):
-                    quote_data = json.loads(quote_data)
-
-                segment_quotes = (
-                    quote_data.get("data", {})
-                    .get("data", {})
-                    .get(segment)
-                )
-
-                if not isinstance(segment_quotes, dict):
-                    raise ValueError(f"Invalid quote payload: {quote_data}")
-
-                # Merge batch result
-                all_quotes.update(segment_quotes)
-
-                logger.info(
-                    f"✅ Batch success ({len(segment_quotes)} instruments)"
-                )
-                break  # exit retry loop if success
-
-            except Exception as e:
-                logger.error(
-                    f"❌ Batch failed (attempt {attempt}) for {segment}: {e}",
-                    exc_info=True
-                )
-
-                if attempt < max_retries:
-                    logger.info(f"⏳ Retrying in {retry_delay} second...")
-                    time.sleep(retry_delay)
-                else:
-                    logger.error("🛑 Max retries reached for this batch")
-        time.sleep(1)
+    # Stale if a single attempt (call timeout + retry sleep) overruns
+    hb = get_watchdog().register(
+        f"quotes:{segment}:{threading.get_ident()}",
+        timeout=BROKER_CALL_TIMEOUT + retry_delay + 30,
+    )
+    try:
+        # Split into batches of 1000
+        for i in range(0, len(security_ids), BATCH_SIZE):
+            batch_ids = security_ids[i:i + BATCH_SIZE]
+
+            logger.debug("📦 Processing batch %d (%d instruments)",
+                         i // BATCH_SIZE + 1, len(batch_ids))
+
+            for attempt in range(1, max_retries + 1):
+                try:
+                    logger.debug(
+                        "📡 Fetching DHAN quotes for %s %d instruments (attempt %d)",
+                        segment, len(batch_ids), attempt,
+                    )
+
+                    hb.beat()
+                    _QUOTE_CALLS.inc()
+                    with _BATCH_LATENCY.time():
+                        quote_data = call_with_timeout(
+                            dhan.quote_data, securities={segment: batch_ids},
+                            timeout=BROKER_CALL_TIMEOUT, name="quote_data", lane=QUOTES,
+                        )
+
+                    if isinstance(quote_data, str):
+                        quote_data = json.loads(quote_data)
+
+                    segment_quotes = (
+                        quote_data.get("data", {})
+                        .get("data", {})
+                        .get(segment)
+                    )
+
+                    if not isinstance(segment_quotes, dict):
+                        raise ValueError(f"Invalid quote payload: {quote_data}")
+
+                    # Merge batch result
+                    all_quotes.update(segment_quotes)
+
+                    logger.debug("✅ Batch success (%d instruments)", len(segment_quotes))
+                    break  # exit retry loop if success
+
+                except Exception as e:
+                    _QUOTE_ERRORS.inc()
+                    logger.error(
+                        "❌ Batch failed (attempt %d) for %s: %s", attempt, segment, e,
+                        exc_info=True
+                    )
+
+                    if attempt < max_retries:
+                        logger.info("⏳ Retrying in %s second...", retry_delay)
+                        _QUOTE_RETRIES.inc()
+                        clock.sleep(retry_delay)
+                    else:
+                        logger.error("🛑 Max retries reached for this batch")
+            # Quote API allows one request per second
+            RATE_LIMIT_WAIT.inc(1)
+            clock.sleep(1)
+    finally:
+        hb.close()
 
     if not all_quotes:
         return None
 
-    logger.info(f"🎯 Total instruments fetched: {len(all_quotes)}")
+    logger.debug("🎯 Total instruments fetched: %d", len(all_quotes))
     return all_quotes
 def get_ltp_and_change(security_ids, segment):
     """
@@ -155,7 +180,13 @@ def get_ltp(security_id, segment="NSE_EQ", retry_delay=1, max_attempts=7):
     """
     for attempt in range(1, max_attempts + 1):
         try:
-            resp = dhan.quote_data(securities={segment: [security_id]})
+            _QUOTE_CALLS.inc()
+            # The deadline covers one HTTP request; retries have their own
+            with _LTP_LATENCY.time():
+                resp = call_with_timeout(
+                    dhan.quote_data, securities={segment: [security_id]},
+                    timeout=BROKER_CALL_TIMEOUT, name="quote_data", lane=QUOTES,
+                )
 
             data = resp.get("data", {})
             if not isinstance(data, dict):
@@ -179,14 +210,19 @@ def get_ltp(security_id, segment="NSE_EQ", retry_delay=1, max_attempts=7):
 
             # Log success (different message if not first attempt)
             if attempt > 1:
-                logger.info(f"✅ get_ltp succeeded for {security_id} on attempt {attempt}")
-            logger.info(f"📡 get_ltp OK | {security_id} | LTP={ltp} | attempt={attempt}")
+                logger.info("✅ get_ltp succeeded for %s on attempt %d", security_id, attempt)
+            log_sampled(
+                logger, logging.INFO, ("get_ltp", security_id), 20,
+                "📡 get_ltp OK | %s | LTP=%s | attempt=%d", security_id, ltp, attempt,
+            )
             return float(ltp)
 
         except Exception as e:
-            logger.error(f"❌ get_ltp failed (attempt {attempt}) for {security_id}: {e}")
+            _QUOTE_ERRORS.inc()
+            logger.error("❌ get_ltp failed (attempt %d) for %s: %s", attempt, security_id, e)
             if attempt < max_attempts:
-                time.sleep(retry_delay)
+                _QUOTE_RETRIES.inc()
+                clock.sleep(retry_delay)
             else:
                 logger.error(f"❌ All {max_attempts} attempts failed for {security_id}")
 
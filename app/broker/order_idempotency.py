@@ -0,0 +1,162 @@
+# app/broker/order_idempotency.py
+
+import json
+import logging
+import threading
+
+from app.execution import trade_journal as journal
+
+logger = logging.getLogger(__name__)
+
+IN_FLIGHT = "IN_FLIGHT"
+PLACED = "PLACED"
+FAILED = "FAILED"
+
+
+class OrderIndex:
+    """
+    Local index of correlation IDs this process has sent to the broker.
+
+    A correlation ID is claimed (IN_FLIGHT) before the request goes out,
+    becomes PLACED once an order ID is known and FAILED only when the
+    broker definitely did not create the order - only then may it be retried.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def claim(self, cid):
+        """
+        Atomically claim `cid` for placement.
+
+        Returns:
+            None if the caller may place the order, otherwise the existing
+            entry {"state": ..., "order_info": ...}.
+        """
+        with self._lock:
+            entry = self._entries.get(cid)
+            if entry is not None and entry["state"] != FAILED:
+                return dict(entry)
+            self._entries[cid] = {"state": IN_FLIGHT, "order_info": None}
+            return None
+
+    def mark_placed(self, cid, order_info):
+        with self._lock:
+            self._entries[cid] = {"state": PLACED, "order_info": order_info}
+
+    def mark_failed(self, cid):
+        with self._lock:
+            self._entries[cid] = {"state": FAILED, "order_info": None}
+
+    def get(self, cid):
+        with self._lock:
+            entry = self._entries.get(cid)
+            return dict(entry) if entry else None
+
+    def seed(self, positions):
+        """
+        Mark journaled / reconciled orders that are still live as PLACED
+        after a restart. Closed positions (exited, cancelled, rejected) are
+        left out so the stock can be traded again with a fresh order.
+
+        Args:
+            positions (dict): {correlation_id: position} from the trade journal
+        """
+        seeded = 0
+        with self._lock:
+            for cid, pos in positions.items():
+                if pos.get("order_id") and pos.get("status") != journal.CLOSED:
+                    seeded += 1
+                    self._entries[cid] = {
+                        "state": PLACED,
+                        "order_info": {
+                            "order_id": pos["order_id"],
+                            "entry": pos["entry"],
+                            "sl": pos["sl"],
+                            "qty": pos["qty"],
+                            "correlation_id": cid,
+                        },
+                    }
+        logger.info(f"🔑 Order index seeded with {seeded} live of {len(positions)} correlation ID(s)")
+
+
+ORDER_INDEX = OrderIndex()
+
+
+# Words in a failure's remarks that point at the transport, not the broker
+_TRANSPORT_HINTS = (
+    "timeout", "timed out", "connection", "max retries", "remote end closed",
+    "reset by peer", "temporarily unavailable", "bad gateway", "ssl",
+)
+
+
+def broker_error_code(resp):
+    """Broker error code of a failure response (remarks.error_code / data.errorCode), or None."""
+    for part in (resp.get("remarks"), resp.get("data")):
+        if isinstance(part, dict):
+            code = part.get("error_code") or part.get("errorCode")
+            if code:
+                return code
+    return None
+
+
+def is_ambiguous_failure(resp):
+    """
+    True when a failed placement may still have created the order.
+
+    The dhanhq SDK turns transport errors into
+    {"status": "failure", "remarks": "<exception text>"}, so only a failure
+    carrying a broker error code - and no timeout / connection wording -
+    is a definite rejection.
+    """
+    if not resp:
+        return True
+    remarks = str(resp.get("remarks", "")).lower()
+    if any(hint in remarks for hint in _TRANSPORT_HINTS):
+        return True
+    return broker_error_code(resp) is None
+
+
+# Parent statuses of a super order that is still working or has traded
+LIVE_PARENT_STATUSES = ("TRANSIT", "PENDING", "PART_TRADED", "TRADED")
+
+
+def is_live_super_order(order):
+    """True when the super order is neither finished nor dead (cancelled / rejected / expired)."""
+    # dhan_super_client imports this module; import its classifier at call time
+    from app.broker.dhan_super_client import super_order_exit_status
+
+    return order.get("orderStatus") in LIVE_PARENT_STATUSES and super_order_exit_status(order) is None
+
+
+def find_order_by_correlation(super_order, cid):
+    """
+    Single lookup of the super-order book for a live order tagged `cid`.
+    Used after an ambiguous placement (timeout / no response).
+
+    Earlier orders of the day with the same tag that were cancelled,
+    rejected or already exited are ignored; among live matches the
+    newest (by createTime) wins.
+
+    Returns:
+        dict | None: the broker's order record, None if not found
+
+    Raises:
+        RuntimeError: the order book itself could not be read, so it is
+        unknown whether the order exists (the caller must not retry)
+    """
+    resp = super_order.get_super_order_list()
+    if isinstance(resp, str):
+        resp = json.loads(resp)
+    if not resp or resp.get("status") != "success":
+        raise RuntimeError(f"Order book lookup for {cid} failed: {resp}")
+
+    matches = [
+        order for order in resp.get("data") or []
+        if order.get("correlationId") == cid and is_live_super_order(order)
+    ]
+    if not matches:
+        return None
+    # createTime is "YYYY-MM-DD HH:MM:SS", so string order is time order
+    return sorted(matches, key=lambda o: str(o.get("createTime") or ""))[-1]
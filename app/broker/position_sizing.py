@@ -1,6 +1,8 @@
 import logging
+import numpy as np
 from app.broker.fund_manager import get_cached_fund
-from app.broker.leverage_manager import get_leverage
+from app.broker.leverage_manager import get_leverage, get_leverage_batch
+from app.broker.instrument_registry import to_security_id
 
 logger = logging.getLogger(__name__)
 
@@ -29,3 +31,55 @@ def calculate_position_size(
     qty = max(0, min(qty_by_risk, qty_by_fund))
 
     return qty, qty * sl_point, qty * price
+
+
+def calculate_position_size_batch(
+    prices,
+    entries,
+    sls,
+    sec_ids,
+    max_loss: float = 1000,
+    fund: float = None,
+    leverage=None,
+):
+    """
+    Vectorised calculate_position_size for a batch of candidates.
+
+    Args:
+        prices, entries, sls : array-like of float, one per candidate
+        sec_ids              : array-like of security IDs
+        max_loss (float)     : max loss per trade (same cap as single sizing)
+        fund (float)         : available fund; defaults to the cached fund
+        leverage             : scalar or per-candidate leverage; defaults to
+                               the cached leverage table (e.g. fixed for backtests)
+
+    Returns:
+        (qty, risk, exposure) numpy arrays. Candidates with an invalid SL
+        or price get qty 0.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    entries = np.asarray(entries, dtype=np.float64)
+    sls = np.asarray(sls, dtype=np.float64)
+    sec_ids = np.fromiter((to_security_id(s) for s in sec_ids), dtype=np.int64)
+
+    if fund is None:
+        fund = get_cached_fund()
+    if leverage is None:
+        leverage = get_leverage_batch(sec_ids)
+    else:
+        leverage = np.broadcast_to(np.asarray(leverage, dtype=np.float64), sec_ids.shape)
+
+    sl_point = np.abs(entries - sls)
+    valid = (sl_point > 0) & (prices > 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        qty_by_risk = np.floor(max_loss / sl_point)
+        qty_by_fund = np.floor((fund * leverage) / prices)
+
+    qty = np.where(valid, np.minimum(qty_by_risk, qty_by_fund), 0)
+    qty = np.maximum(qty, 0).astype(np.int64)
+
+    if not valid.all():
+        logger.warning(f"⚠️ Invalid SL/price for {int((~valid).sum())} of {len(valid)} candidates")
+
+    return qty, qty * np.where(valid, sl_point, 0.0), qty * prices
@@ -1,16 +1,25 @@
 # app/config/aws_s3.py
-import boto3
-import pandas as pd
 import io
 import os
 import logging
+from typing import TYPE_CHECKING
+from app.utils.startup import LazyObject
+
+if TYPE_CHECKING:       # annotations only; pandas is imported on first read
+    import pandas as pd
 
 AWS_REGION = os.getenv("AWS_REGION", "ap-south-1")
 S3_BUCKET = os.getenv("S3_BUCKET", "dhan-trading-data")
+# Local S3 stand-in (MinIO / moto server) for tests, e.g. http://127.0.0.1:9000
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+
+def _make_s3_client():
+    import boto3
+    return boto3.client("s3", region_name=AWS_REGION, endpoint_url=S3_ENDPOINT_URL)
 
-s3 = boto3.client("s3", region_name=AWS_REGION)
+s3 = LazyObject(_make_s3_client, "s3")
 
-def read_csv_from_s3(bucket: str, key: str) -> pd.DataFrame:
+def read_csv_from_s3(bucket: str, key: str) -> "pd.DataFrame":
     """
     Reads a CSV file from S3 and returns a pandas DataFrame.
     
@@ -21,6 +30,8 @@ def read_csv_from_s3(bucket: str, key: str) -> pd.DataFrame:
     Returns:
         pd.DataFrame: CSV content as DataFrame
     """
+    import pandas as pd
+
     try:
         obj = s3.get_object(Bucket=bucket, Key=key)
         return pd.read_csv(io.BytesIO(obj["Body"].read()))
@@ -1,10 +1,128 @@
-import boto3
+import os
+import json
+import logging
+import threading
+from app.utils.startup import LazyObject
+
+logger = logging.getLogger(__name__)
+
+
+def _make_ssm_client():
+    import boto3
+    return boto3.client("ssm", region_name="ap-south-1")
+
+_ssm = LazyObject(_make_ssm_client, "ssm")
+
+# Every parameter the bot reads at startup, fetched in one batch
+PARAM_NAMES = [
+    "/trading-bot/telegram/BOT_TOKEN",
+    "/trading-bot/telegram/CHAT_ID",
+    "/dhan/client_id",
+    "/dhan/access_token",
+]
+
+# SSM GetParameters accepts at most 10 names per call
+_BATCH_SIZE = 10
+
+# Optional encrypted local copy for fast restarts (disabled without a key)
+SSM_CACHE_KEY = os.getenv("SSM_CACHE_KEY")
+SSM_CACHE_FILE = os.getenv("SSM_CACHE_FILE", "cache/ssm_params.enc")
+SSM_CACHE_TTL = int(os.getenv("SSM_CACHE_TTL", "300"))
+
+_PARAMS = {}
+_PARAMS_LOCK = threading.Lock()
+
+
+# ==========================================================
+# ENCRYPTED DISK CACHE
+# ==========================================================
+def _fernet():
+    if not SSM_CACHE_KEY:
+        return None
+    try:
+        from cryptography.fernet import Fernet
+        return Fernet(SSM_CACHE_KEY.encode())
+    except Exception as e:
+        logger.warning(f"⚠️ SSM disk cache disabled: {e}")
+        return None
+
+
+def _read_disk_cache() -> dict:
+    f = _fernet()
+    if f is None or not os.path.exists(SSM_CACHE_FILE):
+        return {}
+    try:
+        with open(SSM_CACHE_FILE, "rb") as fh:
+            # Fernet tokens carry their creation time, ttl rejects stale copies
+            return json.loads(f.decrypt(fh.read(), ttl=SSM_CACHE_TTL))
+    except Exception:
+        logger.info("ℹ️ SSM disk cache expired or unreadable, fetching from SSM")
+        return {}
+
+
+def _write_disk_cache(params: dict):
+    f = _fernet()
+    if f is None:
+        return
+    try:
+        os.makedirs(os.path.dirname(SSM_CACHE_FILE) or ".", exist_ok=True)
+        tmp = f"{SSM_CACHE_FILE}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(f.encrypt(json.dumps(params).encode()))
+        os.replace(tmp, SSM_CACHE_FILE)
+    except OSError:
+        logger.exception("⚠️ Failed to write SSM disk cache")
+
+
+# ==========================================================
+# BATCH LOADER
+# ==========================================================
+def load_params(names=None) -> dict:
+    """
+    Load parameters into the process cache with as few SSM calls as possible.
+    Values come from memory, then the encrypted disk copy, then one
+    GetParameters batch (SecureStrings are decrypted).
+    """
+    names = list(dict.fromkeys(names or PARAM_NAMES))
+
+    with _PARAMS_LOCK:
+        missing = [n for n in names if n not in _PARAMS]
+        if not missing:
+            return _PARAMS
+
+        disk = _read_disk_cache()
+        _PARAMS.update({n: disk[n] for n in missing if n in disk})
+        missing = [n for n in missing if n not in _PARAMS]
+        if not missing:
+            logger.info(f"🔐 Loaded {len(names)} SSM parameters from disk cache")
+            return _PARAMS
+
+        for i in range(0, len(missing), _BATCH_SIZE):
+            resp = _ssm.get_parameters(Names=missing[i:i + _BATCH_SIZE], WithDecryption=True)
+            for p in resp.get("Parameters", []):
+                _PARAMS[p["Name"]] = p["Value"]
+            for name in resp.get("InvalidParameters", []):
+                logger.error(f"❌ SSM parameter not found: {name}")
+
+        logger.info(f"🔐 Loaded {len(missing)} SSM parameters in one batch")
+        _write_disk_cache(_PARAMS)
+        return _PARAMS
+
+
+def clear_param_cache(disk=True):
+    """Forget cached values, e.g. after rotating the Dhan access token."""
+    with _PARAMS_LOCK:
+        _PARAMS.clear()
+    if disk and os.path.exists(SSM_CACHE_FILE):
+        os.remove(SSM_CACHE_FILE)
 
-_ssm = boto3.client("ssm", region_name="ap-south-1")
 
 def get_param(name: str, decrypt: bool = True) -> str:
-    response = _ssm.get_parameter(
-        Name=name,
-        WithDecryption=decrypt
-    )
-    return response["Parameter"]["Value"]
+    # decrypt is kept for callers; batch loads always decrypt SecureStrings
+    if name not in _PARAMS:
+        load_params(PARAM_NAMES + [name])
+
+    if name not in _PARAMS:
+        raise KeyError(f"SSM parameter not found: {name}")
+    return _PARAMS[name]
@@ -1,15 +1,26 @@
 # app/config/dhan_auth.py
-from dhanhq import DhanContext, dhanhq
+import os
 from app.config.aws_ssm import get_param
+from app.utils.startup import LazyObject
 
 _client_id = None
 _access_token = None
 
 def get_dhan_client():
+    from dhanhq import DhanContext, dhanhq
+
     global _client_id, _access_token
     if not _client_id or not _access_token:
         _client_id = get_param("/dhan/client_id")
         _access_token = get_param("/dhan/access_token")
-    return dhanhq(DhanContext(_client_id, _access_token))
+    client = dhanhq(DhanContext(_client_id, _access_token))
+
+    # DHAN_RECORD=1 (default path) or DHAN_RECORD=<file.jsonl.gz>: record all API traffic
+    record = os.getenv("DHAN_RECORD")
+    if record:
+        from app.broker.api_recorder import RecordingDhan, default_record_path
+        client = RecordingDhan(client, default_record_path() if record == "1" else record)
+    return client
 
-dhan = get_dhan_client()
+# Built on first use (or by the startup warm-up), not at import time
+dhan = LazyObject(get_dhan_client, "dhan")
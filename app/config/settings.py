@@ -24,11 +24,59 @@ EOD_DATA_PREFIX = "eod_data"   # 👈 folder in S3
 # --- Logs ---
 LOG_DIR = "logs"
 
+# --- Log shipping: gzip chunks uploaded to s3://<S3_BUCKET>/<prefix>/dt=YYYY-MM-DD/<host>/ ---
+LOG_SHIP = os.getenv("LOG_SHIP", "1") == "1"
+LOG_SHIP_PREFIX = os.getenv("LOG_SHIP_PREFIX", "trading-bot/logs")
+LOG_CHUNK_SECONDS = int(os.getenv("LOG_CHUNK_SECONDS", "300"))
+LOG_CHUNK_BYTES = int(os.getenv("LOG_CHUNK_BYTES", str(8 * 1024 * 1024)))
+
+# --- Local caches (instrument registry etc.) ---
+CACHE_DIR = os.getenv("CACHE_DIR", "cache")
+
+# --- Trade event journal (crash recovery) ---
+JOURNAL_DIR = os.getenv("JOURNAL_DIR", "journal")
+
+# --- Dry run (replays): no Telegram sends, no EC2 termination ---
+DRY_RUN = os.getenv("DRY_RUN") == "1"
+
+# --- Per-day session state (daily limits, scan flags) ---
+STATE_DIR = os.getenv("STATE_DIR", "state")
+
+# --- Prometheus /metrics endpoint (localhost only by default) ---
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+# --- Event-loop monitor: stall threshold / per-call-site daily budget (seconds) ---
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.25"))
+LOOP_BLOCK_BUDGET = float(os.getenv("LOOP_BLOCK_BUDGET", "5"))
+
+# --- Breakout entries: wait for price to cross Entry (trigger engine) instead of one check at 09:30 ---
+ENTRY_TRIGGERS = os.getenv("ENTRY_TRIGGERS") == "1"
+# Skip a trigger whose live price is more than this many R past Entry
+ENTRY_MAX_SLIPPAGE_R = float(os.getenv("ENTRY_MAX_SLIPPAGE_R", "0.25"))
+
+# --- Live inside-bar (5m) / opposite-candle (15m) alerts from polled quotes ---
+PATTERN_SCANS = os.getenv("PATTERN_SCANS") == "1"
+PATTERN_POLL_SECONDS = float(os.getenv("PATTERN_POLL_SECONDS", "30"))
+
+# --- Watchdog: seconds before a single broker call is abandoned ---
+BROKER_CALL_TIMEOUT = float(os.getenv("BROKER_CALL_TIMEOUT", "20"))
+
 # =========================
 # TELEGRAM (FROM SSM)
 # =========================
-BOT_TOKEN = get_param("/trading-bot/telegram/BOT_TOKEN", decrypt=True)
-CHAT_ID = get_param("/trading-bot/telegram/CHAT_ID")
+# Resolved on first access (module __getattr__) so importing settings
+# doesn't hit SSM. Use settings.BOT_TOKEN / settings.CHAT_ID at call time.
+_SSM_SETTINGS = {
+    "BOT_TOKEN": "/trading-bot/telegram/BOT_TOKEN",
+    "CHAT_ID": "/trading-bot/telegram/CHAT_ID",
+}
+
+
+def __getattr__(name):
+    if name in _SSM_SETTINGS:
+        return get_param(_SSM_SETTINGS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # --- Telegram Keywords ---
 TRIGGER_KEYWORDS = ["scanner", "scan", "momentum", "interday", "intraday"]
@@ -0,0 +1,242 @@
+# app/execution/reconciler.py
+
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from app.broker.super_order import SuperOrder
+from app.broker.dhan_super_client import super_order_exit_status
+from app.broker.order_idempotency import is_live_super_order
+from app.broker.instrument_registry import to_security_id
+from app.execution import trade_journal as journal
+
+logger = logging.getLogger(__name__)
+
+# Orders placed by this bot carry this correlation / tag suffix
+AUTO_TAG_SUFFIX = "_AUTO"
+
+# Parent order statuses that mean the entry has not traded yet
+_PENDING_STATUSES = ("PENDING", "TRANSIT", "PART_TRADED")
+
+
+# ==========================================================
+# BULK SNAPSHOT
+# ==========================================================
+def _records(resp):
+    """
+    Unwrap a Dhan SDK response into a list of dicts.
+
+    Returns:
+        list | None: None when the call failed - not the same as an empty book
+    """
+    if isinstance(resp, str):
+        resp = json.loads(resp)
+    if not isinstance(resp, dict) or resp.get("status") != "success":
+        return None
+    data = resp.get("data") or []
+    return data if isinstance(data, list) else [data]
+
+
+def fetch_broker_snapshot(dhan_context):
+    """
+    Pull super orders, order book and positions in parallel.
+
+    Returns:
+        dict: {"super_orders": [...], "orders": [...], "positions": [...]};
+              a source whose fetch failed is None
+    """
+    calls = {
+        "super_orders": SuperOrder(dhan_context).get_super_order_list,
+        "orders": dhan_context.get_order_list,
+        "positions": dhan_context.get_positions,
+    }
+
+    start = time.perf_counter()
+    snapshot = {}
+    with ThreadPoolExecutor(max_workers=len(calls), thread_name_prefix="reconcile") as pool:
+        futures = {name: pool.submit(fn) for name, fn in calls.items()}
+        for name, fut in futures.items():
+            try:
+                snapshot[name] = _records(fut.result())
+            except Exception:
+                logger.exception(f"❌ Snapshot fetch failed: {name}")
+                snapshot[name] = None
+            if snapshot[name] is None:
+                logger.error(f"❌ Snapshot source unavailable: {name}")
+
+    def count(name):
+        return "?" if snapshot[name] is None else len(snapshot[name])
+
+    logger.info(
+        f"📸 Broker snapshot in {(time.perf_counter() - start) * 1000:.0f} ms | "
+        f"{count('super_orders')} super orders, {count('orders')} orders, "
+        f"{count('positions')} positions"
+    )
+    return snapshot
+
+
+# ==========================================================
+# MATCHING
+# ==========================================================
+def _leg_price(order, leg_name):
+    for leg in order.get("legDetails", []):
+        if leg.get("legName") == leg_name:
+            return leg.get("price")
+    return None
+
+
+def _position_from_super_order(order):
+    """Build a journal-shaped position for a bot order the journal doesn't know."""
+    cid = order.get("correlationId")
+    name = cid[: -len(AUTO_TAG_SUFFIX)] if cid else order.get("tradingSymbol")
+    side = (order.get("transactionType") or "").upper()
+    entry = order.get("averageTradedPrice") or order.get("price")
+    sl = _leg_price(order, "STOP_LOSS_LEG")
+
+    return {
+        "correlation_id": cid,
+        "stock": {
+            "Stock Name": name,
+            "Security ID": order.get("securityId"),
+            "Signal": side,
+            "Entry": entry,
+            "SL": sl,
+        },
+        "order_id": order.get("orderId"),
+        "entry": entry,
+        "sl": sl,
+        "qty": order.get("quantity"),
+        "side": side,
+        "status": journal.PENDING,
+        "partial_done": False,
+        "trail_sl": None,
+        "filled": False,
+        "exit_reason": None,
+    }
+
+
+def _adoptable(order, net_qty):
+    """
+    A journal-less bot order is worth tracking only while it is live: entry
+    still pending, or traded with the position still open (when positions
+    are known).
+    """
+    if not is_live_super_order(order):
+        return False
+    if order.get("orderStatus") in _PENDING_STATUSES or net_qty is None:
+        return True
+    try:
+        return net_qty.get(to_security_id(order.get("securityId")), 0) != 0
+    except (TypeError, ValueError):
+        return False
+
+
+def reconcile(state, snapshot):
+    """
+    Match local journal state against a broker snapshot.
+
+    - Local positions are matched by correlation ID, falling back to order ID.
+    - Finished orders are marked CLOSED (and journaled).
+    - Filled entries are marked OPEN (and journaled).
+    - Live bot orders ({name}_AUTO) missing from the journal are adopted:
+      pending entries, or traded ones with a non-zero net position.
+
+    Without the super-order list nothing can be matched, so reconciliation
+    is skipped and the journal state is used as is. A missing order book or
+    position list only disables the checks that use it.
+
+    Returns:
+        list: positions that need a monitor re-attached.
+    """
+    if snapshot["super_orders"] is None:
+        logger.warning("⚠️ Super-order list unavailable, skipping reconciliation (journal state only)")
+        return state.live_positions()
+
+    by_cid, by_id = {}, {}
+    for order in snapshot["super_orders"]:
+        if order.get("correlationId"):
+            by_cid[order["correlationId"]] = order
+        if order.get("orderId"):
+            by_id[order["orderId"]] = order
+
+    # Order book is the fallback source of parent status
+    book_by_cid = {o.get("correlationId"): o for o in snapshot["orders"] or [] if o.get("correlationId")}
+
+    net_qty = None if snapshot["positions"] is None else {}
+    for p in snapshot["positions"] or []:
+        try:
+            net_qty[to_security_id(p.get("securityId"))] = int(p.get("netQty") or 0)
+        except (TypeError, ValueError):
+            continue
+
+    # Adopt bot orders the journal never saw (e.g. crash right after placing).
+    # Only live ones: finished / cancelled orders of the day are not trades to track.
+    for cid, order in by_cid.items():
+        if not cid.endswith(AUTO_TAG_SUFFIX) or cid in state.positions:
+            continue
+        if not _adoptable(order, net_qty):
+            logger.info(f"⏭️ Not adopting finished bot order {order.get('orderId')} ({cid}): {order.get('orderStatus')}")
+            continue
+
+        logger.warning(f"🧩 Adopting untracked bot order {order.get('orderId')} ({cid})")
+        pos = state.positions[cid] = _position_from_super_order(order)
+        journal.record(
+            journal.ORDER_PLACED,
+            correlation_id=cid,
+            stock=pos["stock"],
+            order_id=pos["order_id"],
+            entry=pos["entry"],
+            sl=pos["sl"],
+            qty=pos["qty"],
+            side=pos["side"],
+            source="reconcile",
+        )
+
+    live = []
+    for cid, pos in state.positions.items():
+        if pos["status"] == journal.CLOSED:
+            continue
+
+        order = by_cid.get(cid) or by_id.get(pos["order_id"])
+        if order is None:
+            book = book_by_cid.get(cid)
+            if book is None:
+                logger.warning(f"⚠️ {cid} not found at broker, keeping local state")
+                live.append(pos)
+                continue
+            order = {"orderStatus": book.get("orderStatus")}
+
+        exit_status = super_order_exit_status(order)
+        if exit_status:
+            pos["status"] = journal.CLOSED
+            pos["exit_reason"] = exit_status
+            pos["filled"] = pos["filled"] or not exit_status.startswith("PARENT_")
+            event = journal.ORDER_FAILED if exit_status.startswith("PARENT_") else journal.EXITED
+            journal.record(event, correlation_id=cid, reason=exit_status, source="reconcile")
+            logger.info(f"✔️ {cid} finished at broker: {exit_status}")
+            continue
+
+        parent = order.get("orderStatus")
+        if parent == "TRADED":
+            if pos["status"] != journal.OPEN:
+                pos["status"] = journal.OPEN
+                pos["filled"] = True
+                journal.record(journal.FILLED, correlation_id=cid, order_id=pos["order_id"], source="reconcile")
+        elif parent not in _PENDING_STATUSES:
+            # EXPIRED and other terminal states of an untraded entry
+            pos["status"] = journal.CLOSED
+            pos["exit_reason"] = parent
+            journal.record(journal.ORDER_FAILED, correlation_id=cid, reason=parent, source="reconcile")
+            logger.info(f"✔️ {cid} entry ended at broker: {parent}")
+            continue
+
+        sec_id = pos["stock"].get("Security ID")
+        if pos["status"] == journal.OPEN and sec_id is not None and net_qty is not None \
+                and net_qty.get(to_security_id(sec_id), 0) == 0:
+            logger.warning(f"⚠️ {cid} open at broker but net position is flat")
+
+        live.append(pos)
+
+    logger.info(f"🔗 Reconciled {len(state.positions)} position(s), {len(live)} live")
+    return live
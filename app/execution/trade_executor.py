@@ -1,48 +1,144 @@
 # app/execution/trade_executor.py
 
-import time
 import logging
 from app.execution.position_manager import PositionManager
 from app.broker.dhan_super_client import DhanSuperBroker
 from app.broker.market_data import get_ltp
+from app.broker.fund_manager import reserve_fund, release_fund
+from app.broker.leverage_manager import get_leverage
+from app.utils.logging_setup import log_throttled
+from app.execution import trade_journal as journal
+from app.utils import clock
+from app.utils.metrics import OPEN_POSITIONS
+from app.execution.watchdog import get_watchdog, call_with_timeout, BrokerCallTimeout, ORDERS, MONITOR
+from app.config.settings import BROKER_CALL_TIMEOUT
 
-def execute_trade(stock, dhan_context):
+logger = logging.getLogger(__name__)
+
+# Seconds between order-status checks while a trade is monitored
+MONITOR_POLL_SECONDS = 30
+
+# Repetitive monitor lines are emitted at most once per this many seconds
+MONITOR_LOG_INTERVAL = 120
+
+# A monitor that has not looped for this long is reported as stalled
+# (one iteration = MONITOR_POLL_SECONDS sleep + a few broker calls capped at BROKER_CALL_TIMEOUT)
+MONITOR_STALE_AFTER = 180
+
+# Pause before retrying after a broker call timed out
+TIMEOUT_BACKOFF = 5
+
+def _journal_stock(stock):
+    """Fields of the signal row needed to resume monitoring after a restart."""
+    return {k: stock.get(k) for k in ("Stock Name", "Security ID", "Signal", "Entry", "SL")}
+
+
+def execute_trade(stock, dhan_context, staged=None, price=None):
     """
     Execute trade using Dhan Super Orders.
     SL and target are managed automatically via Super Orders.
     Partial booking and trailing logic modifies the super order legs.
+
+    `staged` (from DhanSuperBroker.stage_trade) + `price` send a pre-sized
+    order straight away (entry triggers) instead of fetching LTP and sizing.
     """
 
     broker = DhanSuperBroker(dhan_context)
     side = stock["Signal"].upper()
 
     # 1️⃣ Place Super Order
-    
-    order_info = broker.place_trade(stock)   # now returns dict
+    if staged is not None:
+        order_info = broker.place_staged(staged, price)
+    else:
+        order_info = broker.place_trade(stock)   # now returns dict
     if not order_info:
         logging.error(f"❌ Failed to place Super Order for {stock['Stock Name']}")
         return False   
 
+    journal.record(
+        journal.ORDER_PLACED,
+        correlation_id=order_info["correlation_id"],
+        stock=_journal_stock(stock),
+        order_id=order_info["order_id"],
+        entry=order_info["entry"],
+        sl=order_info["sl"],
+        qty=order_info["qty"],
+        side=side,
+    )
+
+    logging.info(
+        f"🚀 Super Order placed for {stock['Stock Name']} | Entry: {order_info['entry']}, "
+        f"SL: {order_info['sl']}, Qty: {order_info['qty']}"
+    )
+    return monitor_trade(broker, stock, order_info)
+
+
+def resume_trade(position, dhan_context):
+    """
+    Re-attach the monitor to a position rebuilt from the trade journal
+    after a restart, without placing a new order.
+    """
+    broker = DhanSuperBroker(dhan_context)
+    order_info = {k: position[k] for k in ("order_id", "entry", "sl", "qty", "correlation_id")}
+
+    logging.info(
+        f"♻️ Resuming {position['status']} trade | {position['stock']['Stock Name']} | "
+        f"Order ID: {position['order_id']}"
+    )
+    return monitor_trade(
+        broker,
+        position["stock"],
+        order_info,
+        filled=position["status"] == journal.OPEN,
+        partial_done=position["partial_done"],
+    )
+
+
+def _call(fn, *args, lane=ORDERS, **kwargs):
+    """Broker call with the standard timeout (raises BrokerCallTimeout)."""
+    return call_with_timeout(fn, *args, timeout=BROKER_CALL_TIMEOUT, lane=lane, **kwargs)
+
+
+def monitor_trade(broker, stock, order_info, filled=False, partial_done=False):
+    """
+    Wait for the entry to trade (unless already filled), then manage the
+    position until the Super Order exits. Watched by the watchdog.
+    """
+    hb = get_watchdog().register(f"monitor:{stock['Stock Name']}", timeout=MONITOR_STALE_AFTER)
+    try:
+        return _monitor_trade(broker, stock, order_info, filled, partial_done, hb)
+    finally:
+        hb.close()
+
+
+def _monitor_trade(broker, stock, order_info, filled, partial_done, hb):
+    side = stock["Signal"].upper()
     order_id = order_info["order_id"]        # extract order_id from dict
     entry_price = order_info["entry"]        # can use for monitoring
     sl_price = order_info["sl"]
     qty = order_info["qty"]
-
-    logging.info(f"🚀 Super Order placed for {stock['Stock Name']} | Entry: {entry_price}, SL: {sl_price}, Qty: {qty}")
+    cid = order_info["correlation_id"]
+    already_filled = filled
      
     # ─────────────────────────────────────────────
     # WAIT UNTIL ORDER IS TRADED
     # ─────────────────────────────────────────────
-    logging.info(f"⏳ Waiting for order to be TRADED...")
+    if not filled:
+        logging.info(f"⏳ Waiting for order to be TRADED...")
 
     max_wait_seconds = 600
-    start_time = time.time()
+    start_time = clock.time_now()
 
-    while True:
-        order_status = broker.get_order_status(order_id)
+    while not filled:
+        hb.beat()
+        try:
+            order_status = _call(broker.get_order_status, order_id, lane=MONITOR)
+        except BrokerCallTimeout:
+            order_status = None
 
-        logging.info(
-            f"📊 Order Status | {stock['Stock Name']} | {order_status}"
+        log_throttled(
+            logger, logging.INFO, ("order_status", order_id, order_status), MONITOR_LOG_INTERVAL,
+            "📊 Order Status | %s | %s", stock["Stock Name"], order_status,
         )
 
         # ✅ If traded → start LTP monitoring
@@ -50,6 +146,7 @@ def execute_trade(stock, dhan_context):
             logging.info(
                 f"✅ Order TRADED | {stock['Stock Name']} | Starting LTP monitor"
             )
+            journal.record(journal.FILLED, correlation_id=cid, order_id=order_id)
             break
 
         # ❌ If rejected/cancelled → stop
@@ -57,26 +154,34 @@ def execute_trade(stock, dhan_context):
             logging.error(
                 f"❌ Order {order_status} | {stock['Stock Name']}"
             )
+            journal.record(journal.ORDER_FAILED, correlation_id=cid, reason=order_status)
             return False
 
         # ⏳ Timeout protection
-        if time.time() - start_time > max_wait_seconds:
+        if clock.time_now() - start_time > max_wait_seconds:
             logging.warning(
         f"⏰ Order not traded within timeout for {stock['Stock Name']}. Cancelling order..."
     )
             try:
-                broker.exit_trade(order_id)  # Cancels ENTRY_LEG
+                _call(broker.exit_trade, order_id)  # Cancels ENTRY_LEG
                 logging.info(f"🛑 Order cancelled due to timeout | ID: {order_id}")
             except Exception as e:
                 logging.error(f"❌ Failed to cancel order: {e}")
 
+            journal.record(journal.ORDER_FAILED, correlation_id=cid, reason="ENTRY_TIMEOUT")
             return False
 
-        time.sleep(30)
+        clock.sleep(MONITOR_POLL_SECONDS)
 
 
     
 
+    # Margin blocked by this fill, so later sizing doesn't reuse it.
+    # A resumed, already-filled position is in the broker balance already.
+    margin_used = qty * entry_price / get_leverage(stock["Security ID"])
+    if not already_filled:
+        reserve_fund(margin_used)
+
     logging.info(f"🚀 Monitoring trade for {stock['Stock Name']}")
 
     # 2️⃣ Init Position Manager (only for tracking 1R / 1.5R levels)
@@ -86,65 +191,110 @@ def execute_trade(stock, dhan_context):
         qty=qty,
         side=side
     )
+    pm.partial_done = partial_done
 
-    # 3️⃣ Monitor LTP and manage Super Order legs
-    while True:
-        # 🔎 First check if trade already exited
-        #order_status = broker.get_order_status(order_id)
-        #if order_status in ["CANCELLED", "REJECTED"]:
-         #   logging.warning(f"❌ Trade cancelled externally | {stock['Stock Name']}")
-         #   break
-
-        # 🔎 Check Super Order exit status
-        exit_status = broker.check_super_order_exit(order_id)
-        logging.info(f"🎯 exit_status={exit_status} | {stock['Stock Name']}")
-        if exit_status == "PARENT_CANCELLED":
-            logging.warning(f"❌ Parent order cancelled | {stock['Stock Name']}")
-            return False
+    OPEN_POSITIONS.inc()
+    try:
+        # 3️⃣ Monitor LTP and manage Super Order legs
+        while True:
+            # 🔎 First check if trade already exited
+            #order_status = broker.get_order_status(order_id)
+            #if order_status in ["CANCELLED", "REJECTED"]:
+             #   logging.warning(f"❌ Trade cancelled externally | {stock['Stock Name']}")
+             #   break
+
+            hb.beat()
+
+            # 🔎 Check Super Order exit status
+            try:
+                exit_status = _call(broker.check_super_order_exit, order_id, lane=MONITOR)
+            except BrokerCallTimeout:
+                clock.sleep(TIMEOUT_BACKOFF)
+                continue
+            log_throttled(
+                logger, logging.INFO, ("exit_status", order_id, exit_status), MONITOR_LOG_INTERVAL,
+                "🎯 exit_status=%s | %s", exit_status, stock["Stock Name"],
+            )
+            if exit_status == "PARENT_CANCELLED":
+                logging.warning(f"❌ Parent order cancelled | {stock['Stock Name']}")
+                release_fund(margin_used)
+                journal.record(journal.EXITED, correlation_id=cid, reason=exit_status)
+                return False
             
-        elif exit_status == "PARENT_REJECTED":
-            logging.error(f"❌ Parent order rejected | {stock['Stock Name']}")
-            return False
-        elif exit_status == "STOP_LOSS_HIT":
-            logging.info(f"🛑 STOP LOSS HIT | {stock['Stock Name']}")
-            return True  # Trade completed (loss)
-        elif exit_status == "TARGET_HIT":
-            logging.info(f"🎯 TARGET HIT | {stock['Stock Name']}")
-            return True  # Trade completed (profit)
-        elif exit_status == "EXIT_CANCELLED":
-            logging.info(f"⚫ Trade exited manually | {stock['Stock Name']}")
-            return True
-
-        ltp = get_ltp(stock["Security ID"])
-        if not ltp:
-            time.sleep(1)
-            continue
+            elif exit_status == "PARENT_REJECTED":
+                logging.error(f"❌ Parent order rejected | {stock['Stock Name']}")
+                release_fund(margin_used)
+                journal.record(journal.EXITED, correlation_id=cid, reason=exit_status)
+                return False
+            elif exit_status == "STOP_LOSS_HIT":
+                logging.info(f"🛑 STOP LOSS HIT | {stock['Stock Name']}")
+                release_fund(margin_used)
+                journal.record(journal.EXITED, correlation_id=cid, reason=exit_status)
+                return True  # Trade completed (loss)
+            elif exit_status == "TARGET_HIT":
+                logging.info(f"🎯 TARGET HIT | {stock['Stock Name']}")
+                release_fund(margin_used)
+                journal.record(journal.EXITED, correlation_id=cid, reason=exit_status)
+                return True  # Trade completed (profit)
+            elif exit_status == "EXIT_CANCELLED":
+                logging.info(f"⚫ Trade exited manually | {stock['Stock Name']}")
+                release_fund(margin_used)
+                journal.record(journal.EXITED, correlation_id=cid, reason=exit_status)
+                return True
+
+            # One attempt: this loop is the retry, and the call carries its own timeout
+            ltp = get_ltp(stock["Security ID"], max_attempts=1)
+            if not ltp:
+                clock.sleep(1)
+                continue
         
-        logging.info(
-            f"📈 LTP Monitor | {stock['Stock Name']} | LTP={ltp}"
-        )
-        action = pm.process_ltp(ltp)
+            log_throttled(
+                logger, logging.INFO, ("ltp_monitor", order_id), MONITOR_LOG_INTERVAL,
+                "📈 LTP Monitor | %s | LTP=%s", stock["Stock Name"], ltp,
+            )
+            action = pm.process_ltp(ltp)
 
-        # 1R reached → partial book
-        if action == "PARTIAL_BOOK":
-            logging.info(f"🔹 1R reached for {stock['Stock Name']} | Partial booking half qty")
-            broker.partial_book(order_id, qty // 2)
+            # 1R reached → partial book
+            if action == "PARTIAL_BOOK":
+                logging.info(f"🔹 1R reached for {stock['Stock Name']} | Partial booking half qty")
+                try:
+                    _call(broker.partial_book, order_id, qty // 2)
+                except BrokerCallTimeout:
+                    pm.partial_done = False     # modify sets an absolute qty, safe to retry
+                    clock.sleep(TIMEOUT_BACKOFF)
+                    continue
+                journal.record(journal.MODIFIED, correlation_id=cid, action=action, qty=qty - qty // 2)
 
-        # 1.5R reached → trail SL
-        elif action == "TRAIL_SL":
-            logging.info(f"🔁 1.5R reached for {stock['Stock Name']} | Trailing SL to entry")
-            broker.trail_sl(order_id, entry_price)
+            # 1.5R reached → trail SL
+            elif action == "TRAIL_SL":
+                logging.info(f"🔁 1.5R reached for {stock['Stock Name']} | Trailing SL to entry")
+                try:
+                    _call(broker.trail_sl, order_id, entry_price)
+                except BrokerCallTimeout:
+                    # process_ltp flags the 1R step done when it returns TRAIL_SL
+                    pm.partial_done = False
+                    clock.sleep(TIMEOUT_BACKOFF)
+                    continue
+                journal.record(journal.MODIFIED, correlation_id=cid, action=action, sl=entry_price)
         
-        # Full exit logic → separate condition
-        elif action == "EXIT_TRADE":
-            logging.info(f"🛑 EXIT_TRADE triggered for {stock['Stock Name']} | Exiting at MARKET STOP_LOSS")
-            broker.exit_trade_market(order_id, side=side, ltp=ltp)
-            logging.info(f"✅ Trade fully exited for {stock['Stock Name']}")
-            break  # Stop monitoring
+            # Full exit logic → separate condition
+            elif action == "EXIT_TRADE":
+                logging.info(f"🛑 EXIT_TRADE triggered for {stock['Stock Name']} | Exiting at MARKET STOP_LOSS")
+                try:
+                    _call(broker.exit_trade_market, order_id, side=side, ltp=ltp)
+                except BrokerCallTimeout:
+                    clock.sleep(TIMEOUT_BACKOFF)
+                    continue    # exit status is re-checked first thing next loop
+                release_fund(margin_used)
+                journal.record(journal.EXITED, correlation_id=cid, reason=action, ltp=ltp)
+                logging.info(f"✅ Trade fully exited for {stock['Stock Name']}")
+                break  # Stop monitoring
 
 
         
-        # ⏱️ WAIT 30 SECONDS BEFORE NEXT CHECK
-        time.sleep(30)
-    # Fallback safety (should never reach here)
-    return False
+            # ⏱️ WAIT BEFORE NEXT CHECK
+            clock.sleep(MONITOR_POLL_SECONDS)
+        # Fallback safety (should never reach here)
+        return False
+    finally:
+        OPEN_POSITIONS.dec()
@@ -0,0 +1,223 @@
+# app/execution/trade_journal.py
+import os
+import json
+import time
+import logging
+import threading
+
+from app.config.settings import IST, JOURNAL_DIR
+from app.utils import clock
+
+logger = logging.getLogger(__name__)
+
+# Event types
+SIGNAL = "SIGNAL"
+ORDER_PLACED = "ORDER_PLACED"
+ORDER_FAILED = "ORDER_FAILED"
+FILLED = "FILLED"
+MODIFIED = "MODIFIED"
+EXITED = "EXITED"
+
+# Position status derived from events
+PENDING = "PENDING"     # order placed, not yet traded
+OPEN = "OPEN"           # traded, being monitored
+CLOSED = "CLOSED"       # exited / cancelled / rejected
+
+_JOURNAL = None
+_JOURNAL_LOCK = threading.Lock()
+
+
+class TradeJournal:
+    """
+    Append-only JSONL journal of trade events.
+
+    Writes go to the OS immediately; fsync is batched. The journal-fsync
+    thread syncs pending writes every `fsync_interval` seconds, so appends
+    never wait on the disk - except the one that reaches `fsync_every`
+    unsynced events. A crash loses at most a fraction of a second of events.
+    """
+
+    def __init__(self, path, fsync_interval=0.2, fsync_every=32):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.fsync_every = fsync_every
+
+        self._fh = open(path, "ab")
+        if self._fh.tell() and not self._ends_with_newline(path):
+            self._fh.write(b"\n")   # terminate a line torn by a crash
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._closed = threading.Event()
+
+        self._flusher = threading.Thread(target=self._flush_loop, name="journal-fsync", daemon=True)
+        self._flusher.start()
+
+    @staticmethod
+    def _ends_with_newline(path):
+        with open(path, "rb") as fh:
+            fh.seek(-1, os.SEEK_END)
+            return fh.read(1) == b"\n"
+
+    def append(self, event: str, **fields):
+        record = {"ts": round(clock.time_now(), 3), "event": event, **fields}
+        line = json.dumps(record, separators=(",", ":"), default=str).encode() + b"\n"
+
+        with self._lock:
+            self._fh.write(line)
+            self._fh.flush()
+            self._pending += 1
+            if self._pending >= self.fsync_every:
+                self._sync_locked()
+
+    def _sync_locked(self):
+        os.fsync(self._fh.fileno())
+        self._pending = 0
+
+    def sync(self):
+        # fsync outside the lock so appends keep going while the disk catches up
+        with self._lock:
+            pending = self._pending
+            if not pending:
+                return
+            fd = self._fh.fileno()
+        os.fsync(fd)
+        with self._lock:
+            self._pending = max(self._pending - pending, 0)
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.fsync_interval):
+            try:
+                self.sync()
+            except (OSError, ValueError):
+                logger.exception("❌ Journal fsync failed")
+
+    def close(self):
+        self._closed.set()
+        self._flusher.join()
+        self.sync()
+        with self._lock:
+            self._fh.close()
+
+
+# ==========================================================
+# REPLAY
+# ==========================================================
+class JournalState:
+    """
+    In-memory trade state rebuilt from journal events.
+
+    positions: {correlation_id: {...}} with keys
+        stock, order_id, entry, sl, qty, side, status, partial_done, trail_sl,
+        filled, exit_reason
+    """
+
+    def __init__(self):
+        self.positions = {}
+        self.signals = []
+        self.events = 0
+
+    def apply(self, rec):
+        self.events += 1
+        event = rec.get("event")
+        cid = rec.get("correlation_id")
+
+        if event == SIGNAL:
+            self.signals.append(rec)
+            return
+        if cid is None:
+            return
+
+        pos = self.positions.setdefault(cid, {
+            "correlation_id": cid,
+            "stock": rec.get("stock"),
+            "order_id": None,
+            "entry": None,
+            "sl": None,
+            "qty": 0,
+            "side": None,
+            "status": PENDING,
+            "partial_done": False,
+            "trail_sl": None,
+            "filled": False,
+            "exit_reason": None,
+        })
+
+        if event == ORDER_PLACED:
+            pos.update({k: rec[k] for k in ("stock", "order_id", "entry", "sl", "qty", "side") if k in rec})
+            pos["status"] = PENDING
+        elif event == FILLED:
+            pos["status"] = OPEN
+            pos["filled"] = True
+        elif event == MODIFIED:
+            if rec.get("action") in ("PARTIAL_BOOK", "TRAIL_SL"):
+                pos["partial_done"] = True
+            if "sl" in rec:
+                pos["trail_sl"] = rec["sl"]     # keep original sl: it defines 1R
+        elif event in (EXITED, ORDER_FAILED):
+            pos["status"] = CLOSED
+            pos["exit_reason"] = rec.get("reason")
+
+    def live_positions(self):
+        """Placed-but-unresolved and traded-but-not-exited positions."""
+        return [p for p in self.positions.values() if p["status"] in (PENDING, OPEN)]
+
+    def trades_filled(self) -> int:
+        return sum(1 for p in self.positions.values() if p["filled"])
+
+
+def replay(path) -> JournalState:
+    """
+    Rebuild trade state from a journal file. A torn last line from a
+    crash mid-write is skipped.
+    """
+    state = JournalState()
+    if not os.path.exists(path):
+        return state
+
+    with open(path, "rb") as fh:
+        for line in fh:
+            try:
+                state.apply(json.loads(line))
+            except ValueError:
+                logger.warning(f"⚠️ Skipping corrupt journal line in {path}")
+
+    return state
+
+
+# ==========================================================
+# TODAY'S JOURNAL
+# ==========================================================
+def journal_path(day=None):
+    day = day or clock.now(IST).strftime("%Y%m%d")
+    return os.path.join(JOURNAL_DIR, f"trades_{day}.jsonl")
+
+
+def get_journal() -> TradeJournal:
+    global _JOURNAL
+
+    path = journal_path()
+    with _JOURNAL_LOCK:
+        if _JOURNAL is None or _JOURNAL.path != path:
+            if _JOURNAL is not None:
+                _JOURNAL.close()
+            _JOURNAL = TradeJournal(path)
+    return _JOURNAL
+
+
+def record(event: str, **fields):
+    """Append to today's journal. Journal failures never break trading."""
+    try:
+        get_journal().append(event, **fields)
+    except Exception:
+        logger.exception(f"❌ Failed to journal {event}")
+
+
+def replay_today() -> JournalState:
+    start = time.perf_counter()
+    state = replay(journal_path())
+    logger.info(
+        f"📒 Journal replayed: {state.events} events, {len(state.live_positions())} live "
+        f"position(s) in {(time.perf_counter() - start) * 1000:.1f} ms"
+    )
+    return state
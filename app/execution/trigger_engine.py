@@ -0,0 +1,232 @@
+# app/execution/trigger_engine.py
+import logging
+import threading
+
+import numpy as np
+
+from app.broker.instrument_registry import to_security_id
+
+logger = logging.getLogger(__name__)
+
+TRIGGERED = "TRIGGERED"
+INVALIDATED = "INVALIDATED"
+
+
+class _SideBook:
+    """
+    Pending levels for one side, as parallel arrays sorted by security ID:
+    a tick batch finds its rows with one searchsorted (O(log n) per symbol).
+
+    direction: +1 for BUY (trigger at/above entry, invalid at/below),
+               -1 for SELL (trigger at/below entry, invalid at/above)
+    """
+
+    def __init__(self, side, direction):
+        self.side = side
+        self.direction = direction
+        self.ids = np.empty(0, dtype=np.int64)
+        self.entry = np.empty(0)
+        self.invalid = np.empty(0)
+        self.active = np.empty(0, dtype=bool)
+        self.payload = []
+
+    def find(self, sec_id):
+        i = int(np.searchsorted(self.ids, sec_id))
+        if i < len(self.ids) and self.ids[i] == sec_id:
+            return i
+        return None
+
+    def arm(self, sec_id, entry, invalid, payload):
+        i = self.find(sec_id)
+        if i is None:
+            i = int(np.searchsorted(self.ids, sec_id))
+            self.ids = np.insert(self.ids, i, sec_id)
+            self.entry = np.insert(self.entry, i, entry)
+            self.invalid = np.insert(self.invalid, i, invalid)
+            self.active = np.insert(self.active, i, True)
+            self.payload.insert(i, payload)
+        else:
+            self.entry[i], self.invalid[i], self.active[i] = entry, invalid, True
+            self.payload[i] = payload
+
+    def match(self, ids, prices):
+        """
+        Returns:
+            (triggered, invalidated): (tick_index, row) arrays of rows crossed
+                                      by this batch, first tick per row only;
+                                      a row crossing both levels keeps only
+                                      whichever it crossed first
+        """
+        n = len(self.ids)
+        if not n or not self.active.any():
+            empty = (np.empty(0, dtype=np.intp),) * 2
+            return empty, empty
+
+        pos = np.searchsorted(self.ids, ids)
+        row = np.minimum(pos, n - 1)
+        live = (pos < n) & (self.ids[row] == ids) & self.active[row]
+
+        d = self.direction
+        trig = live & (d * (prices - self.entry[row]) >= 0)
+        inval = live & ~trig & (d * (prices - self.invalid[row]) <= 0)
+        (t_ticks, t_rows), (i_ticks, i_rows) = self._first(trig, row), self._first(inval, row)
+
+        _, ti, ii = np.intersect1d(t_rows, i_rows, assume_unique=True, return_indices=True)
+        if len(ti):
+            trig_later = t_ticks[ti] > i_ticks[ii]
+            t_keep = np.ones(len(t_rows), dtype=bool)
+            i_keep = np.ones(len(i_rows), dtype=bool)
+            t_keep[ti[trig_later]] = False
+            i_keep[ii[~trig_later]] = False
+            t_ticks, t_rows = t_ticks[t_keep], t_rows[t_keep]
+            i_ticks, i_rows = i_ticks[i_keep], i_rows[i_keep]
+        return (t_ticks, t_rows), (i_ticks, i_rows)
+
+    @staticmethod
+    def _first(mask, row):
+        ticks = np.flatnonzero(mask)
+        rows, first = np.unique(row[ticks], return_index=True)
+        return ticks[first], rows
+
+
+class TriggerEngine:
+    """
+    Watches pending breakout candidates and fires as soon as a tick crosses
+    a candidate's entry (or cancels it when its invalidation level - the
+    SL - trades first).
+
+    Levels live in per-side sorted arrays; each tick batch is matched with
+    one vectorised binary search, so checking 1000 symbols costs the same
+    as one numpy call. A level fires once and is then disarmed.
+
+        engine = TriggerEngine()
+        engine.on_trigger(lambda ev: broker.place_staged(ev["payload"], ev["price"]))
+        engine.arm(sec_id, "BUY", entry=101.5, invalidation=99.0, payload=staged)
+        engine.ingest_quotes(get_quotes_with_retry(engine.armed_ids(), "NSE_EQ"))
+    """
+
+    def __init__(self):
+        self.books = {"BUY": _SideBook("BUY", 1), "SELL": _SideBook("SELL", -1)}
+        self._trigger_cbs = []
+        self._invalid_cbs = []
+        self._lock = threading.Lock()
+
+    # ----------------------------------------------------------
+    # Events
+    # ----------------------------------------------------------
+    def on_trigger(self, callback):
+        """callback(event) with event keys: security_id, side, entry, invalidation, price, payload"""
+        self._trigger_cbs.append(callback)
+
+    def on_invalidate(self, callback):
+        self._invalid_cbs.append(callback)
+
+    def _emit(self, callbacks, event):
+        for cb in callbacks:
+            try:
+                cb(event)
+            except Exception:
+                logger.exception(f"❌ Trigger callback failed for {event['security_id']}")
+
+    # ----------------------------------------------------------
+    # Levels
+    # ----------------------------------------------------------
+    def arm(self, sec_id, side, entry, invalidation, payload=None):
+        """
+        Watch `sec_id` for a `side` breakout through `entry`; drop it if
+        `invalidation` trades first. Re-arming replaces the levels.
+        """
+        side = side.upper()
+        with self._lock:
+            self.books[side].arm(to_security_id(sec_id), float(entry), float(invalidation), payload)
+        logger.info(f"🎯 Armed {side} trigger | {sec_id} | entry={entry} invalid={invalidation}")
+
+    def disarm(self, sec_id=None):
+        """Disarm one security (both sides), or everything when sec_id is None."""
+        with self._lock:
+            for book in self.books.values():
+                if sec_id is None:
+                    book.active[:] = False
+                else:
+                    i = book.find(to_security_id(sec_id))
+                    if i is not None:
+                        book.active[i] = False
+
+    def armed_ids(self):
+        with self._lock:
+            ids = [book.ids[book.active] for book in self.books.values()]
+        return np.unique(np.concatenate(ids)).tolist()
+
+    @property
+    def armed(self):
+        return sum(int(book.active.sum()) for book in self.books.values())
+
+    # ----------------------------------------------------------
+    # Ticks
+    # ----------------------------------------------------------
+    def update(self, sec_ids, prices, limit=None):
+        """
+        Match a batch of last prices against all armed levels.
+
+        Args:
+            limit (int): consume at most this many triggers (earliest ticks
+                         first); the others stay armed and are re-checked
+                         against the next batch. 0 only applies invalidations.
+
+        Returns:
+            list[dict]: triggered events, in tick order (callbacks have
+                        already run for each of them)
+        """
+        ids = np.asarray(sec_ids, dtype=np.int64)
+        px = np.asarray(prices, dtype=np.float64)
+        if not len(ids):
+            return []
+
+        def event(kind, book, tick, r):
+            return {
+                "event": kind,
+                "security_id": int(book.ids[r]),
+                "side": book.side,
+                "entry": float(book.entry[r]),
+                "invalidation": float(book.invalid[r]),
+                "price": float(px[tick]),
+                "payload": book.payload[r],
+            }
+
+        hits, dropped = [], []
+        with self._lock:
+            for book in self.books.values():
+                (t_ticks, t_rows), (i_ticks, i_rows) = book.match(ids, px)
+                book.active[i_rows] = False
+                dropped.extend((t, event(INVALIDATED, book, t, r)) for t, r in zip(i_ticks.tolist(), i_rows.tolist()))
+                hits.extend((t, book, r) for t, r in zip(t_ticks.tolist(), t_rows.tolist()))
+
+            hits.sort(key=lambda x: x[0])
+            if limit is not None:
+                hits = hits[:limit]
+            events = []
+            for tick, book, r in hits:
+                book.active[r] = False
+                events.append(event(TRIGGERED, book, tick, r))
+
+        # Callbacks run outside the lock so they can arm / disarm
+        for _, ev in sorted(dropped, key=lambda x: x[0]):
+            logger.info(f"🚫 {ev['side']} trigger invalidated | {ev['security_id']} @ {ev['price']}")
+            self._emit(self._invalid_cbs, ev)
+        for ev in events:
+            logger.info(f"⚡ {ev['side']} trigger hit | {ev['security_id']} @ {ev['price']} (entry {ev['entry']})")
+            self._emit(self._trigger_cbs, ev)
+        return events
+
+    def ingest_quotes(self, quotes, limit=None):
+        """Feed a {security_id: quote} dict as returned by get_quotes_with_retry."""
+        if not quotes:
+            return []
+        ids, prices = [], []
+        for sid, q in quotes.items():
+            ltp = q.get("last_price")
+            if ltp is None:
+                continue
+            ids.append(to_security_id(sid))
+            prices.append(ltp)
+        return self.update(ids, prices, limit=limit)
@@ -0,0 +1,300 @@
+# app/execution/watchdog.py
+#
+# Heartbeat watchdog for trade monitors and quote polling, plus per-call
+# timeouts for broker calls.
+#
+#   hb = get_watchdog().register(f"monitor:{name}", timeout=120)
+#   try:
+#       while ...:
+#           hb.beat()
+#           status = call_with_timeout(broker.check_super_order_exit, order_id, timeout=20, lane=MONITOR)
+#   finally:
+#       hb.close()
+#
+# A heartbeat that goes stale raises one alert (log + Telegram) with the
+# stack of the thread - or asyncio task - that registered it, and one
+# "recovered" message when it beats again. call_with_timeout() runs the
+# call on a worker thread of its lane and gives up on it after `timeout`,
+# so a hung HTTP request costs the monitor one iteration instead of the
+# position.
+import io
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+import concurrent.futures
+
+from app.utils.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+BROKER_CALL_TIMEOUTS = Counter("broker_call_timeouts_total", "Broker calls abandoned after timeout", ("call",))
+BROKER_CALL_BUSY = Gauge("broker_call_workers_busy", "Broker calls currently running, per lane", ("lane",))
+STALE_HEARTBEATS = Counter("watchdog_stale_total", "Heartbeats that went stale", ("kind",))
+
+# Call lanes: quote polling, order placement / modification, and the trade
+# monitors' status polls each get their own workers, so hung calls in one
+# lane can't starve the others.
+QUOTES = "quotes"
+ORDERS = "orders"
+MONITOR = "monitor"
+
+
+class _CallLane:
+    """
+    Worker threads for one kind of broker call.
+
+    A timed-out call keeps its worker until the socket gives up. Once every
+    worker is held, further calls run on a fresh daemon thread instead of
+    queueing - a queued call would time out without ever having run.
+    """
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.busy = 0           # calls running on the pool
+        self.overflow = 0       # calls running on their own thread
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"broker-call-{name}")
+        self._lock = threading.Lock()
+        self._busy_gauge = BROKER_CALL_BUSY.labels(name)
+
+    def occupancy(self):
+        return f"{self.busy}/{self.workers} {self.name} workers busy" + \
+            (f", {self.overflow} on overflow threads" if self.overflow else "")
+
+    def submit(self, fn, args, kwargs, name):
+        future = concurrent.futures.Future()
+        with self._lock:
+            on_pool = self.busy < self.workers
+            if on_pool:
+                self.busy += 1
+            else:
+                self.overflow += 1
+            self._busy_gauge.set(self.busy + self.overflow)
+
+        def run():
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args, **kwargs))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self._lock:
+                    if on_pool:
+                        self.busy -= 1
+                    else:
+                        self.overflow -= 1
+                    self._busy_gauge.set(self.busy + self.overflow)
+
+        if on_pool:
+            self._pool.submit(run)
+        else:
+            logger.warning(f"⚠️ Broker call lane saturated ({self.occupancy()}), running {name} on its own thread")
+            threading.Thread(target=run, name=f"broker-call-{self.name}-overflow", daemon=True).start()
+        return future
+
+
+_LANES = {
+    QUOTES: _CallLane(QUOTES, 4),
+    ORDERS: _CallLane(ORDERS, 4),
+    MONITOR: _CallLane(MONITOR, 8),
+}
+
+
+class BrokerCallTimeout(TimeoutError):
+    """A broker call did not return within its timeout (it may still complete)."""
+
+
+def call_with_timeout(fn, *args, timeout=20, name=None, lane=ORDERS, **kwargs):
+    """
+    Run fn(*args, **kwargs) with a deadline on the worker lane `lane`
+    (QUOTES / ORDERS / MONITOR).
+
+    Raises:
+        BrokerCallTimeout: the call is still running after `timeout` seconds.
+                           It is left to finish on its worker thread.
+    """
+    name = name or getattr(fn, "__name__", "call")
+    calls = _LANES[lane]
+    future = calls.submit(fn, args, kwargs, name)
+    try:
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        BROKER_CALL_TIMEOUTS.labels(name).inc()
+        logger.error(f"⏰ {name} did not return within {timeout}s, abandoning call ({calls.occupancy()})")
+        raise BrokerCallTimeout(f"{name} timed out after {timeout}s") from None
+
+
+def call_lane_occupancy():
+    """One line per lane, e.g. "2/8 monitor workers busy"."""
+    return [lane.occupancy() for lane in _LANES.values()]
+
+
+# ==========================================================
+# HEARTBEATS
+# ==========================================================
+class Heartbeat:
+    # Real time (not app.utils.clock): a hung socket is hung in wall-clock
+    # terms, also under a replay's virtual clock.
+
+    def __init__(self, watchdog, name, timeout):
+        self._watchdog = watchdog
+        self.name = name
+        self.timeout = timeout
+        self.thread_id = threading.get_ident()
+        try:
+            self.task = asyncio.current_task()
+        except RuntimeError:
+            self.task = None        # plain thread, no running loop
+        self.last = time.monotonic()
+        self.stale = False
+        self.closed = False
+
+    def beat(self):
+        self.last = time.monotonic()
+        if self.stale:
+            self._watchdog._recovered(self)
+
+    def close(self):
+        self.closed = True
+        self._watchdog._unregister(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def _thread_stack(thread_id):
+    frame = sys._current_frames().get(thread_id)
+    if frame is None:
+        return "  (thread has exited)\n"
+    return "".join(traceback.format_stack(frame))
+
+
+def _broker_call_stacks():
+    """Stacks of calls still running on the call_with_timeout pool."""
+    frames = sys._current_frames()
+    dumps = []
+    for t in threading.enumerate():
+        if t.name.startswith("broker-call") and t.ident in frames:
+            stack = traceback.extract_stack(frames[t.ident])
+            # Idle pool workers sit in the queue get
+            if stack and stack[-1].name == "_worker":
+                continue
+            dumps.append(f"--- {t.name} ---\n" + "".join(traceback.format_list(stack)))
+    return "".join(dumps)
+
+
+def _task_stack(task):
+    buf = io.StringIO()
+    task.print_stack(file=buf)
+    return buf.getvalue()
+
+
+class Watchdog:
+    """
+    Args:
+        check_interval (float): seconds between staleness checks
+    """
+
+    def __init__(self, check_interval=5.0):
+        self.check_interval = check_interval
+        self._beats = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def register(self, name, timeout):
+        """
+        Start watching `name`; it is stale once `timeout` seconds pass
+        without beat(). Starts the watchdog thread on first use.
+        """
+        hb = Heartbeat(self, name, timeout)
+        with self._lock:
+            self._beats[name] = hb
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="watchdog", daemon=True)
+                self._thread.start()
+        return hb
+
+    def _unregister(self, hb):
+        with self._lock:
+            if self._beats.get(hb.name) is hb:
+                del self._beats[hb.name]
+
+    def heartbeats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {name: round(now - hb.last, 1) for name, hb in self._beats.items()}
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.check_interval):
+            now = time.monotonic()
+            with self._lock:
+                beats = list(self._beats.values())
+            for hb in beats:
+                if not hb.stale and not hb.closed and now - hb.last > hb.timeout:
+                    hb.stale = True
+                    try:
+                        self._stale(hb, now - hb.last)
+                    except Exception:
+                        logger.exception(f"❌ Watchdog alert failed for {hb.name}")
+
+    # ------------------------------------------------------
+    # Alerts
+    # ------------------------------------------------------
+    def _stale(self, hb, age):
+        STALE_HEARTBEATS.labels(hb.name.split(":", 1)[0]).inc()
+        if hb.task is not None and not hb.task.done():
+            where = f"task {hb.task.get_name()}"
+            stack = _task_stack(hb.task)
+        else:
+            where = f"thread {hb.thread_id}"
+            stack = _thread_stack(hb.thread_id)
+
+        pending = _broker_call_stacks()
+        logger.error(
+            f"🚨 WATCHDOG: {hb.name} has not reported for {age:.0f}s ({where})\n{stack}"
+            + f"Broker call lanes: {'; '.join(call_lane_occupancy())}\n"
+            + (f"Broker calls in flight:\n{pending}" if pending else "")
+        )
+        self._notify(
+            f"🚨 WATCHDOG: {hb.name} stalled for {age:.0f}s\n"
+            f"Stuck at:\n{stack.strip().splitlines()[-1].strip()}"
+        )
+
+    def _recovered(self, hb):
+        hb.stale = False
+        logger.warning(f"✅ WATCHDOG: {hb.name} is reporting again")
+        self._notify(f"✅ WATCHDOG: {hb.name} recovered")
+
+    def _notify(self, message):
+        # Own thread + private loop: works even when the main event loop is
+        # the thing that is stuck. Never raises into the beating monitor.
+        def send():
+            try:
+                from app.bot.telegram_sender import send_telegram_message
+                asyncio.run(send_telegram_message(message))
+            except Exception:
+                logger.exception("❌ Watchdog Telegram alert failed")
+
+        threading.Thread(target=send, name="watchdog-alert", daemon=True).start()
+
+
+_WATCHDOG = None
+
+
+def get_watchdog():
+    global _WATCHDOG
+    if _WATCHDOG is None:
+        _WATCHDOG = Watchdog()
+    return _WATCHDOG
@@ -1,51 +1,49 @@
+import asyncio
 import logging
-import os
+from datetime import time
 
-from telegram.ext import (
-    ApplicationBuilder,
-    MessageHandler,
-    filters,
-)
+from app.utils.startup import timed, warm_up, startup_report
+from app.utils.logging_setup import setup_logging
 
-from app.bot.handlers import handle_message
-from app.bot.scheduler import (
-    terminate_at,
-    run_nifty_breakout_trade,
-)
-from app.config.aws_ssm import get_param
+with timed("import telegram"):
+    from telegram.ext import (
+        ApplicationBuilder,
+        MessageHandler,
+        filters,
+    )
+
+with timed("import app modules"):
+    from app.bot.handlers import handle_message
+    from app.bot.scheduler import (
+        terminate_instance_now,
+        run_nifty_breakout_trade,
+        run_breakout_triggers,
+        run_pattern_scans,
+        restore_session,
+        resume_open_trades,
+    )
+    from app.bot.job_scheduler import JobScheduler, daily_at
+    from app.config import settings
+    from app.config.aws_ssm import load_params
+    from app.config.aws_s3 import s3
+    from app.config.dhan_auth import dhan
+    from app.broker.fund_manager import init_fund_cache
+    from app.broker.leverage_manager import init_leverage_cache
+    from app.broker.instrument_registry import init_registry
+    from app.utils.metrics import start_metrics_server
+    from app.utils.loop_monitor import get_loop_monitor
+    from app.utils.log_shipper import make_log_shipper
 
 
 # ───────────────────────────────
 # Logging (FORCED – DO NOT USE basicConfig)
+# Queue-based: handlers run on a background listener thread
+# Closed gzip chunks are shipped to S3 (replaces the 5-min full-file upload)
 # ───────────────────────────────
 LOG_DIR = "logs"
-LOG_FILE = os.path.join(LOG_DIR, "bot.log")
-
-os.makedirs(LOG_DIR, exist_ok=True)
-
-root_logger = logging.getLogger()
-root_logger.setLevel(logging.INFO)
-
-# 🔥 CRITICAL: remove PTB / preloaded handlers
-if root_logger.handlers:
-    root_logger.handlers.clear()
 
-file_handler = logging.FileHandler(LOG_FILE, mode="a")
-file_handler.setFormatter(
-    logging.Formatter(
-        "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
-    )
-)
-
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(
-    logging.Formatter(
-        "%(asctime)s | %(levelname)s | %(message)s"
-    )
-)
-
-root_logger.addHandler(file_handler)
-root_logger.addHandler(console_handler)
+log_shipper = make_log_shipper()
+setup_logging(LOG_DIR, "bot.log", extra_handlers=[h for h in (log_shipper,) if h])
 
 logger = logging.getLogger(__name__)
 
@@ -68,35 +66,69 @@ for lib in [
     logging.getLogger(lib).setLevel(logging.WARNING)
 
 
-# ───────────────────────────────
-# Load secrets
-# ───────────────────────────────
-BOT_TOKEN = get_param("/trading-bot/telegram/BOT_TOKEN")
-
-
 # ───────────────────────────────
 # Background jobs (PTB SAFE)
 # ───────────────────────────────
 async def post_init(app):
     logger.info("🚀 Starting background jobs")
 
-    app.create_task(run_nifty_breakout_trade())
-    app.create_task(terminate_at(target_hour=15, target_minute=10))
-    
+    start_metrics_server(settings.METRICS_PORT, settings.METRICS_HOST)
+    app.create_task(get_loop_monitor().run())
+
+    # Rebuild today's positions (journal + broker snapshot) before polling
+    open_positions = await restore_session()
+    if open_positions:
+        app.create_task(resume_open_trades(open_positions))
+
+    if settings.ENTRY_TRIGGERS:
+        app.create_task(run_breakout_triggers())
+    else:
+        app.create_task(run_nifty_breakout_trade())
+
+    if settings.PATTERN_SCANS:
+        app.create_task(run_pattern_scans())
+
+    # Timed jobs (IST); more can be added at runtime via app.bot_data["jobs"]
+    jobs = JobScheduler(tz=settings.IST)
+    jobs.add_job("terminate_ec2", terminate_instance_now, daily_at(time(15, 10)), max_runs=1)
+    jobs.start()
+    app.bot_data["jobs"] = jobs
+
+    app.create_task(log_startup_report(app.bot_data.get("warmup", [])))
+
+
+async def log_startup_report(futures):
+    await asyncio.to_thread(lambda: [f.result() for f in futures])
+    logger.info(startup_report())
 
 
 # ───────────────────────────────
 # Main
 # ───────────────────────────────
 def main():
+    # SSM, Dhan, S3, pandas and the caches load in parallel while PTB builds
+    tasks = {
+        "ssm params": load_params,
+        "dhan client": dhan._resolve,
+        "s3 client": s3._resolve,
+        "pandas": lambda: __import__("pandas"),
+        "leverage cache": init_leverage_cache,
+        "fund cache": init_fund_cache,
+    }
+    if settings.PATTERN_SCANS:
+        tasks["instrument registry"] = init_registry    # scan universe
+    futures = warm_up(tasks)
+
     logger.info("🤖 Building Telegram application")
 
-    app = (
-        ApplicationBuilder()
-        .token(BOT_TOKEN)
-        .post_init(post_init)
-        .build()
-    )
+    with timed("build telegram app"):
+        app = (
+            ApplicationBuilder()
+            .token(settings.BOT_TOKEN)
+            .post_init(post_init)
+            .build()
+        )
+    app.bot_data["warmup"] = futures
 
     app.add_handler(
         MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message)
@@ -0,0 +1,234 @@
+# app/strategy/candle_aggregator.py
+import logging
+
+import numpy as np
+
+from app.broker.instrument_registry import to_security_id
+
+logger = logging.getLogger(__name__)
+
+
+class TimeframeBuffer:
+    """
+    Ring buffer of OHLCV bars for every symbol at one timeframe.
+
+    Arrays are (n_symbols, capacity); a column is one time bucket shared by
+    all symbols, so bars stay aligned across the universe. Symbols with no
+    tick in a bucket keep NaN in that column.
+    """
+
+    def __init__(self, minutes, n_symbols, capacity):
+        self.minutes = minutes
+        self.seconds = minutes * 60
+        self.capacity = capacity
+
+        shape = (n_symbols, capacity)
+        self.open = np.full(shape, np.nan)
+        self.high = np.full(shape, np.nan)
+        self.low = np.full(shape, np.nan)
+        self.close = np.full(shape, np.nan)
+        self.volume = np.zeros(shape)
+        self.start = np.full(capacity, -1, dtype=np.int64)   # bucket start (epoch s) per slot
+
+        self.bucket = None        # bucket number currently being built
+        self.closed = 0           # number of bars closed so far
+
+    def slot(self, bucket):
+        return bucket % self.capacity
+
+    def reset_slot(self, bucket):
+        s = self.slot(bucket)
+        self.open[:, s] = np.nan
+        self.high[:, s] = np.nan
+        self.low[:, s] = np.nan
+        self.close[:, s] = np.nan
+        self.volume[:, s] = 0.0
+        self.start[s] = bucket * self.seconds
+
+    def last(self, n):
+        """
+        Last `n` closed bars, oldest first.
+
+        Returns:
+            dict: {"start", "open", "high", "low", "close", "volume"}
+                  arrays of shape (n,) / (n_symbols, n)
+        """
+        n = min(n, self.closed, self.capacity - 1)
+        if self.bucket is None or n <= 0:
+            empty = np.empty((self.open.shape[0], 0))
+            return {"start": np.empty(0, dtype=np.int64), "open": empty, "high": empty,
+                    "low": empty, "close": empty, "volume": empty}
+
+        slots = [self.slot(b) for b in range(self.bucket - n, self.bucket)]
+        return {
+            "start": self.start[slots],
+            "open": self.open[:, slots],
+            "high": self.high[:, slots],
+            "low": self.low[:, slots],
+            "close": self.close[:, slots],
+            "volume": self.volume[:, slots],
+        }
+
+
+class CandleAggregator:
+    """
+    Builds 1/5/15-minute (or any) OHLCV bars for many symbols from live
+    ticks or polled quotes.
+
+    - O(1) per-tick update into preallocated ring buffers.
+    - Buckets are aligned to epoch multiples of the timeframe, which in IST
+      lines up with the 09:15 session open for 1/5/15-minute bars.
+    - Bar-close callbacks fire when the first tick of a later bucket arrives
+      or when flush() is called by a timer.
+
+        agg = CandleAggregator(ids, timeframes=(5, 15))
+        agg.on_bar_close(lambda minutes, start, buf: ...)
+        agg.ingest_quotes(get_quotes_with_retry(ids, "NSE_EQ"), clock.time_now())
+    """
+
+    def __init__(self, security_ids, timeframes=(1, 5, 15), capacity=400):
+        ids = np.unique(np.fromiter((to_security_id(s) for s in security_ids), dtype=np.int64))
+        self.ids = ids
+        self._row = {sid: i for i, sid in enumerate(ids.tolist())}
+
+        self.buffers = {m: TimeframeBuffer(m, len(ids), capacity) for m in timeframes}
+        self._last_cum_volume = np.full(len(ids), np.nan)
+        self._callbacks = []
+
+    # ----------------------------------------------------------
+    # Events
+    # ----------------------------------------------------------
+    def on_bar_close(self, callback):
+        """callback(minutes, bar_start_epoch, TimeframeBuffer)"""
+        self._callbacks.append(callback)
+
+    def _emit(self, buf, bucket):
+        start = bucket * buf.seconds
+        for cb in self._callbacks:
+            try:
+                cb(buf.minutes, start, buf)
+            except Exception:
+                logger.exception(f"❌ Bar-close callback failed ({buf.minutes}m @ {start})")
+
+    def _roll(self, buf, bucket):
+        """Advance `buf` to `bucket`, closing (and emitting) finished bars."""
+        if buf.bucket is None:
+            buf.bucket = bucket
+            buf.reset_slot(bucket)
+            return
+        if bucket <= buf.bucket:
+            return
+
+        # Close the bar being built, then any empty buckets in a gap
+        building = buf.bucket
+        for b in range(building, min(bucket, building + buf.capacity)):
+            if b > building:
+                buf.reset_slot(b)
+            buf.closed += 1
+            buf.bucket = b + 1
+            self._emit(buf, b)
+
+        buf.bucket = bucket
+        buf.reset_slot(bucket)
+
+    def _is_late(self, ts):
+        """Tick older than the bar being built (its bar has already closed)."""
+        return any(buf.bucket is not None and int(ts) // buf.seconds < buf.bucket
+                   for buf in self.buffers.values())
+
+    def flush(self, ts):
+        """Close every bar whose bucket has ended by `ts` (call from a timer)."""
+        for buf in self.buffers.values():
+            self._roll(buf, int(ts) // buf.seconds)
+
+    # ----------------------------------------------------------
+    # Updates
+    # ----------------------------------------------------------
+    def _volume_delta(self, rows, cum_volume):
+        """
+        Dhan quotes carry cumulative day volume; convert to per-tick deltas.
+        A quote without volume (NaN) adds nothing and keeps the previous
+        cumulative value, so the next real volume only adds what traded since.
+        """
+        if cum_volume is None:
+            return np.zeros(len(rows))
+        rows = np.asarray(rows)
+        cum_volume = np.asarray(cum_volume, dtype=np.float64)
+        prev = self._last_cum_volume[rows]
+        have = ~np.isnan(cum_volume)
+        delta = np.where(have & ~np.isnan(prev), np.maximum(cum_volume - prev, 0.0), 0.0)
+        self._last_cum_volume[rows[have]] = cum_volume[have]
+        return delta
+
+    def update(self, sec_id, price, ts, cum_volume=None):
+        """Single tick, O(1)."""
+        row = self._row.get(to_security_id(sec_id))
+        if row is None:
+            return
+        if self._is_late(ts):
+            # Dropped before the volume delta, so its volume lands in the next bar
+            return
+
+        dv = self._volume_delta([row], None if cum_volume is None else [cum_volume])[0]
+        for buf in self.buffers.values():
+            bucket = int(ts) // buf.seconds
+            self._roll(buf, bucket)
+            s = buf.slot(bucket)
+            if np.isnan(buf.open[row, s]):
+                buf.open[row, s] = buf.high[row, s] = buf.low[row, s] = price
+            else:
+                if price > buf.high[row, s]:
+                    buf.high[row, s] = price
+                if price < buf.low[row, s]:
+                    buf.low[row, s] = price
+            buf.close[row, s] = price
+            buf.volume[row, s] += dv
+
+    def update_batch(self, sec_ids, prices, ts, cum_volumes=None):
+        """
+        One snapshot of many symbols at time `ts`, vectorised.
+        IDs not in the universe are ignored; each ID should appear once.
+        A snapshot older than the bar being built is dropped (see update).
+        """
+        if not len(self.ids) or self._is_late(ts):
+            return
+        sec_ids = np.asarray(sec_ids, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+
+        pos = np.minimum(np.searchsorted(self.ids, sec_ids), len(self.ids) - 1)
+        known = (self.ids[pos] == sec_ids) & ~np.isnan(prices)
+        rows, prices = pos[known], prices[known]
+        if cum_volumes is not None:
+            cum_volumes = np.asarray(cum_volumes, dtype=np.float64)[known]
+        dv = self._volume_delta(rows, cum_volumes)
+
+        for buf in self.buffers.values():
+            bucket = int(ts) // buf.seconds
+            self._roll(buf, bucket)
+            s = buf.slot(bucket)
+
+            first = np.isnan(buf.open[rows, s])
+            buf.open[rows[first], s] = prices[first]
+            buf.high[rows, s] = np.fmax(buf.high[rows, s], prices)
+            buf.low[rows, s] = np.fmin(buf.low[rows, s], prices)
+            buf.close[rows, s] = prices
+            buf.volume[rows, s] += dv
+
+    def ingest_quotes(self, quotes, ts):
+        """
+        Feed a {security_id: quote} dict as returned by get_quotes_with_retry.
+        """
+        if not quotes:
+            return
+        ids, prices, vols = [], [], []
+        for sid, q in quotes.items():
+            ltp = q.get("last_price")
+            if ltp is None:
+                continue
+            ids.append(to_security_id(sid))
+            prices.append(ltp)
+            vols.append(q.get("volume"))      # None -> NaN: keeps the previous cumulative volume
+        self.update_batch(ids, prices, ts, vols)
+
+    def row(self, sec_id):
+        return self._row.get(to_security_id(sec_id))
@@ -1,9 +1,9 @@
 #app/strategy/nifty_filter.py
-def is_nifty_trade_allowed(signal, nifty_ltp, nifty_prev_close):
+def is_nifty_trade_allowed(signal, nifty_ltp, nifty_prev_close, buy_buffer=50, sell_buffer=30):
     """
-    BUY: Nifty today >= prev_close - 50
-    SELL: Nifty today <= prev_close + 30
+    BUY: Nifty today >= prev_close - buy_buffer (50)
+    SELL: Nifty today <= prev_close + sell_buffer (30)
     """
     if signal.upper() == "BUY":
-        return nifty_ltp >= nifty_prev_close - 50
-    return nifty_ltp <= nifty_prev_close + 30
+        return nifty_ltp >= nifty_prev_close - buy_buffer
+    return nifty_ltp <= nifty_prev_close + sell_buffer
@@ -0,0 +1,227 @@
+# app/strategy/pattern_scanner.py
+import logging
+from datetime import datetime
+
+import numpy as np
+
+from app.config.settings import IST
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================================================
+# BOUNDED ALERTED-SET
+# ==========================================================
+class BoundedAlertSet:
+    """
+    Insertion-ordered set that forgets its oldest keys beyond `maxsize`.
+    Used to avoid re-alerting the same (pattern, symbol, bar) twice.
+
+    No lock: bar-close callbacks run one poll at a time, and the only
+    mutations are single dict operations (setdefault / pop), which are
+    atomic on their own, so a stray concurrent caller can at worst see
+    a key evicted a little early.
+    """
+
+    def __init__(self, maxsize=5000):
+        self.maxsize = maxsize
+        self._keys = {}
+
+    def add(self, key):
+        """Returns True if `key` was new."""
+        return bool(self.add_many([key]))
+
+    def add_many(self, keys):
+        """Add keys, returning only those not seen before (in order)."""
+        fresh = []
+        for key in keys:
+            mark = object()
+            if self._keys.setdefault(key, mark) is mark:
+                fresh.append(key)
+        while len(self._keys) > self.maxsize:
+            try:
+                self._keys.pop(next(iter(self._keys)), None)
+            except (StopIteration, RuntimeError):
+                break
+        return fresh
+
+    def clear(self):
+        self._keys.clear()
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+
+# ==========================================================
+# PATTERNS (one NumPy pass over all symbols)
+# ==========================================================
+def pattern(*fields):
+    """Declare which bar arrays (by name, in order) a detector takes."""
+    def wrap(detect):
+        detect.fields = fields
+        return detect
+    return wrap
+
+
+@pattern("high", "low")
+def inside_bar(high, low):
+    """
+    Latest bar's range lies within the previous (mother) bar.
+
+    Args:
+        high, low: (n_symbols, k>=2) arrays, oldest bar first
+
+    Returns:
+        np.ndarray: int8 per symbol, 1 = inside bar, 0 = none
+    """
+    inside = (high[:, -1] <= high[:, -2]) & (low[:, -1] >= low[:, -2]) \
+        & ((high[:, -1] < high[:, -2]) | (low[:, -1] > low[:, -2]))
+    return inside.astype(np.int8)
+
+
+@pattern("open", "close")
+def opposite_candle(open_, close):
+    """
+    Latest bar closes against the previous bar's direction.
+
+    Args:
+        open_, close: (n_symbols, k>=2) arrays, oldest bar first
+
+    Returns:
+        np.ndarray: int8 per symbol, 1 = bullish after bearish,
+                    -1 = bearish after bullish, 0 = none
+    """
+    prev = np.sign(close[:, -2] - open_[:, -2])
+    last = np.sign(close[:, -1] - open_[:, -1])
+    signal = np.where((prev != 0) & (last == -prev), last, 0)
+    return np.nan_to_num(signal).astype(np.int8)
+
+
+# ==========================================================
+# SCANNER
+# ==========================================================
+class PatternScanner:
+    """
+    Runs one pattern over the whole universe on every bar close of
+    `timeframe` minutes and reports new hits once.
+
+        scanner = PatternScanner("insidebar", inside_bar, 5, on_signal=alert,
+                                 start_time=INSIDEBAR_SCAN_TIME)
+        scanner.attach(aggregator)
+
+    Args:
+        name (str): pattern name, part of the dedupe key
+        detect (callable): int8 per symbol from the bar arrays named in
+            its `fields` (see @pattern; default open, high, low, close)
+        timeframe (int): bar size in minutes
+        on_signal (callable): on_signal(list_of_signal_dicts)
+        alerted (BoundedAlertSet): shared dedupe set (one is created if None)
+        start_time (datetime.time): ignore bars that close before this IST time
+        names (dict): optional {security_id: stock name} for messages
+    """
+
+    def __init__(self, name, detect, timeframe, on_signal, alerted=None, start_time=None, names=None):
+        self.name = name
+        self.detect = detect
+        self.fields = getattr(detect, "fields", ("open", "high", "low", "close"))
+        self.timeframe = timeframe
+        self.on_signal = on_signal
+        self.alerted = alerted if alerted is not None else BoundedAlertSet()
+        self.start_time = start_time
+        self.names = names or {}
+        self.enabled = True
+        self._ids = None
+
+    def attach(self, aggregator):
+        self._ids = aggregator.ids
+        aggregator.on_bar_close(self._on_bar_close)
+        return self
+
+    def _on_bar_close(self, minutes, bar_start, buf):
+        if not self.enabled or minutes != self.timeframe:
+            return
+
+        bar_close = datetime.fromtimestamp(bar_start + buf.seconds, IST)
+        if self.start_time and bar_close.time() < self.start_time:
+            return
+
+        bars = buf.last(2)
+        if bars["close"].shape[1] < 2:
+            return
+
+        signals = self.scan(bars, bar_start)
+        if signals:
+            self.on_signal(signals)
+
+    def scan(self, bars, bar_start):
+        """Evaluate the pattern on aligned bar arrays; returns new signals only."""
+        hits = self.detect(*(bars[f] for f in self.fields))
+        rows = np.flatnonzero(hits)
+        if rows.size == 0:
+            return []
+
+        day = datetime.fromtimestamp(bar_start, IST).date().isoformat()
+        keys = [(self.name, day, int(self._ids[r]), int(bar_start)) for r in rows]
+        fresh = {k[2] for k in self.alerted.add_many(keys)}
+
+        signals = []
+        for r in rows:
+            sec_id = int(self._ids[r])
+            if sec_id not in fresh:
+                continue
+            direction = int(hits[r])
+            signals.append({
+                "Pattern": self.name,
+                "Security ID": sec_id,
+                "Stock Name": self.names.get(sec_id, str(sec_id)),
+                "Direction": direction,
+                "Bar Start": datetime.fromtimestamp(bar_start, IST),
+                "Open": float(bars["open"][r, -1]),
+                "High": float(bars["high"][r, -1]),
+                "Low": float(bars["low"][r, -1]),
+                "Close": float(bars["close"][r, -1]),
+                "Prev High": float(bars["high"][r, -2]),
+                "Prev Low": float(bars["low"][r, -2]),
+            })
+
+        logger.info(f"🔍 {self.name}: {len(rows)} hit(s), {len(signals)} new")
+        return signals
+
+
+# ==========================================================
+# ALERT TEXT
+# ==========================================================
+def format_alerts(signals, limit=3500):
+    """
+    One alert text for a whole scan (split only when it would exceed
+    Telegram's message size), instead of one message per symbol.
+
+    Args:
+        signals (list): signal dicts from PatternScanner.scan
+        limit (int): max characters per message
+
+    Returns:
+        list[str]: messages to send, in order
+    """
+    if not signals:
+        return []
+
+    first = signals[0]
+    header = f"🔍 {first['Pattern']} @ {first['Bar Start']:%H:%M} | {len(signals)} stock(s)"
+    messages, lines, size = [], [header], len(header)
+    for s in signals:
+        side = {1: "🟢", -1: "🔴"}.get(s["Direction"], "📦")
+        line = (
+            f"{side} {s['Stock Name']} O: {s['Open']} H: {s['High']} L: {s['Low']} C: {s['Close']}"
+            f" | Prev H: {s['Prev High']} Prev L: {s['Prev Low']}"
+        )
+        if size + len(line) + 1 > limit and len(lines) > 1:
+            messages.append("\n".join(lines))
+            lines, size = [f"{header} (cont.)"], len(header) + 8
+        lines.append(line)
+        size += len(line) + 1
+    messages.append("\n".join(lines))
+    return messages
@@ -1,9 +1,12 @@
 
 #app/strategy/stock_selector.py
 import logging
-import pandas as pd
+from typing import TYPE_CHECKING
 
-def select_best_stock(df: pd.DataFrame):
+if TYPE_CHECKING:       # annotations only; pandas is not imported at startup
+    import pandas as pd
+
+def select_best_stock(df: "pd.DataFrame"):
     """
     Select stock with lowest %SL.
     Ignore if only 1 stock in CSV.
@@ -23,7 +26,7 @@ def select_best_stock(df: pd.DataFrame):
 
 
 
-def rank_stocks(df: pd.DataFrame):
+def rank_stocks(df: "pd.DataFrame"):
     """
     Rank stocks by lowest SL% (risk), return list of dicts.
     Ignores if CSV is empty.
@@ -10,6 +10,7 @@ import boto3
 from io import StringIO
 from app.config.settings import S3_BUCKET, AWS_REGION, IST, MAP_FILE_KEY
 from app.config.aws_ssm import get_param
+from app.broker.instrument_registry import to_security_id
 
 # === Logging Setup ===
 log_file = "logs/goodresult_alerts.log"
@@ -50,7 +51,7 @@ def fetch_live_data(instrument_ids):
             response = dhan.quote_data(securities={"NSE_EQ": batch})
             if isinstance(response, dict) and "data" in response and "data" in response["data"]:
                 batch_data = response["data"]["data"].get("NSE_EQ", {})
-                live_data.update({int(k): v for k, v in batch_data.items()})
+                live_data.update({to_security_id(k): v for k, v in batch_data.items()})
                 logging.info(f"✅ Received {len(batch_data)} quotes in batch")
             else:
                 logging.warning("⚠️ Unexpected response structure from Dhan API")
@@ -127,7 +128,7 @@ def strong_quarterly_alert():
         return [], []
 
     df_map = df_map[["Stock Name", "Instrument ID", "Market Cap", "Setup_Case"]].dropna()
-    df_map["Instrument ID"] = df_map["Instrument ID"].astype(int)
+    df_map["Instrument ID"] = df_map["Instrument ID"].map(to_security_id)
     df_map = df_map[df_map["Setup_Case"].isin(["Case A", "Case B", "Case C"])]
     if df_map.empty:
         logging.info("ℹ️ No instruments with Setup_Case found.")
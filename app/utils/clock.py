@@ -0,0 +1,270 @@
+# app/utils/clock.py
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+import concurrent.futures
+from datetime import datetime
+
+from app.config.settings import IST
+
+
+class SystemClock:
+    """Wall-clock time. Default clock for live trading."""
+
+    def now(self, tz=IST) -> datetime:
+        return datetime.now(tz)
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+    async def asleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+
+class _SimExecutor(concurrent.futures.ThreadPoolExecutor):
+    """
+    Default executor of a simulated loop. Counts running work items so the
+    VirtualClock never advances while executor work is outstanding, and
+    delivers results on the loop thread so the awaiting coroutine is ready
+    before the clock looks for the next timer.
+    """
+
+    def __init__(self, clock, loop):
+        super().__init__(thread_name_prefix="sim-executor")
+        self._clock = clock
+        self._loop = loop
+
+    def submit(self, fn, *args, **kwargs):
+        outer = concurrent.futures.Future()
+        self._clock._work_started()
+
+        def run():
+            self._clock._local.tracked = True
+            try:
+                result, error = fn(*args, **kwargs), None
+            except BaseException as e:
+                result, error = None, e
+            self._loop.call_soon_threadsafe(deliver, result, error)
+
+        def deliver(result, error):
+            if error is not None:
+                outer.set_exception(error)
+            else:
+                outer.set_result(result)
+            self._clock._work_finished()
+
+        super().submit(run)
+        return outer
+
+
+class VirtualClock:
+    """
+    Simulated time for running a whole session in seconds.
+
+    A discrete-event timer shared by coroutines (asleep) and executor
+    threads (sleep): sleepers are woken one at a time in wake-time order
+    and the clock jumps to each wake time. Time only moves when the event
+    loop has nothing ready and no executor work is running, so coroutines
+    and threads interleave exactly as they would in real time.
+
+    install(loop) (done by run_simulated) makes run_in_executor(None, ...)
+    work tracked. sleep() from untracked threads - or before any loop is
+    installed - just moves the clock forward.
+    """
+
+    def __init__(self, start: datetime = None):
+        start = start or datetime.now(IST)
+        if start.tzinfo is None:
+            start = IST.localize(start)
+        self._start = start.timestamp()
+        self._now = self._start
+        self._lock = threading.Lock()
+        self._timers = []                 # heap of (wake_ts, seq, waker)
+        self._seq = itertools.count()
+        self._loop = None
+        self._busy = 0                    # executor work items running (not sleeping)
+        self._fire_pending = False        # at most one _fire queued on the loop
+        self._local = threading.local()
+
+    def now(self, tz=IST) -> datetime:
+        return datetime.fromtimestamp(self._now, tz)
+
+    def time(self) -> float:
+        return self._now
+
+    def monotonic(self) -> float:
+        return self._now - self._start
+
+    def advance(self, seconds: float):
+        with self._lock:
+            self._now += max(0.0, seconds)
+
+    def install(self, loop):
+        """Drive timers from `loop` and track its default executor."""
+        self._loop = loop
+        loop.set_default_executor(_SimExecutor(self, loop))
+
+    # ------------------------------------------------------
+    # Sleepers
+    # ------------------------------------------------------
+    def sleep(self, seconds: float):
+        if self._loop is None or not getattr(self._local, "tracked", False):
+            self.advance(seconds)
+            return
+        wake = threading.Event()
+        with self._lock:
+            heapq.heappush(self._timers, (self._now + max(0.0, seconds), next(self._seq), wake))
+            self._busy -= 1               # waiting on the clock, not working
+        self._kick()
+        wake.wait()                       # _fire counted us busy again
+
+    async def asleep(self, seconds: float):
+        loop = asyncio.get_running_loop()
+        if self._loop is None:
+            self._loop = loop
+        fut = loop.create_future()
+        with self._lock:
+            heapq.heappush(self._timers, (self._now + max(0.0, seconds), next(self._seq), fut))
+        self._kick()
+        await fut
+
+    # ------------------------------------------------------
+    # Scheduling (loop thread)
+    # ------------------------------------------------------
+    def _work_started(self):
+        with self._lock:
+            self._busy += 1
+
+    def _work_finished(self):
+        with self._lock:
+            self._busy -= 1
+        self._kick()
+
+    def _kick(self):
+        with self._lock:
+            if self._fire_pending:
+                return
+            self._fire_pending = True
+        self._loop.call_soon_threadsafe(self._fire)
+
+    def _fire(self):
+        # Anything else ready (a woken task, a delivered result) runs first
+        if getattr(self._loop, "_ready", None):
+            self._loop.call_soon(self._fire)
+            return
+
+        with self._lock:
+            waker = None
+            if self._busy == 0:           # else re-kicked when that work sleeps or finishes
+                while self._timers:
+                    wake, _, waker = heapq.heappop(self._timers)
+                    if isinstance(waker, threading.Event) or not waker.done():
+                        break             # (cancelled asleep() futures are skipped)
+                    waker = None
+            if waker is None:
+                self._fire_pending = False
+                return
+            self._now = max(self._now, wake)
+            if isinstance(waker, threading.Event):
+                self._busy += 1           # the thread is working again
+                self._fire_pending = False
+
+        if isinstance(waker, threading.Event):
+            waker.set()
+        else:
+            waker.set_result(None)
+            self._loop.call_soon(self._fire)    # after the woken task has run
+
+
+class ScaledClock:
+    """
+    Wall-clock time running `speed` times faster from `start`
+    (e.g. replaying a recorded session at 60x).
+    """
+
+    def __init__(self, start: datetime, speed: float):
+        if start.tzinfo is None:
+            start = IST.localize(start)
+        self.speed = speed
+        self._start = start.timestamp()
+        self._real0 = time.monotonic()
+
+    def monotonic(self) -> float:
+        return (time.monotonic() - self._real0) * self.speed
+
+    def time(self) -> float:
+        return self._start + self.monotonic()
+
+    def now(self, tz=IST) -> datetime:
+        return datetime.fromtimestamp(self.time(), tz)
+
+    def sleep(self, seconds: float):
+        time.sleep(max(0.0, seconds) / self.speed)
+
+    async def asleep(self, seconds: float):
+        await asyncio.sleep(max(0.0, seconds) / self.speed)
+
+
+# ==========================================================
+# PROCESS-WIDE CLOCK
+# ==========================================================
+_CLOCK = SystemClock()
+
+
+def get_clock():
+    return _CLOCK
+
+
+def set_clock(clock):
+    """Swap the process clock (e.g. VirtualClock for simulation). Returns the old one."""
+    global _CLOCK
+    old, _CLOCK = _CLOCK, clock
+    return old
+
+
+def now(tz=IST) -> datetime:
+    return _CLOCK.now(tz)
+
+
+def time_now() -> float:
+    return _CLOCK.time()
+
+
+def monotonic() -> float:
+    return _CLOCK.monotonic()
+
+
+def sleep(seconds: float):
+    _CLOCK.sleep(seconds)
+
+
+async def asleep(seconds: float):
+    await _CLOCK.asleep(seconds)
+
+
+def run_simulated(coro, start: datetime = None):
+    """
+    Run `coro` to completion on a fresh VirtualClock starting at `start`.
+    The previous clock is restored afterwards.
+
+        run_simulated(run_session(), start=IST.localize(datetime(2025, 1, 6, 9, 15)))
+    """
+    sim = VirtualClock(start)
+    old = set_clock(sim)
+
+    async def main():
+        sim.install(asyncio.get_running_loop())
+        return await coro
+
+    try:
+        return asyncio.run(main())
+    finally:
+        set_clock(old)
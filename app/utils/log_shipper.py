@@ -0,0 +1,200 @@
+# app/utils/log_shipper.py
+#
+# In-process log shipping: records are written to a gzip "chunk" that is
+# closed every `max_age` seconds or `max_bytes` of log text, and each
+# closed chunk is uploaded once, under a date-partitioned key:
+#
+#   s3://<bucket>/<prefix>/dt=2025-01-31/<host>/20250131_091500_4242_0003.log.gz
+#
+# Uploads run on a background thread; chunks that fail to upload (or were
+# left behind by a crash) stay in the spool directory and are retried.
+# The S3 client is injectable; S3_ENDPOINT_URL points the default client
+# at a local stand-in (MinIO, moto server).
+import os
+import glob
+import gzip
+import socket
+import logging
+import threading
+from datetime import datetime
+
+from app.utils.logging_setup import FILE_FORMAT
+
+logger = logging.getLogger(__name__)
+
+_CLOSED_SUFFIX = ".log.gz"
+_OPEN_SUFFIX = ".log.gz.part"
+
+
+class S3ChunkHandler(logging.Handler):
+    """
+    Args:
+        spool_dir (str): local directory for open / not yet uploaded chunks
+        bucket (str): S3 bucket
+        prefix (str): key prefix, partitions are added below it
+        client: object with put_object(Bucket=, Key=, Body=, ...) (boto3 S3
+                client or a stand-in); created from app.config.aws_s3 if None
+        max_age (float): seconds before the open chunk is closed
+        max_bytes (int): uncompressed log bytes before the open chunk is closed
+        upload_interval (float): seconds between uploader passes
+        host (str): partition under the date (default: hostname)
+    """
+
+    def __init__(self, spool_dir, bucket, prefix, client=None, max_age=300,
+                 max_bytes=8 * 1024 * 1024, upload_interval=5.0, host=None, tz=None):
+        super().__init__()
+        self.spool_dir = spool_dir
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.upload_interval = upload_interval
+        self.host = host or socket.gethostname()
+        self.tz = tz
+        self._client = client
+
+        self._fh = None
+        self._path = None
+        self._opened_at = 0.0
+        self._written = 0
+        self._seq = 0
+
+        os.makedirs(spool_dir, exist_ok=True)
+        # Chunks a crashed process never closed are shipped as they are
+        for part in glob.glob(os.path.join(spool_dir, f"*{_OPEN_SUFFIX}")):
+            os.replace(part, part[: -len(".part")])
+
+        self._upload_lock = threading.Lock()    # uploader thread vs. close()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._uploader = threading.Thread(target=self._upload_loop, name="log-shipper", daemon=True)
+        self._uploader.start()
+
+    # ------------------------------------------------------
+    # Writing (QueueListener thread)
+    # ------------------------------------------------------
+    def _now(self):
+        return datetime.now(self.tz)
+
+    def _open_chunk(self):
+        now = self._now()
+        self._seq += 1
+        name = f"{now:%Y%m%d_%H%M%S}_{os.getpid()}_{self._seq:04d}"
+        self._path = os.path.join(self.spool_dir, name + _OPEN_SUFFIX)
+        self._fh = gzip.open(self._path, "wt", encoding="utf-8")
+        self._opened_at = now.timestamp()
+        self._written = 0
+
+    def _close_chunk(self):
+        """Caller holds self.lock."""
+        if self._fh is None:
+            return
+        self._fh.close()
+        os.replace(self._path, self._path[: -len(".part")])
+        self._fh = self._path = None
+        self._wake.set()
+
+    def emit(self, record):
+        try:
+            line = self.format(record) + "\n"
+            if self._fh is None:
+                self._open_chunk()
+            self._fh.write(line)
+            self._written += len(line)
+            if self._written >= self.max_bytes:
+                self._close_chunk()
+        except Exception:
+            self.handleError(record)
+
+    def rotate(self):
+        """Close the open chunk now (it is uploaded on the next pass)."""
+        with self.lock:
+            self._close_chunk()
+
+    # ------------------------------------------------------
+    # Uploading (own thread)
+    # ------------------------------------------------------
+    def _get_client(self):
+        if self._client is None:
+            from app.config.aws_s3 import s3
+            self._client = s3
+        return self._client
+
+    def key_for(self, filename):
+        """dt=YYYY-MM-DD/<host>/<file> under the prefix, dated by chunk open time."""
+        day = f"{filename[0:4]}-{filename[4:6]}-{filename[6:8]}"
+        return f"{self.prefix}/dt={day}/{self.host}/{filename}"
+
+    def upload_pending(self):
+        """
+        Upload every closed chunk in the spool dir, oldest first.
+
+        Returns:
+            int: chunks uploaded
+        """
+        with self._upload_lock:
+            return self._upload_pending()
+
+    def _upload_pending(self):
+        uploaded = 0
+        for path in sorted(glob.glob(os.path.join(self.spool_dir, f"*{_CLOSED_SUFFIX}"))):
+            filename = os.path.basename(path)
+            key = self.key_for(filename)
+            try:
+                with open(path, "rb") as fh:
+                    self._get_client().put_object(
+                        Bucket=self.bucket, Key=key, Body=fh.read(),
+                        ContentType="application/gzip",
+                    )
+            except Exception as e:
+                # Not logger.exception: the traceback would land in the next chunk every pass
+                logger.warning(f"⚠️ Log chunk upload failed ({filename}), will retry: {e}")
+                break
+            os.remove(path)
+            uploaded += 1
+        return uploaded
+
+    def _upload_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.upload_interval)
+            self._wake.clear()
+            if self._fh is not None and self._now().timestamp() - self._opened_at >= self.max_age:
+                self.rotate()
+            try:
+                self.upload_pending()
+            except Exception:
+                pass    # keep shipping; failures are reported per chunk
+
+    def close(self):
+        """Close the open chunk and make a last upload attempt."""
+        self._stop.set()
+        self._wake.set()
+        self.rotate()
+        try:
+            self.upload_pending()
+        except Exception:
+            pass
+        super().close()
+
+
+def make_log_shipper():
+    """
+    S3ChunkHandler configured from settings, or None when LOG_SHIP is off.
+    Pass to setup_logging(extra_handlers=...).
+    """
+    from app.config import settings
+    from app.config.aws_s3 import S3_BUCKET
+
+    if not settings.LOG_SHIP:
+        return None
+
+    handler = S3ChunkHandler(
+        spool_dir=os.path.join(settings.LOG_DIR, "ship"),
+        bucket=S3_BUCKET,
+        prefix=settings.LOG_SHIP_PREFIX,
+        max_age=settings.LOG_CHUNK_SECONDS,
+        max_bytes=settings.LOG_CHUNK_BYTES,
+        tz=settings.IST,
+    )
+    handler.setFormatter(logging.Formatter(FILE_FORMAT))
+    return handler
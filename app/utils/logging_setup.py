@@ -0,0 +1,122 @@
+# app/utils/logging_setup.py
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+FILE_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+CONSOLE_FORMAT = "%(asctime)s | %(levelname)s | %(message)s"
+
+_LISTENER = None
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that enqueues the raw record. Message formatting
+    (%-args, exc_info) happens on the listener thread, not the caller's.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def setup_logging(log_dir="logs", log_file="bot.log", level=logging.INFO, extra_handlers=(),
+                  max_bytes=50 * 1024 * 1024, backup_count=3):
+    """
+    Route the root logger through a non-blocking queue.
+    A background QueueListener owns the file / console handlers, so
+    disk and stdout writes never run on the order path.
+
+    The local file rotates at `max_bytes` (keeps `backup_count` old files);
+    shipping to S3 is an extra handler (see app.utils.log_shipper).
+
+    Returns the started QueueListener.
+    """
+    global _LISTENER
+
+    os.makedirs(log_dir, exist_ok=True)
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
+
+    # 🔥 CRITICAL: remove PTB / preloaded handlers
+    if root_logger.handlers:
+        root_logger.handlers.clear()
+
+    file_handler = RotatingFileHandler(
+        os.path.join(log_dir, log_file), mode="a", maxBytes=max_bytes, backupCount=backup_count
+    )
+    file_handler.setFormatter(logging.Formatter(FILE_FORMAT))
+
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+
+    stop_logging()
+
+    log_queue = queue.SimpleQueue()
+    _LISTENER = QueueListener(
+        log_queue, file_handler, console_handler, *extra_handlers,
+        respect_handler_level=True,
+    )
+    root_logger.addHandler(_DeferredQueueHandler(log_queue))
+    _LISTENER.start()
+    return _LISTENER
+
+
+def stop_logging():
+    """Drain the queue and stop the listener. Safe to call more than once."""
+    global _LISTENER
+
+    listener, _LISTENER = _LISTENER, None
+    if listener is not None and listener._thread is not None:
+        listener.stop()
+
+
+# Drain the queue on shutdown so the last lines reach disk
+atexit.register(stop_logging)
+
+
+# ==========================================================
+# RATE-LIMITED / SAMPLED LOGGING FOR HOT LOOPS
+# ==========================================================
+_THROTTLE = {}          # key -> [last_emit_monotonic, suppressed_count]
+_SAMPLES = {}           # key -> call count
+_STATE_LOCK = threading.Lock()
+
+
+def log_throttled(logger, level, key, interval, msg, *args):
+    """
+    Log at most once per `interval` seconds for `key`.
+    The next emitted line reports how many were suppressed in between.
+    """
+    if not logger.isEnabledFor(level):
+        return
+
+    now = time.monotonic()
+    with _STATE_LOCK:
+        state = _THROTTLE.get(key)
+        if state is not None and now - state[0] < interval:
+            state[1] += 1
+            return
+        suppressed = state[1] if state else 0
+        _THROTTLE[key] = [now, 0]
+
+    if suppressed:
+        msg = f"{msg} (+{suppressed} similar suppressed)"
+    logger.log(level, msg, *args)
+
+
+def log_sampled(logger, level, key, every, msg, *args):
+    """Log the 1st, (every+1)th, (2*every+1)th ... call for `key`."""
+    if not logger.isEnabledFor(level):
+        return
+
+    with _STATE_LOCK:
+        n = _SAMPLES.get(key, 0)
+        _SAMPLES[key] = n + 1
+
+    if n % every == 0:
+        logger.log(level, msg, *args)
@@ -0,0 +1,217 @@
+# app/utils/loop_monitor.py
+#
+# Event-loop lag monitor + blocking-call detector.
+#
+# A probe coroutine wakes every `interval` seconds and stamps a heartbeat.
+# A watchdog thread checks that heartbeat; while it is overdue by more
+# than `threshold` the loop is blocked, so the watchdog samples the loop
+# thread's stack (sys._current_frames) and charges the elapsed time to
+# the innermost app frame - the call site that did blocking work on the
+# event loop.
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+
+from app.utils.metrics import Counter, LOOP_LAG, LOOP_LAG_HIST
+
+logger = logging.getLogger(__name__)
+
+LOOP_BLOCKED = Counter(
+    "event_loop_blocked_seconds_total", "Time the event loop was blocked, by call site", ("callsite",)
+)
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_THIS_FILE = os.path.abspath(__file__)
+
+
+def _callsite(stack):
+    """
+    Innermost frame inside the app package (the code that blocked),
+    falling back to the innermost frame of the stack.
+
+    Returns:
+        (callsite, leaf): "app/bot/telegram_sender.py:23 send_telegram_message",
+                          innermost frame in the same format
+    """
+    def fmt(fs):
+        path = os.path.abspath(fs.filename)
+        if path.startswith(_APP_ROOT):
+            path = "app" + path[len(_APP_ROOT):]
+        return f"{path}:{fs.lineno} {fs.name}"
+
+    if not stack:
+        return "<unknown>", "<unknown>"
+    leaf = fmt(stack[-1])
+    for fs in reversed(stack):
+        path = os.path.abspath(fs.filename)
+        if path.startswith(_APP_ROOT) and path != _THIS_FILE:
+            return fmt(fs), leaf
+    return leaf, leaf
+
+
+class LoopMonitor:
+    """
+    Args:
+        interval (float): probe period (seconds)
+        threshold (float): lag above which the loop counts as blocked
+        budget (float): per-call-site blocked seconds per day before a
+                        regression warning is logged (once per call site)
+        report_interval (float): seconds between blocking reports in the log
+    """
+
+    def __init__(self, interval=0.1, threshold=0.25, budget=5.0, report_interval=900):
+        self.interval = interval
+        self.threshold = threshold
+        self.budget = budget
+        self.report_interval = report_interval
+
+        self._beat = time.monotonic()
+        self._loop_thread = None
+        self._watchdog = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+        # callsite -> {"seconds", "stalls", "max_stall", "leaf"}
+        self._sites = {}
+        self._over_budget = set()
+        self._stall_beat = None        # heartbeat value of the stall being sampled
+        self._stall_site = None
+        self._stall_start = 0.0
+        self.stalls = 0
+        self.max_lag = 0.0
+
+    # ------------------------------------------------------
+    # Probe (runs on the event loop)
+    # ------------------------------------------------------
+    async def run(self):
+        """Long-running probe task: app.create_task(monitor.run())."""
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        if self._watchdog is None:
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+            logger.info(f"🩺 Loop monitor started (threshold {self.threshold * 1000:.0f} ms)")
+
+        next_report = time.monotonic() + self.report_interval
+        try:
+            while True:
+                expected = time.monotonic() + self.interval
+                await asyncio.sleep(self.interval)
+                now = time.monotonic()
+                lag = max(0.0, now - expected)
+                self._beat = now
+
+                LOOP_LAG.set(lag)
+                LOOP_LAG_HIST.observe(lag)
+                if lag > self.max_lag:
+                    self.max_lag = lag
+
+                if now >= next_report:
+                    next_report = now + self.report_interval
+                    if self._sites:
+                        logger.info(self.report())
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._stop.set()
+
+    # ------------------------------------------------------
+    # Watchdog (own thread)
+    # ------------------------------------------------------
+    def _watch(self):
+        tick = max(self.interval / 2, 0.02)
+        last = time.monotonic()
+        while not self._stop.wait(tick):
+            now = time.monotonic()
+            elapsed, last = now - last, now
+            beat = self._beat
+            overdue = now - beat - self.interval
+            if overdue <= self.threshold:
+                if self._stall_beat is not None:
+                    self._end_stall(now)
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            del frame
+            site, leaf = _callsite(stack)
+
+            if self._stall_beat != beat:
+                if self._stall_beat is not None:
+                    self._end_stall(now)
+                # First sample of a new stall: time up to the threshold belongs to it too
+                self._stall_beat, self._stall_site, self._stall_start = beat, site, beat + self.interval
+                elapsed = overdue
+                self.stalls += 1
+                logger.warning(
+                    f"🐢 Event loop blocked > {self.threshold * 1000:.0f} ms at {site}\n"
+                    + "".join(traceback.format_list(stack[-12:]))
+                )
+
+            self._charge(site, leaf, elapsed)
+
+    def _charge(self, site, leaf, seconds):
+        with self._lock:
+            entry = self._sites.setdefault(site, {"seconds": 0.0, "stalls": 0, "max_stall": 0.0, "leaf": leaf})
+            entry["seconds"] += seconds
+            entry["leaf"] = leaf
+            total = entry["seconds"]
+        LOOP_BLOCKED.labels(site).inc(seconds)
+
+        if total > self.budget and site not in self._over_budget:
+            self._over_budget.add(site)
+            logger.warning(
+                f"🚨 {site} has blocked the event loop for {total:.1f}s today "
+                f"(budget {self.budget:.1f}s) - move it off the loop (asyncio.to_thread)"
+            )
+
+    def _end_stall(self, now):
+        duration = now - self._stall_start
+        with self._lock:
+            entry = self._sites.get(self._stall_site)
+            if entry is not None:
+                entry["stalls"] += 1
+                entry["max_stall"] = max(entry["max_stall"], duration)
+        logger.info(f"🩺 Event loop recovered after {duration * 1000:.0f} ms ({self._stall_site})")
+        self._stall_beat = self._stall_site = None
+
+    # ------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------
+    def blocking_report(self):
+        """
+        Returns:
+            list[dict]: per call site - callsite, seconds, stalls, max_stall, leaf;
+                        worst first
+        """
+        with self._lock:
+            rows = [{"callsite": site, **entry} for site, entry in self._sites.items()]
+        return sorted(rows, key=lambda r: r["seconds"], reverse=True)
+
+    def report(self, top=10):
+        rows = self.blocking_report()
+        lines = [f"🩺 Event-loop blocking report ({self.stalls} stalls, max lag {self.max_lag * 1000:.0f} ms)"]
+        for r in rows[:top]:
+            lines.append(
+                f"  {r['seconds']:7.2f}s | {r['stalls']:3d} stalls | max {r['max_stall'] * 1000:6.0f} ms | "
+                f"{r['callsite']}  (in {r['leaf']})"
+            )
+        return "\n".join(lines)
+
+
+_MONITOR = None
+
+
+def get_loop_monitor():
+    global _MONITOR
+    if _MONITOR is None:
+        from app.config.settings import LOOP_LAG_THRESHOLD, LOOP_BLOCK_BUDGET
+        _MONITOR = LoopMonitor(threshold=LOOP_LAG_THRESHOLD, budget=LOOP_BLOCK_BUDGET)
+    return _MONITOR
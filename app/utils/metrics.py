@@ -0,0 +1,253 @@
+# app/utils/metrics.py
+import abc
+import time
+import logging
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+_REGISTRY = {}
+_REGISTRY_LOCK = threading.Lock()
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names, values, extra=""):
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+# ==========================================================
+# METRIC TYPES
+# ==========================================================
+class _Metric(abc.ABC):
+    """
+    Base for Counter / Gauge / Histogram.
+
+    Hot paths should bind labels once at import time and keep the child:
+        _QUOTE_CALLS = DHAN_API_CALLS.labels("quote_data")
+        _QUOTE_CALLS.inc()        # one lock + add
+    """
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        with _REGISTRY_LOCK:
+            if name in _REGISTRY:
+                raise ValueError(f"Metric already registered: {name}")
+            _REGISTRY[name] = self
+        if not self.labelnames:
+            self.labels()       # unlabelled metrics are exported from the start
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """A fresh per-label-set child (value or histogram buckets)."""
+
+    def labels(self, *values):
+        values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _default(self):
+        return self.labels()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(child.samples(self.name, self.labelnames, values))
+        return lines
+
+
+class _ValueChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = float(value)
+
+    def samples(self, name, names, values):
+        return [f"{name}{_label_str(names, values)} {self.value:g}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+
+    def dec(self, amount=1.0):
+        self._default().dec(amount)
+
+    def set(self, value):
+        self._default().set(value)
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)    # last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def samples(self, name, names, values):
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        lines, cumulative = [], 0
+        for bound, count in zip((*self.buckets, float("inf")), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            labels = _label_str(names, values, f'le="{le}"')
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        lines.append(f"{name}_sum{_label_str(names, values)} {total:g}")
+        lines.append(f"{name}_count{_label_str(names, values)} {cumulative}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+def render_all():
+    """Prometheus text exposition format (0.0.4) of every registered metric."""
+    with _REGISTRY_LOCK:
+        metrics = list(_REGISTRY.values())
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ==========================================================
+# BOT METRICS
+# ==========================================================
+DHAN_API_CALLS = Counter("dhan_api_calls_total", "Dhan API calls", ("endpoint",))
+DHAN_API_ERRORS = Counter("dhan_api_errors_total", "Failed Dhan API calls", ("endpoint",))
+DHAN_API_RETRIES = Counter("dhan_api_retries_total", "Dhan API retries", ("endpoint",))
+RATE_LIMIT_WAIT = Counter("dhan_rate_limit_wait_seconds_total", "Seconds slept to respect Dhan rate limits")
+QUOTE_LATENCY = Histogram("dhan_quote_latency_seconds", "quote_data round-trip time", ("caller",))
+ORDER_RTT = Histogram("dhan_order_rtt_seconds", "Order API round-trip time", ("op",))
+ORDERS = Counter("orders_total", "Super Order placement outcomes", ("result",))
+OPEN_POSITIONS = Gauge("open_positions", "Positions currently being monitored")
+TRADE_RUNS = Counter("breakout_runs_total", "run_nifty_breakout_trade outcomes", ("result",))
+JOB_RUNS = Counter("scheduled_job_runs_total", "JobScheduler run outcomes", ("job", "result"))
+JOB_DURATION = Histogram(
+    "scheduled_job_duration_seconds", "JobScheduler run time", ("job",),
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+JOB_LATENESS = Gauge("scheduled_job_lateness_seconds", "Latest dispatch delay past the due time", ("job",))
+LOOP_LAG = Gauge("event_loop_lag_last_seconds", "Latest event-loop scheduling lag")
+LOOP_LAG_HIST = Histogram(
+    "event_loop_lag_seconds", "Event-loop scheduling lag",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+
+
+# ==========================================================
+# HTTP ENDPOINT
+# ==========================================================
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render_all().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass    # keep scrapes out of bot.log
+
+
+_SERVER = None
+
+
+def start_metrics_server(port=9108, host="127.0.0.1"):
+    """
+    Serve /metrics from a daemon thread. Safe to call more than once.
+
+    Returns:
+        the server, or None when the port can't be bound (the bot runs
+        without the endpoint; metrics are still collected)
+    """
+    global _SERVER
+    if _SERVER is None:
+        try:
+            _SERVER = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            logger.error(f"❌ Metrics endpoint not started on {host}:{port}: {e}")
+            return None
+        _SERVER.daemon_threads = True
+        threading.Thread(target=_SERVER.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info(f"📈 Metrics endpoint on http://{host}:{port}/metrics")
+    return _SERVER
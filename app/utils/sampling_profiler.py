@@ -0,0 +1,195 @@
+# app/utils/sampling_profiler.py
+#
+# In-process sampling profiler: a daemon thread reads every thread's stack
+# (sys._current_frames) at a fixed rate for N seconds. Nothing is hooked
+# into the profiled code, so overhead is one stack walk per thread per
+# sample (~1% at 100 Hz) and it can run on the live bot.
+#
+# Output is Brendan Gregg's collapsed-stack format ("a;b;c 42" per line),
+# ready for flamegraph.pl or speedscope.app.
+import os
+import sys
+import time
+import logging
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# One profile at a time per process
+_RUNNING = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """A profile is already being taken."""
+
+
+def _frame_label(code):
+    path = code.co_filename
+    if path.startswith(_APP_ROOT):
+        path = "app" + path[len(_APP_ROOT):]
+    else:
+        path = os.path.basename(path)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+def _idle_frames():
+    """
+    {source file: function names} whose innermost frame means "thread is
+    waiting, not working". Matched by file, so an app or SDK function that
+    happens to be called get / wait / poll is still counted.
+    """
+    import ssl
+    import queue
+    import socket
+    import selectors
+    import concurrent.futures.thread
+    from app.utils import clock
+
+    idle = {
+        threading: {"wait", "_wait_for_tstate_lock", "join"},
+        selectors: {"select"},
+        queue: {"get"},
+        socket: {"accept", "readinto"},
+        ssl: {"read", "recv", "recv_into"},
+        concurrent.futures.thread: {"_worker"},
+        clock: {"sleep"},                   # SystemClock.sleep -> time.sleep
+    }
+    return {os.path.abspath(mod.__file__): frozenset(names) for mod, names in idle.items()}
+
+
+class SamplingProfiler:
+    """
+    Args:
+        duration (float): seconds to sample
+        rate (int): samples per second
+        idle (bool): keep stacks of threads parked in sleep / select / lock
+                     waits (off: only threads doing work are counted)
+    """
+
+
+    def __init__(self, duration=30, rate=100, idle=False):
+        self.duration = duration
+        self.rate = rate
+        self.idle = idle
+        self.stacks = Counter()     # collapsed stack -> samples
+        self.samples = 0
+        self.elapsed = 0.0
+        self._idle = _idle_frames()
+
+    def _is_idle(self, code):
+        names = self._idle.get(code.co_filename)
+        return names is not None and code.co_name in names
+
+    def run(self):
+        """Sample (blocking) for `duration` seconds. Returns self."""
+        if not _RUNNING.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+        try:
+            self._sample()
+        finally:
+            _RUNNING.release()
+        return self
+
+    def _sample(self):
+        me = threading.get_ident()
+        names = {}
+        labels = {}                 # code object -> label (cached per profile)
+        interval = 1.0 / self.rate
+        start = time.perf_counter()
+        deadline = start + self.duration
+        next_tick = start
+
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                if not codes or (not self.idle and self._is_idle(codes[0])):
+                    continue
+                parts = [names.get(ident, str(ident))]
+                for code in reversed(codes):
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = _frame_label(code)
+                    parts.append(label)
+                self.stacks[";".join(parts)] += 1
+            self.samples += 1
+
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.perf_counter()     # fell behind, don't burst
+
+        self.elapsed = time.perf_counter() - start
+
+    # ------------------------------------------------------
+    # Output
+    # ------------------------------------------------------
+    def write_collapsed(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            for stack, count in self.stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+        return path
+
+    def top_functions(self, n=15):
+        """
+        Returns:
+            list[tuple]: (function, self_samples, total_samples), by self time
+        """
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]   # drop thread name
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for fn in set(frames):
+                total[fn] += count
+        return [(fn, c, total[fn]) for fn, c in own.most_common(n)]
+
+    def summary(self, n=15):
+        busy = sum(self.stacks.values())
+        lines = [
+            f"🔬 Profile: {self.elapsed:.1f}s, {self.samples} samples @ {self.rate} Hz, "
+            f"{busy} busy thread-samples"
+        ]
+        if not busy:
+            lines.append("  (all threads idle)")
+            return "\n".join(lines)
+        lines.append("  self%  total%  function")
+        for fn, own, total in self.top_functions(n):
+            lines.append(f"  {100 * own / busy:5.1f}  {100 * total / busy:6.1f}  {fn}")
+        return "\n".join(lines)
+
+
+def profile(duration=30, rate=100, out_dir=None):
+    """
+    Take a profile and write it to `out_dir`.
+
+    Returns:
+        (summary, path): top-functions text and the collapsed-stack file
+    """
+    if out_dir is None:
+        from app.config.settings import LOG_DIR
+        out_dir = LOG_DIR
+
+    logger.info(f"🔬 Sampling profiler started for {duration}s @ {rate} Hz")
+    prof = SamplingProfiler(duration=duration, rate=rate).run()
+    path = prof.write_collapsed(os.path.join(out_dir, time.strftime("profile_%Y%m%d_%H%M%S.folded")))
+    summary = prof.summary()
+    logger.info(f"{summary}\n📁 {path}")
+    return summary, path
@@ -0,0 +1,126 @@
+# app/utils/startup.py
+import sys
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_PROCESS_START = time.perf_counter()
+_TIMINGS = []                     # [(label, seconds, modules_imported, thread)]
+_TIMINGS_LOCK = threading.Lock()
+
+
+# ==========================================================
+# TIMING
+# ==========================================================
+@contextmanager
+def timed(label: str):
+    """
+    Record how long a startup step took and how many modules it imported.
+    """
+    modules_before = len(sys.modules)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _TIMINGS_LOCK:
+            _TIMINGS.append((
+                label,
+                elapsed,
+                max(0, len(sys.modules) - modules_before),
+                threading.current_thread().name,
+            ))
+
+
+def startup_report() -> str:
+    """
+    Text breakdown of recorded import / init steps, slowest first.
+    For a per-module view run with PYTHONPROFILEIMPORTTIME=1.
+    """
+    with _TIMINGS_LOCK:
+        rows = sorted(_TIMINGS, key=lambda r: r[1], reverse=True)
+
+    total = time.perf_counter() - _PROCESS_START
+    lines = [f"⏱️ Startup report ({total * 1000:.0f} ms since first import)"]
+    for label, elapsed, modules, thread in rows:
+        lines.append(
+            f"  {elapsed * 1000:8.1f} ms | {modules:4d} modules | {thread:<14} | {label}"
+        )
+    return "\n".join(lines)
+
+
+# ==========================================================
+# LAZY OBJECTS
+# ==========================================================
+class LazyObject:
+    """
+    Stand-in for a module-level client (dhanhq, boto3 ...) that is built on
+    first attribute access instead of at import time.
+
+        dhan = LazyObject(get_dhan_client, "dhan")
+        dhan.quote_data(...)   # client created here, once
+    """
+
+    def __init__(self, factory, name):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_obj", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _resolve(self):
+        obj = object.__getattribute__(self, "_obj")
+        if obj is not None:
+            return obj
+
+        with object.__getattribute__(self, "_lock"):
+            obj = object.__getattribute__(self, "_obj")
+            if obj is None:
+                name = object.__getattribute__(self, "_name")
+                with timed(f"init {name}"):
+                    obj = object.__getattribute__(self, "_factory")()
+                object.__setattr__(self, "_obj", obj)
+        return obj
+
+    def _reset(self, obj=None):
+        """Drop (or replace) the wrapped object; the next access rebuilds it."""
+        object.__setattr__(self, "_obj", obj)
+
+    def __getattr__(self, item):
+        return getattr(self._resolve(), item)
+
+    def __setattr__(self, key, value):
+        setattr(self._resolve(), key, value)
+
+    def __repr__(self):
+        obj = object.__getattribute__(self, "_obj")
+        name = object.__getattribute__(self, "_name")
+        return f"<LazyObject {name} {'ready' if obj is not None else 'pending'}>"
+
+
+# ==========================================================
+# PARALLEL WARM-UP
+# ==========================================================
+def warm_up(tasks: dict):
+    """
+    Run {label: callable} concurrently in background threads so network
+    clients and heavy imports are ready before the first job needs them.
+    Failures are logged, the caller pays the cost lazily later instead.
+
+    Returns the list of futures.
+    """
+    pool = ThreadPoolExecutor(max_workers=max(1, len(tasks)), thread_name_prefix="warmup")
+
+    def _run(label, func):
+        try:
+            with timed(f"warm-up {label}"):
+                func()
+        except Exception:
+            logger.exception(f"⚠️ Warm-up failed: {label}")
+
+    futures = [pool.submit(_run, label, func) for label, func in tasks.items()]
+    pool.shutdown(wait=False)
+    return futures
@@ -1,8 +1,13 @@
+def nse_symbol(name: str) -> str:
+    """RELIANCE -> NSE:RELIANCE-EQ"""
+    return f"NSE:{name.strip()}-EQ"
+
+
 def format_symbol_string(script_output: str) -> str:
     lines = script_output.strip().splitlines()
     symbols = []
     for line in lines[1:]:
         parts = line.split(",")
         if parts:
-            symbols.append(f"NSE:{parts[0].strip()}-EQ")
+            symbols.append(nse_symbol(parts[0]))
     return ",".join(symbols)
@@ -0,0 +1,16 @@
+# tests/conftest.py
+from datetime import datetime
+
+import pytest
+
+from app.config.settings import IST
+from app.utils import clock
+
+
+@pytest.fixture
+def vclock():
+    """Process clock swapped for a VirtualClock at 2025-01-31 09:15 IST."""
+    sim = clock.VirtualClock(IST.localize(datetime(2025, 1, 31, 9, 15)))
+    old = clock.set_clock(sim)
+    yield sim
+    clock.set_clock(old)
@@ -0,0 +1,92 @@
+# tests/test_api_recorder.py
+#
+# Dhan API recording (header constants, results and errors) and replay:
+# argument matching, time-ordered responses, misses and truncated files.
+import gzip
+from datetime import datetime
+
+import pytest
+
+from app.config.settings import IST
+from app.utils import clock
+from app.broker.api_recorder import RecordingDhan, ReplayDhan, ReplayMiss, load_recording
+
+
+class StubClient:
+    NSE = "NSE_EQ"
+    BUY = "BUY"
+
+    def __init__(self):
+        self.statuses = iter(["PENDING", "TRADED"])
+
+    def get_order_by_id(self, order_id):
+        return {"status": "success", "data": [{"orderId": order_id, "orderStatus": next(self.statuses)}]}
+
+    def get_fund_limits(self):
+        raise ConnectionError("broker down")
+
+
+@pytest.fixture
+def recording(tmp_path):
+    """A live session recorded from 09:15 (the vclock start): two polls 30s apart, one failure."""
+    path = str(tmp_path / "rec" / "dhan.jsonl.gz")
+    live = clock.VirtualClock(IST.localize(datetime(2025, 1, 31, 9, 15)))
+    old = clock.set_clock(live)
+    try:
+        rec = RecordingDhan(StubClient(), path)
+        assert rec.NSE == "NSE_EQ"                              # constants pass through
+        rec.get_order_by_id("A1")
+        live.advance(30)
+        rec.get_order_by_id("A1")
+        with pytest.raises(ConnectionError):
+            rec.get_fund_limits()
+        rec.close()
+        rec.close()
+    finally:
+        clock.set_clock(old)
+    return path
+
+
+def test_recording_layout(recording):
+    header, records = load_recording(recording)
+    assert header["constants"] == {"BUY": "BUY", "NSE": "NSE_EQ"}
+    assert [r["m"] for r in records] == ["get_order_by_id", "get_order_by_id", "get_fund_limits"]
+    assert records[1]["t"] - records[0]["t"] == 30
+    assert records[2]["e"] == "ConnectionError: broker down"
+
+
+def status(replay, order_id="A1"):
+    return replay.get_order_by_id(order_id)["data"][0]["orderStatus"]
+
+
+def test_replay_walks_forward_through_responses(recording, vclock):
+    replay = ReplayDhan(recording)
+    assert replay.NSE == "NSE_EQ"
+    assert status(replay) == "PENDING"
+    assert status(replay) == "TRADED"                           # polling moves on even without time passing
+    assert status(replay) == "TRADED"                           # then sticks to the last one
+
+
+def test_replay_jumps_to_the_current_time(recording, vclock):
+    replay = ReplayDhan(recording)
+    vclock.advance(45)
+    assert status(replay) == "TRADED"                           # first poll after the second record
+
+
+def test_replay_errors_and_misses(recording, vclock):
+    replay = ReplayDhan(recording)
+    assert status(replay, "OTHER")                              # unknown args: falls back to the method
+    with pytest.raises(RuntimeError, match=r"\[replayed\] ConnectionError"):
+        replay.get_fund_limits()
+    with pytest.raises(ReplayMiss):
+        replay.place_order()
+    assert replay.stats() == {"calls": 3, "misses": 1}
+
+
+def test_truncated_recording_keeps_complete_lines(recording, tmp_path):
+    data = gzip.open(recording, "rb").read()
+    cut = tmp_path / "cut.jsonl.gz"
+    cut.write_bytes(gzip.compress(data)[:-20])
+    header, records = load_recording(str(cut))
+    assert header["constants"]["NSE"] == "NSE_EQ"
+    assert 0 < len(records) <= 3
@@ -0,0 +1,86 @@
+# tests/test_aws_ssm.py
+#
+# SSM parameter loading: one batched GetParameters call, the in-process
+# memo, the encrypted disk copy (reuse, expiry, wrong key) and misses.
+import os
+
+import pytest
+from cryptography.fernet import Fernet
+
+from app.config import aws_ssm
+
+
+class StubSSM:
+    def __init__(self, values):
+        self.values = values
+        self.calls = []
+
+    def get_parameters(self, Names, WithDecryption):
+        self.calls.append(list(Names))
+        return {
+            "Parameters": [{"Name": n, "Value": self.values[n]} for n in Names if n in self.values],
+            "InvalidParameters": [n for n in Names if n not in self.values],
+        }
+
+
+@pytest.fixture
+def ssm(monkeypatch, tmp_path):
+    stub = StubSSM({name: f"value-of-{name}" for name in aws_ssm.PARAM_NAMES + ["/extra"]})
+    monkeypatch.setattr(aws_ssm, "_ssm", stub)
+    monkeypatch.setattr(aws_ssm, "SSM_CACHE_KEY", Fernet.generate_key().decode())
+    monkeypatch.setattr(aws_ssm, "SSM_CACHE_FILE", str(tmp_path / "cache" / "ssm.enc"))
+    monkeypatch.setattr(aws_ssm, "_PARAMS", {})
+    return stub
+
+
+def test_startup_params_load_in_one_batch(ssm):
+    assert aws_ssm.get_param("/dhan/client_id") == "value-of-/dhan/client_id"
+    assert aws_ssm.get_param("/trading-bot/telegram/CHAT_ID")
+    assert ssm.calls == [aws_ssm.PARAM_NAMES]
+
+
+def test_batches_respect_the_api_limit(ssm, monkeypatch):
+    monkeypatch.setattr(aws_ssm, "_BATCH_SIZE", 3)
+    aws_ssm.load_params(aws_ssm.PARAM_NAMES + ["/extra", "/dhan/client_id"])
+    assert [len(c) for c in ssm.calls] == [3, 2]
+
+
+def test_disk_cache_is_encrypted_and_reused(ssm):
+    aws_ssm.load_params()
+    with open(aws_ssm.SSM_CACHE_FILE, "rb") as fh:
+        assert b"value-of" not in fh.read()
+    assert oct(os.stat(aws_ssm.SSM_CACHE_FILE).st_mode & 0o777) == "0o600"
+
+    aws_ssm.clear_param_cache(disk=False)                      # a restart: memory empty, disk kept
+    assert aws_ssm.get_param("/dhan/access_token") == "value-of-/dhan/access_token"
+    assert len(ssm.calls) == 1
+
+
+def test_unusable_disk_cache_falls_back_to_ssm(ssm, monkeypatch):
+    aws_ssm.load_params()
+    aws_ssm.clear_param_cache(disk=False)
+    monkeypatch.setattr(aws_ssm, "SSM_CACHE_KEY", Fernet.generate_key().decode())   # rotated key
+    aws_ssm.load_params()
+    assert len(ssm.calls) == 2
+
+    aws_ssm.clear_param_cache()
+    assert not os.path.exists(aws_ssm.SSM_CACHE_FILE)
+
+
+def test_expired_disk_cache(ssm, monkeypatch):
+    aws_ssm.load_params()
+    aws_ssm.clear_param_cache(disk=False)
+    monkeypatch.setattr(aws_ssm, "SSM_CACHE_TTL", -1)
+    aws_ssm.load_params()
+    assert len(ssm.calls) == 2
+
+
+def test_no_key_means_no_disk_copy(ssm, monkeypatch):
+    monkeypatch.setattr(aws_ssm, "SSM_CACHE_KEY", None)
+    aws_ssm.load_params()
+    assert not os.path.exists(aws_ssm.SSM_CACHE_FILE)
+
+
+def test_missing_parameter(ssm):
+    with pytest.raises(KeyError):
+        aws_ssm.get_param("/not/there")
@@ -0,0 +1,87 @@
+# tests/test_backtest_engine.py
+#
+# Vectorised Super Order exits: target, stop, gaps through either level,
+# the trailing stop and break-even at 1R, stop-first bars and square-off,
+# for BUY and (mirrored) SELL trades in one padded batch.
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.backtest.engine import simulate_exits, summarize
+
+
+def run(*cases, trailing_multiplier=0.5):
+    """cases: (side, entry, sl, target, [(o, h, l, c), ...]) -> list of (exit, reason, exit_bar)."""
+    bars, trades = [], []
+    for side, entry, sl, target, ohlc in cases:
+        rows = np.arange(len(bars), len(bars) + len(ohlc))
+        bars.extend(ohlc)
+        risk = abs(entry - sl)
+        trades.append({"Signal": side, "Entry": entry, "SL": sl, "Target": target,
+                       "One R": entry + risk if side == "BUY" else entry - risk, "rows": rows})
+
+    frame = pd.DataFrame(bars, columns=["Open", "High", "Low", "Close"])
+    out = simulate_exits(trades, frame, trailing_multiplier)
+    return [(round(float(x), 2), str(r), int(b)) for x, r, b in zip(out["exit"], out["reason"], out["exit_bar"])]
+
+
+def test_buy_exits():
+    assert run(
+        ("BUY", 100, 98, 103, [(100, 101, 99.5, 100.5), (100.5, 103.5, 100.2, 103)]),
+        ("BUY", 100, 98, 103, [(100, 100.5, 97, 97.5)]),
+        ("BUY", 100, 98, 103, [(100, 100.8, 99, 100), (96, 96.5, 95, 95.5)]),
+        ("BUY", 100, 98, 103, [(100, 101, 99, 100.5), (104, 105, 103.5, 104.5)]),
+    ) == [
+        (103.0, "TARGET_HIT", 1),
+        (98.0, "STOP_LOSS_HIT", 0),
+        (96.0, "STOP_LOSS_HIT", 1),            # gap down: filled at the open, not the stop
+        (104.0, "TARGET_HIT", 1),              # gap up: filled at the open, not the target
+    ]
+
+
+def test_buy_trail_and_break_even():
+    # 1R (102) seen in bar 0: stop trails 2 jumps to 100 (= entry) for bar 1
+    assert run(("BUY", 100, 98, 105, [(100, 102.2, 99.5, 102), (102, 102.5, 99.8, 100)])) \
+        == [(100.0, "TRAIL_SL_HIT", 1)]
+    # One jump without 1R: stop at 99, not break-even
+    assert run(("BUY", 100, 98, 105, [(100, 101.4, 99.5, 101), (101, 101.2, 99.2, 99.5), (99.5, 99.6, 98.9, 99)])) \
+        == [(99.0, "TRAIL_SL_HIT", 2)]
+    # No trailing: the original stop holds below 1R, break-even still applies from 1R
+    assert run(("BUY", 100, 98, 105, [(100, 101.4, 99.5, 101), (101, 101.2, 97.5, 98)]), trailing_multiplier=0) \
+        == [(98.0, "STOP_LOSS_HIT", 1)]
+    assert run(("BUY", 100, 98, 105, [(100, 102.2, 99.5, 102), (102, 102.5, 97.5, 98)]), trailing_multiplier=0) \
+        == [(100.0, "TRAIL_SL_HIT", 1)]
+
+
+def test_stop_and_target_in_one_bar_assumes_stop():
+    assert run(("BUY", 100, 98, 103, [(100, 104, 97, 101)])) == [(98.0, "STOP_LOSS_HIT", 0)]
+
+
+def test_square_off_at_last_close_with_uneven_lengths():
+    assert run(
+        ("BUY", 100, 98, 110, [(100, 101, 99, 100.5), (100.5, 101.5, 100, 101.2)]),
+        ("SELL", 100, 102, 90, [(100, 100.5, 99.5, 99.8)]),
+    ) == [(101.2, "SQUARE_OFF", 1), (99.8, "SQUARE_OFF", 0)]
+
+
+def test_sell_exits():
+    assert run(
+        ("SELL", 100, 102, 97, [(100, 100.5, 99, 99.5), (99.5, 99.8, 96.5, 97)]),
+        ("SELL", 100, 102, 97, [(100, 102.5, 99.8, 102.2)]),
+        ("SELL", 100, 102, 97, [(100, 101, 99.5, 100.5), (104, 105, 103.5, 104.5)]),
+        ("SELL", 100, 102, 97, [(100, 100.5, 97.8, 98), (98, 100.2, 97.5, 99)]),
+    ) == [
+        (97.0, "TARGET_HIT", 1),
+        (102.0, "STOP_LOSS_HIT", 0),
+        (104.0, "STOP_LOSS_HIT", 1),           # gap up through the stop
+        (100.0, "TRAIL_SL_HIT", 1),            # 1R (98) seen: stop at entry
+    ]
+
+
+def test_summarize():
+    trades = pd.DataFrame({"PnL": [500.0, -200.0, -400.0, 300.0], "R": [1.0, -0.4, -0.8, 0.6]})
+    assert summarize(trades) == {
+        "trades": 4, "win_rate": 0.5, "total_pnl": 200.0, "avg_r": 0.1,
+        "profit_factor": pytest.approx(800 / 600, abs=1e-4), "max_drawdown": 600.0,
+    }
+    assert summarize(pd.DataFrame())["trades"] == 0
@@ -0,0 +1,128 @@
+# tests/test_candle_aggregator.py
+#
+# CandleAggregator: OHLC per bucket, rollover and bar-close callbacks, gaps,
+# late ticks, and cumulative-volume deltas (including quotes without volume).
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.config.settings import IST
+from app.strategy.candle_aggregator import CandleAggregator
+
+T0 = int(IST.localize(datetime(2025, 1, 31, 9, 15)).timestamp())     # 5m / 15m bucket start
+
+
+@pytest.fixture
+def agg():
+    agg = CandleAggregator([101, "102", 103.0], timeframes=(5, 15), capacity=8)
+    agg.closed = []
+    agg.on_bar_close(lambda minutes, start, buf: agg.closed.append((minutes, start)))
+    return agg
+
+
+def bars(agg, minutes, n):
+    return agg.buffers[minutes].last(n)
+
+
+def test_ticks_build_ohlc_and_close_on_next_bucket(agg):
+    for offset, price in [(0, 100.0), (60, 103.0), (120, 98.0), (299, 101.0)]:
+        agg.update(101, price, T0 + offset)
+    assert agg.closed == []
+    assert bars(agg, 5, 1)["close"].shape == (3, 0)         # nothing closed yet
+
+    agg.update(101, 102.0, T0 + 300)                         # first tick of 09:20
+    assert agg.closed == [(5, T0)]
+    bar = bars(agg, 5, 1)
+    row = agg.row(101)
+    assert (bar["open"][row, 0], bar["high"][row, 0], bar["low"][row, 0], bar["close"][row, 0]) == (100, 103, 98, 101)
+    assert bar["start"].tolist() == [T0]
+    assert np.isnan(bar["close"][agg.row(102), 0])          # no tick for 102 in that bar
+
+
+def test_15m_bar_spans_three_5m_bars(agg):
+    for i, price in enumerate([100.0, 105.0, 95.0]):
+        agg.update(102, price, T0 + i * 300)
+    assert agg.closed == [(5, T0), (5, T0 + 300)]
+
+    agg.update(102, 99.0, T0 + 900)                          # 09:30 closes 09:25 and 09:15-09:30
+    assert agg.closed[2:] == [(5, T0 + 600), (15, T0)]
+    bar = bars(agg, 15, 1)
+    row = agg.row(102)
+    assert (bar["open"][row, 0], bar["high"][row, 0], bar["low"][row, 0], bar["close"][row, 0]) == (100, 105, 95, 95)
+
+
+def test_flush_closes_without_a_tick(agg):
+    agg.update(101, 100.0, T0 + 10)
+    agg.flush(T0 + 299)
+    assert agg.closed == []
+    agg.flush(T0 + 300)
+    assert agg.closed == [(5, T0)]
+
+
+def test_gap_closes_empty_bars(agg):
+    agg.update(101, 100.0, T0)
+    agg.update(101, 101.0, T0 + 3 * 300)                     # no ticks for two buckets
+    assert [c for c in agg.closed if c[0] == 5] == [(5, T0), (5, T0 + 300), (5, T0 + 600)]
+    last = bars(agg, 5, 3)
+    assert np.isnan(last["close"][agg.row(101), 1:]).all()
+
+
+def test_ring_buffer_keeps_latest_bars(agg):
+    for i in range(20):
+        agg.update(101, 100.0 + i, T0 + i * 300)
+    last = bars(agg, 5, 100)
+    assert last["close"].shape[1] == 7                       # capacity - 1
+    assert last["close"][agg.row(101)].tolist() == [112, 113, 114, 115, 116, 117, 118]
+
+
+def test_late_tick_is_dropped(agg):
+    agg.update(101, 100.0, T0, cum_volume=1000)
+    agg.update(101, 101.0, T0 + 300, cum_volume=1100)       # closes 09:15
+    agg.update(101, 150.0, T0 + 299, cum_volume=1050)       # belongs to the closed bar
+    bar = bars(agg, 5, 1)
+    assert bar["high"][agg.row(101), 0] == 100.0
+    agg.update(101, 101.0, T0 + 310, cum_volume=1200)
+    agg.flush(T0 + 600)
+    assert bars(agg, 5, 1)["volume"][agg.row(101), 0] == 200  # 1000 -> 1200, nothing lost
+
+
+def test_batch_update_ignores_unknown_ids_and_nan_prices(agg):
+    agg.update_batch([101, 999, 102], [100.0, 50.0, np.nan], T0)
+    agg.update_batch([101, 102], [104.0, 200.0], T0 + 60)
+    agg.flush(T0 + 300)
+    bar = bars(agg, 5, 1)
+    assert bar["open"][agg.row(101), 0] == 100 and bar["high"][agg.row(101), 0] == 104
+    assert bar["open"][agg.row(102), 0] == 200
+
+
+def test_volume_deltas_from_cumulative_volume(agg):
+    agg.update_batch([101], [100.0], T0, [1000])             # first sighting: baseline only
+    agg.update_batch([101], [100.0], T0 + 60, [1300])
+    agg.update_batch([101], [100.0], T0 + 300, [1500])
+    agg.flush(T0 + 600)
+    assert bars(agg, 5, 2)["volume"][agg.row(101)].tolist() == [300, 200]
+
+
+def test_quote_without_volume_keeps_previous_cumulative(agg):
+    agg.ingest_quotes({"101": {"last_price": 100.0, "volume": 1000}}, T0)
+    agg.ingest_quotes({"101": {"last_price": 100.5}}, T0 + 60)          # volume missing
+    agg.ingest_quotes({"101": {"last_price": 101.0, "volume": None}}, T0 + 120)
+    agg.ingest_quotes({"101": {"last_price": 101.0, "volume": 1040}}, T0 + 180)
+    agg.flush(T0 + 300)
+    assert bars(agg, 5, 1)["volume"][agg.row(101), 0] == 40
+
+
+def test_callback_errors_do_not_break_updates(agg):
+    agg.on_bar_close(lambda *a: 1 / 0)
+    agg.update(101, 100.0, T0)
+    agg.update(101, 101.0, T0 + 300)
+    assert agg.closed == [(5, T0)]
+
+
+def test_empty_universe():
+    agg = CandleAggregator([], timeframes=(5,))
+    agg.update_batch([101], [100.0], T0)
+    agg.ingest_quotes({"101": {"last_price": 100.0}}, T0)
+    agg.flush(T0 + 300)
+    assert agg.buffers[5].last(5)["close"].shape == (0, 0)
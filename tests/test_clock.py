@@ -0,0 +1,137 @@
+# tests/test_clock.py
+#
+# VirtualClock: coroutine and executor-thread sleepers wake in time order,
+# the clock never moves while executor work is running, and run_simulated
+# restores the process clock.
+import asyncio
+import time as real_time
+from datetime import datetime
+
+import pytest
+
+from app.config.settings import IST
+from app.utils import clock
+from app.utils.clock import ScaledClock, SystemClock, VirtualClock
+
+START = IST.localize(datetime(2025, 1, 31, 9, 15))
+
+
+def elapsed():
+    return clock.monotonic()
+
+
+def test_naive_start_is_ist_and_advance():
+    sim = VirtualClock(datetime(2025, 1, 31, 9, 15))
+    assert sim.now() == START and sim.time() == START.timestamp()
+    sim.advance(90)
+    sim.advance(-10)                                           # never goes back
+    assert sim.monotonic() == 90
+    assert sim.now().strftime("%H:%M:%S") == "09:16:30"
+
+
+def test_untracked_sleep_just_advances():
+    sim = VirtualClock(START)
+    sim.sleep(5)
+    assert sim.monotonic() == 5
+
+
+def test_coroutines_wake_in_time_order():
+    woke = []
+
+    async def sleeper(name, seconds):
+        await clock.asleep(seconds)
+        woke.append((name, elapsed()))
+
+    async def main():
+        await asyncio.gather(sleeper("c", 30), sleeper("a", 10), sleeper("b", 10), sleeper("d", 0))
+        return clock.now(IST)
+
+    t0 = real_time.monotonic()
+    end = clock.run_simulated(main(), start=START)
+    assert woke == [("d", 0), ("a", 10), ("b", 10), ("c", 30)]
+    assert end == IST.localize(datetime(2025, 1, 31, 9, 15, 30))
+    assert real_time.monotonic() - t0 < 5
+
+
+def test_threads_and_coroutines_interleave():
+    seen = []
+
+    def worker():
+        for _ in range(3):
+            clock.sleep(20)
+            seen.append(("thread", elapsed()))
+        return "done"
+
+    async def ticker():
+        for _ in range(4):
+            await clock.asleep(15)
+            seen.append(("coro", elapsed()))
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        result, _ = await asyncio.gather(loop.run_in_executor(None, worker), ticker())
+        return result
+
+    assert clock.run_simulated(main(), start=START) == "done"
+    # Same wake time: whoever went to sleep first (the thread, at 40) wakes first
+    assert seen == [("coro", 15), ("thread", 20), ("coro", 30), ("thread", 40),
+                    ("coro", 45), ("thread", 60), ("coro", 60)]
+
+
+def test_clock_waits_for_running_executor_work():
+    async def main():
+        loop = asyncio.get_running_loop()
+        busy = loop.run_in_executor(None, real_time.sleep, 0.2)    # real work, no clock sleep
+        await clock.asleep(1)
+        assert busy.done()                                         # timer fired only after the work
+        return elapsed()
+
+    assert clock.run_simulated(main(), start=START) == 1
+
+
+def test_executor_errors_propagate():
+    def boom():
+        clock.sleep(5)
+        raise RuntimeError("broker down")
+
+    async def main():
+        return await asyncio.get_running_loop().run_in_executor(None, boom)
+
+    with pytest.raises(RuntimeError, match="broker down"):
+        clock.run_simulated(main(), start=START)
+
+
+def test_cancelled_sleep_does_not_move_the_clock():
+    async def main():
+        long = asyncio.ensure_future(clock.asleep(3600))
+        await clock.asleep(10)
+        long.cancel()
+        await asyncio.sleep(0)
+        await clock.asleep(5)
+        return elapsed()
+
+    assert clock.run_simulated(main(), start=START) == 15
+
+
+def test_run_simulated_restores_the_clock():
+    before = clock.get_clock()
+
+    async def main():
+        return isinstance(clock.get_clock(), VirtualClock)
+
+    assert clock.run_simulated(main(), start=START)
+    assert clock.get_clock() is before
+    assert isinstance(before, SystemClock)
+
+
+def test_vclock_fixture(vclock):
+    assert clock.now(IST) == START
+    clock.sleep(60)
+    assert clock.now(IST).strftime("%H:%M") == "09:16"
+
+
+def test_scaled_clock_runs_faster():
+    scaled = ScaledClock(datetime(2025, 1, 31, 9, 15), speed=600)
+    scaled.sleep(60)                                           # 0.1s real
+    assert 60 <= scaled.monotonic() < 600
+    assert scaled.now() >= IST.localize(datetime(2025, 1, 31, 9, 16))
@@ -0,0 +1,90 @@
+# tests/test_fund_manager.py
+#
+# Fund cache: one blocking first load, local reserve / release on fills,
+# broker reads that raced an adjustment are dropped, failures keep the
+# cached value, and a stale value only schedules a background refresh.
+import pytest
+
+from app.broker import fund_manager as fm
+
+
+class StubDhan:
+    def __init__(self, balance=100000.0):
+        self.balance = balance
+        self.calls = 0
+        self.during = None          # run inside the request, e.g. a fill landing
+
+    def get_fund_limits(self):
+        self.calls += 1
+        if isinstance(self.balance, Exception):
+            raise self.balance
+        if self.during:
+            self.during()
+        return {"data": {"availabelBalance": self.balance}}
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    stub = StubDhan()
+    monkeypatch.setattr(fm, "dhan", stub)
+    monkeypatch.setattr(fm, "start_fund_refresher", lambda ttl=fm.FUND_TTL_SECONDS: None)
+    monkeypatch.setattr(fm, "_AVAILABLE_FUND", 0.0)
+    monkeypatch.setattr(fm, "_FUND_FETCHED_AT", None)
+    monkeypatch.setattr(fm, "_FUND_GEN", 0)
+    fm._REFRESH_EVENT.clear()
+    yield stub
+    fm._REFRESH_EVENT.clear()
+
+
+def test_first_read_loads_once(broker):
+    assert fm.get_cached_fund() == 100000.0
+    assert fm.get_cached_fund() == 100000.0
+    assert broker.calls == 1
+    assert not fm._REFRESH_EVENT.is_set()
+
+
+def test_reserve_and_release_adjust_locally(broker):
+    fm.init_fund_cache()
+    assert fm.reserve_fund(30000) == 70000.0
+    assert fm._REFRESH_EVENT.is_set()                         # broker figure re-read in the background
+    assert fm.get_cached_fund() == 70000.0 and broker.calls == 1
+    assert fm.reserve_fund(1e6) == 0.0                        # never negative
+    assert fm.release_fund(5000) == 5000.0
+
+
+def test_read_racing_an_adjustment_is_dropped(broker):
+    fm.init_fund_cache()
+    broker.balance = 100000.0                                 # stale: predates the fill below
+    broker.during = lambda: fm.reserve_fund(40000)
+    assert fm._refresh_fund() is False
+    assert fm.get_cached_fund() == 60000.0
+
+    broker.during, broker.balance = None, 59000.0
+    assert fm._refresh_fund() is True
+    assert fm.get_cached_fund() == 59000.0
+
+
+def test_failures_keep_the_cached_value(broker):
+    fm.init_fund_cache()
+    broker.balance = RuntimeError("503")
+    assert fm._refresh_fund() is False
+    assert fm.get_cached_fund() == 100000.0
+    assert fm.fetch_available_fund() == 0.0
+
+
+def test_failed_first_load_does_not_block_readers(broker):
+    broker.balance = RuntimeError("503")
+    assert fm.init_fund_cache() == 0.0
+    assert fm._FUND_FETCHED_AT == 0.0                         # loaded-but-stale
+    assert fm.get_cached_fund() == 0.0 and broker.calls == 1
+    assert fm._REFRESH_EVENT.is_set()
+
+
+def test_stale_value_schedules_refresh(broker, monkeypatch):
+    fm.init_fund_cache()
+    monkeypatch.setattr(fm, "_FUND_FETCHED_AT", fm.time.monotonic() - fm.FUND_TTL_SECONDS - 1)
+    assert fm.get_cached_fund() == 100000.0 and broker.calls == 1
+    assert fm._REFRESH_EVENT.is_set()
+
+    broker.balance = 80000.0
+    assert fm.get_cached_fund(refresh=True) == 80000.0
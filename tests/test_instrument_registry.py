@@ -0,0 +1,99 @@
+# tests/test_instrument_registry.py
+#
+# Instrument registry: table build from the mapping CSVs, scalar / batch
+# lookups, and the per-day memory-mapped cache (reuse, rebuild, pruning).
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.broker import instrument_registry as reg
+from app.broker.instrument_registry import InstrumentRegistry, build_table, to_security_id
+
+MAIN = "Stock Name,Instrument ID,Sector\nReliance ,2885,Energy\ninfy,1594.0,IT\nBAD,,X\n"
+NIFTY = "Stock Name,Instrument ID\nNIFTY,13\nRELIANCE DUP,2885\n"
+
+
+class StubS3:
+    def __init__(self, files):
+        self.files = files
+        self.reads = 0
+
+    def get_object(self, Bucket, Key):
+        self.reads += 1
+        return {"Body": io.BytesIO(self.files[Key].encode())}
+
+
+@pytest.fixture
+def s3(monkeypatch, tmp_path):
+    stub = StubS3({reg.MAP_FILE_KEY: MAIN, reg.NIFTYMAP_FILE_KEY: NIFTY})
+    monkeypatch.setattr(reg, "s3", stub)
+    monkeypatch.setattr(reg, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(reg, "_REGISTRY", None)
+    return stub
+
+
+@pytest.mark.parametrize("value", [2885, "2885", " 2885.0 ", np.int32(2885), 2885.0])
+def test_to_security_id(value):
+    assert to_security_id(value) == 2885
+
+
+def test_build_table_sorts_cleans_and_dedupes():
+    table = build_table([
+        pd.read_csv(io.StringIO(MAIN)),
+        pd.read_csv(io.StringIO(NIFTY)),
+        pd.DataFrame(),                                        # empty frames are skipped
+    ])
+    assert table["security_id"].tolist() == [13, 1594, 2885]
+    assert [n.decode() for n in table["name"]] == ["NIFTY", "INFY", "RELIANCE"]   # first row wins
+
+
+def test_lookups():
+    registry = InstrumentRegistry(build_table([pd.read_csv(io.StringIO(MAIN))]))
+    assert len(registry) == 2 and "2885.0" in registry and 13 not in registry
+    assert registry.name(2885) == "RELIANCE" and registry.name(13) is None
+    assert registry.security_id(" infy ") == 1594 and registry.security_id("TCS") is None
+    assert registry.row("abc") is None
+    assert registry.symbol(13) is None
+    assert registry.rows([2885, 13, 1594, 99999]).tolist() == [1, -1, 0, -1]
+
+
+def test_empty_registry_batch_lookup():
+    registry = InstrumentRegistry(np.empty(0, dtype=[("security_id", "<i8"), ("name", "S1")]))
+    assert registry.rows([1, 2]).tolist() == [-1, -1]
+    assert registry.name(1) is None
+
+
+def test_cache_is_written_then_memory_mapped(s3):
+    first = reg.init_registry()
+    assert s3.reads == 2 and len(first) == 3
+    assert reg.get_registry() is first                         # process singleton
+
+    reg._REGISTRY = None                                       # another process, same day
+    second = reg.init_registry()
+    assert s3.reads == 2                                       # no S3 round trip
+    assert isinstance(second.table, np.memmap) and not second.table.flags.writeable
+    assert second.name(13) == "NIFTY"
+    np.testing.assert_array_equal(second.table, first.table)
+
+
+def test_force_rebuilds_and_prunes_old_days(s3):
+    old = reg._cache_path("20250130")
+    os.makedirs(os.path.dirname(old))
+    np.save(old, np.zeros(1))
+
+    reg.init_registry()
+    assert os.listdir(reg.CACHE_DIR) == [os.path.basename(reg._cache_path())]
+
+    reg.init_registry(force=True)
+    assert s3.reads == 4
+
+
+def test_unwritable_cache_still_loads(s3, monkeypatch):
+    def fail(table, path):
+        raise OSError("read-only filesystem")
+
+    monkeypatch.setattr(reg, "_write_table", fail)
+    assert reg.init_registry().name(1594) == "INFY"
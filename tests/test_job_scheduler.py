@@ -0,0 +1,126 @@
+# tests/test_job_scheduler.py
+#
+# CronTrigger / IntervalTrigger next-fire times (day, weekend, month and
+# timezone boundaries) and JobScheduler runs on a VirtualClock.
+import asyncio
+from datetime import datetime, time
+
+import pytest
+import pytz
+
+from app.config.settings import IST
+from app.bot.job_scheduler import CronTrigger, IntervalTrigger, JobScheduler, daily_at
+from app.utils import clock
+
+
+def ist(*args):
+    return IST.localize(datetime(*args))
+
+
+@pytest.mark.parametrize("expr, after, expected", [
+    ("10 15 * * *", ist(2025, 1, 30, 9, 0), ist(2025, 1, 30, 15, 10)),
+    ("10 15 * * *", ist(2025, 1, 30, 15, 10), ist(2025, 1, 31, 15, 10)),        # strictly after
+    ("10 15 * * *", ist(2025, 1, 30, 15, 10, 30), ist(2025, 1, 31, 15, 10)),    # within the fire minute
+    ("10 15 * * *", ist(2025, 1, 31, 23, 59), ist(2025, 2, 1, 15, 10)),         # month end
+    ("10 15 * * *", ist(2024, 12, 31, 16, 0), ist(2025, 1, 1, 15, 10)),         # year end
+    ("10 15 * * 1-5", ist(2025, 1, 31, 15, 11), ist(2025, 2, 3, 15, 10)),       # Fri -> Mon
+    ("0 0 29 2 *", ist(2025, 1, 1, 0, 0), ist(2028, 2, 29, 0, 0)),              # leap day
+    ("*/15 9-15 * * *", ist(2025, 1, 30, 15, 45), ist(2025, 1, 31, 9, 0)),      # after the last slot
+    ("*/15 9-15 * * *", ist(2025, 1, 30, 9, 7), ist(2025, 1, 30, 9, 15)),
+    ("0,30 9 * * 0", ist(2025, 1, 30, 12, 0), ist(2025, 2, 2, 9, 0)),           # Sunday as 0
+    ("0 9 * * 7", ist(2025, 1, 30, 12, 0), ist(2025, 2, 2, 9, 0)),              # ... and as 7
+    ("0 9 1 * 1", ist(2025, 1, 28, 12, 0), ist(2025, 2, 1, 9, 0)),              # dom OR dow: 1st (Sat)
+])
+def test_cron_next_after(expr, after, expected):
+    assert CronTrigger(expr).next_after(after) == expected
+
+
+def test_cron_converts_other_timezones_to_ist():
+    utc = pytz.utc.localize(datetime(2025, 1, 30, 9, 45))                     # 15:15 IST
+    assert CronTrigger("10 15 * * *").next_after(utc) == ist(2025, 1, 31, 15, 10)
+
+
+def test_daily_at():
+    trigger = daily_at(time(9, 20), weekdays="1-5")
+    assert trigger.next_after(ist(2025, 2, 1, 10, 0)) == ist(2025, 2, 3, 9, 20)
+
+
+@pytest.mark.parametrize("expr", ["* * *", "60 * * * *", "* 24 * * *", "5-1 * * * *"])
+def test_cron_rejects_bad_expressions(expr):
+    with pytest.raises(ValueError):
+        CronTrigger(expr)
+
+
+def test_cron_that_never_fires():
+    with pytest.raises(ValueError):
+        CronTrigger("0 0 31 2 *").next_after(ist(2025, 1, 1, 0, 0))
+
+
+def test_interval_trigger_aligns_to_midnight():
+    trigger = IntervalTrigger(300)
+    assert trigger.next_after(ist(2025, 1, 30, 9, 17, 42)) == ist(2025, 1, 30, 9, 20)
+    assert trigger.next_after(ist(2025, 1, 30, 9, 20)) == ist(2025, 1, 30, 9, 25)
+    assert trigger.next_after(ist(2025, 1, 30, 23, 58)) == ist(2025, 1, 31, 0, 0)
+
+
+# ==========================================================
+# JOB SCHEDULER (virtual time)
+# ==========================================================
+def simulate(setup, until, start=ist(2025, 1, 30, 9, 0)):
+    """Run a JobScheduler from `start` until the virtual clock reaches `until`."""
+    async def main():
+        jobs = JobScheduler()
+        setup(jobs)
+        jobs.start()
+        await clock.asleep((until - start).total_seconds())
+        jobs.stop()
+        return jobs
+
+    return clock.run_simulated(main(), start=start)
+
+
+def test_jobs_fire_at_due_times():
+    fired = []
+
+    async def tick():
+        fired.append(clock.now(IST))
+
+    jobs = simulate(lambda j: j.add_job("tick", tick, CronTrigger("*/30 9-10 * * *")), ist(2025, 1, 30, 11, 0))
+    assert fired == [ist(2025, 1, 30, 9, 30), ist(2025, 1, 30, 10, 0), ist(2025, 1, 30, 10, 30)]
+    assert jobs.metrics()["tick"]["runs"] == 3
+
+
+def test_sync_job_runs_in_executor_and_max_runs():
+    fired = []
+    jobs = simulate(
+        lambda j: j.add_job("once", lambda: fired.append(clock.now(IST)), daily_at(time(15, 10)), max_runs=1),
+        ist(2025, 2, 1, 16, 0),
+    )
+    assert fired == [ist(2025, 1, 30, 15, 10)]
+    assert jobs.metrics()["once"]["next_run"] is None
+
+
+def test_overlapping_run_is_skipped():
+    async def slow():
+        await clock.asleep(150)
+
+    jobs = simulate(lambda j: j.add_job("slow", slow, IntervalTrigger(60)), ist(2025, 1, 30, 9, 10))
+    m = jobs.metrics()["slow"]
+    assert m["skipped_overlap"] > 0
+    assert m["runs"] + m["skipped_overlap"] + m["running"] >= 9
+
+
+def test_failures_are_counted_and_job_keeps_running():
+    def boom():
+        raise RuntimeError("job failed")
+
+    jobs = simulate(lambda j: j.add_job("boom", boom, IntervalTrigger(60)), ist(2025, 1, 30, 9, 5, 30))
+    m = jobs.metrics()["boom"]
+    assert (m["runs"], m["failures"]) == (0, 5)
+
+
+def test_duplicate_job_name_rejected():
+    jobs = JobScheduler()
+    jobs.add_job("a", lambda: None, IntervalTrigger(60))
+    with pytest.raises(ValueError):
+        jobs.add_job("a", lambda: None, IntervalTrigger(60))
@@ -0,0 +1,78 @@
+# tests/test_leverage_manager.py
+#
+# LeverageTable scalar / batch lookups and the CSV loader against a stub S3:
+# bad IDs, duplicate rows, blank or < 1 leverage, and invalid lookup IDs.
+import io
+
+import numpy as np
+import pytest
+
+from app.broker import leverage_manager
+from app.broker.leverage_manager import LeverageTable
+
+
+class StubS3:
+    def __init__(self, csv):
+        self.csv = csv
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self.csv.encode())}
+
+
+@pytest.fixture
+def load(monkeypatch):
+    def load(csv):
+        monkeypatch.setattr(leverage_manager, "s3", StubS3(csv))
+        return leverage_manager.init_leverage_cache(force=True)
+
+    yield load
+    leverage_manager._LEVERAGE_TABLE = None
+
+
+def test_scalar_and_batch_lookups_agree():
+    table = LeverageTable([30, 10, 20], [2.0, 5.0, 4.0])
+    assert table.lookup(10) == 5.0
+    assert table.lookup(99) == 1.0
+    assert table.lookup(99, default=None) is None
+    np.testing.assert_array_equal(table.lookup_many([20, 99, 30]), [4.0, 1.0, 2.0])
+    np.testing.assert_array_equal(table.margin_many([10, 99]), [0.2, 1.0])
+
+
+def test_duplicate_ids_keep_last_row_everywhere():
+    table = LeverageTable([10, 20, 10], [5.0, 4.0, 2.0])
+    assert len(table) == 2
+    assert table.lookup(10) == 2.0
+    assert table.lookup_many([10])[0] == 2.0
+
+
+def test_empty_table():
+    table = LeverageTable([], [])
+    assert table.lookup(1) == 1.0
+    np.testing.assert_array_equal(table.lookup_many([1, 2]), [1.0, 1.0])
+
+
+def test_loader_cleans_rows(load):
+    table = load(
+        "Stock Name,Instrument ID,MIS_LEVERAGE\n"
+        "AAA,2885,5\n"
+        "BBB,,4\n"              # blank ID: dropped
+        "CCC,11536.0,\n"        # blank leverage: 1x
+        "DDD,1333,0.5\n"        # < 1: 1x
+        "EEE,2885,3\n"          # duplicate: last row wins
+    )
+    assert len(table) == 3
+    assert leverage_manager.get_leverage(2885) == 3.0
+    assert leverage_manager.get_leverage("11536") == 1.0
+    assert leverage_manager.get_leverage("1333.0") == 1.0
+    np.testing.assert_array_equal(leverage_manager.get_leverage_batch([2885, 1333]), [3.0, 1.0])
+
+
+def test_loader_without_leverage_column(load):
+    table = load("Instrument ID\n2885\n")
+    assert table.lookup(2885) == 1.0
+
+
+@pytest.mark.parametrize("sec_id", ["", None, float("nan"), "abc"])
+def test_invalid_lookup_id_defaults_to_1x(load, sec_id):
+    load("Instrument ID,MIS_LEVERAGE\n2885,5\n")
+    assert leverage_manager.get_leverage(sec_id) == 1.0
@@ -0,0 +1,170 @@
+# tests/test_log_shipper.py
+#
+# S3ChunkHandler against an in-memory S3 stand-in: size / age rollover,
+# the dt=/host/ key layout, gzip bodies, retries and the flush on close.
+import os
+import re
+import gzip
+import time
+import logging
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.utils.log_shipper import S3ChunkHandler
+
+HOST = "testhost"
+START = datetime(2025, 1, 31, 9, 15, 0)
+
+
+class StubS3:
+    """put_object into a dict; fails the first `fail` calls."""
+
+    def __init__(self, fail=0):
+        self.objects = {}
+        self.fail = fail
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError("stub S3 unavailable")
+        assert kwargs.get("ContentType") == "application/gzip"
+        self.objects[(Bucket, Key)] = Body
+
+    def lines(self):
+        out = []
+        for key in sorted(self.objects):
+            out.extend(gzip.decompress(self.objects[key]).decode().splitlines())
+        return out
+
+
+class FakeNow:
+    def __init__(self, start):
+        self.value = start
+
+    def __call__(self):
+        return self.value
+
+
+@pytest.fixture
+def make_handler(tmp_path):
+    handlers = []
+
+    def make(client, now=None, **kwargs):
+        kwargs.setdefault("upload_interval", 3600)     # tests drive uploads themselves
+        h = S3ChunkHandler(str(tmp_path / "spool"), "bucket", "/trading-bot/logs/",
+                           client=client, host=HOST, **kwargs)
+        h.setFormatter(logging.Formatter("%(message)s"))
+        if now is not None:
+            h._now = now
+        handlers.append(h)
+        return h
+
+    yield make
+    for h in handlers:
+        h.close()
+
+
+def emit(handler, msg):
+    handler.handle(logging.LogRecord("t", logging.INFO, __file__, 0, msg, None, None))
+
+
+def spool_files(handler):
+    return sorted(os.listdir(handler.spool_dir))
+
+
+def flush(handler):
+    # rotate() also wakes the uploader thread; either may ship the chunk
+    handler.rotate()
+    handler.upload_pending()
+
+
+def test_key_layout_and_gzip_body(make_handler):
+    s3 = StubS3()
+    h = make_handler(s3, now=FakeNow(START))
+    emit(h, "hello")
+    flush(h)
+
+    (bucket, key), = s3.objects
+    assert bucket == "bucket"
+    assert re.fullmatch(rf"trading-bot/logs/dt=2025-01-31/{HOST}/20250131_091500_{os.getpid()}_0001\.log\.gz", key)
+    assert s3.lines() == ["hello"]
+
+
+def test_size_rollover(make_handler):
+    s3 = StubS3()
+    h = make_handler(s3, now=FakeNow(START), max_bytes=100)
+    msgs = [f"line {i:03d} " + "x" * 30 for i in range(10)]     # ~40 bytes each
+    for m in msgs:
+        emit(h, m)
+
+    # 3 records per chunk, last one still open; closed ones may already be uploaded
+    closed = {f for f in spool_files(h) if f.endswith(".log.gz")}
+    closed |= {os.path.basename(key) for _, key in s3.objects}
+    assert len(closed) == 3
+    assert h._fh is not None
+
+    h.close()
+    assert len(s3.objects) == 4
+    assert s3.lines() == msgs               # nothing lost or reordered across chunks
+
+
+def test_age_rollover(make_handler):
+    s3 = StubS3()
+    now = FakeNow(START)
+    h = make_handler(s3, now=now, max_age=300, upload_interval=0.02)
+    emit(h, "first")
+    time.sleep(0.1)
+    assert s3.objects == {}                 # chunk still young
+
+    now.value = START + timedelta(seconds=301)
+    deadline = time.monotonic() + 2
+    while not s3.objects and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert s3.lines() == ["first"]
+    assert h._fh is None
+
+    emit(h, "second")                       # new chunk, named by its own open time
+    h.close()
+    assert s3.lines() == ["first", "second"]
+    assert any(key.endswith("20250131_092001_" + f"{os.getpid()}_0002.log.gz") for _, key in s3.objects)
+
+
+def test_close_flushes_open_chunk(make_handler):
+    s3 = StubS3()
+    h = make_handler(s3, now=FakeNow(START))
+    for i in range(5):
+        emit(h, f"record {i}")
+    assert s3.objects == {}
+
+    h.close()
+    assert s3.lines() == [f"record {i}" for i in range(5)]
+    assert spool_files(h) == []
+
+
+def test_failed_upload_is_retried(make_handler):
+    s3 = StubS3(fail=10**6)                  # S3 down
+    h = make_handler(s3, now=FakeNow(START))
+    emit(h, "kept")
+    flush(h)
+    assert s3.objects == {}
+    assert len(spool_files(h)) == 1         # stays in the spool
+
+    s3.fail = 0                             # S3 back
+    h.upload_pending()
+    assert s3.lines() == ["kept"]
+    assert spool_files(h) == []
+
+
+def test_crashed_part_is_shipped_on_start(tmp_path, make_handler):
+    spool = tmp_path / "spool"
+    spool.mkdir()
+    with gzip.open(spool / "20250130_150000_99_0007.log.gz.part", "wt") as fh:
+        fh.write("before crash\n")
+
+    s3 = StubS3()
+    h = make_handler(s3, now=FakeNow(START))
+    assert h.upload_pending() == 1
+    (_, key), = s3.objects
+    assert key == f"trading-bot/logs/dt=2025-01-30/{HOST}/20250130_150000_99_0007.log.gz"
+    assert s3.lines() == ["before crash"]
@@ -0,0 +1,60 @@
+# tests/test_logging_setup.py
+#
+# Queue-based logging (records formatted on the listener thread) and the
+# throttled / sampled helpers used in hot loops.
+import logging
+
+import pytest
+
+from app.utils import logging_setup
+from app.utils.logging_setup import log_sampled, log_throttled
+
+
+@pytest.fixture
+def records(caplog):
+    caplog.set_level(logging.INFO, logger="test.hot")
+    return lambda: [r.getMessage() for r in caplog.records if r.name == "test.hot"]
+
+
+def test_throttled_reports_suppressed_count(records, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(logging_setup.time, "monotonic", lambda: now[0])
+    log = logging.getLogger("test.hot")
+
+    for _ in range(3):
+        log_throttled(log, logging.INFO, ("ltp", 1), 60, "LTP %s", 101)
+    now[0] += 61
+    log_throttled(log, logging.INFO, ("ltp", 1), 60, "LTP %s", 102)
+    log_throttled(log, logging.INFO, ("ltp", 2), 60, "other key")
+    log_throttled(log, logging.DEBUG, ("ltp", 3), 60, "disabled level")
+
+    assert records() == ["LTP 101", "LTP 102 (+2 similar suppressed)", "other key"]
+
+
+def test_sampled_logs_every_nth(records):
+    log = logging.getLogger("test.hot")
+    for i in range(7):
+        log_sampled(log, logging.INFO, "test-sampled", 3, "poll %d", i)
+    assert records() == ["poll 0", "poll 3", "poll 6"]
+
+
+def test_setup_logging_writes_through_the_queue(tmp_path, monkeypatch):
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    monkeypatch.setattr(logging_setup, "_LISTENER", None)
+    try:
+        logging_setup.setup_logging(log_dir=str(tmp_path), log_file="bot.log")
+        logging.getLogger("test.file").info("order %s placed", "A1")
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.getLogger("test.file").exception("failed")
+        logging_setup.stop_logging()
+        logging_setup.stop_logging()                           # idempotent (also runs at exit)
+    finally:
+        root.handlers[:] = saved_handlers
+        root.setLevel(saved_level)
+
+    text = (tmp_path / "bot.log").read_text()
+    assert "| INFO | test.file | order A1 placed" in text
+    assert "ValueError: boom" in text
@@ -0,0 +1,57 @@
+# tests/test_loop_monitor.py
+#
+# LoopMonitor: a blocking call on the event loop is detected, charged to
+# its call site and reported; a loop that only awaits stays clean.
+import asyncio
+import time
+
+from app.utils.loop_monitor import LoopMonitor, _callsite
+
+
+def run_with_monitor(body, **kwargs):
+    monitor = LoopMonitor(interval=0.02, threshold=0.1, report_interval=3600, **kwargs)
+
+    async def main():
+        probe = asyncio.ensure_future(monitor.run())
+        await asyncio.sleep(0.1)
+        await body()
+        await asyncio.sleep(0.2)                               # let the watchdog see the recovery
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+
+    asyncio.run(main())
+    monitor._watchdog.join(1)
+    return monitor
+
+
+def test_blocking_call_is_charged_to_its_call_site():
+    async def blocks_the_loop():
+        time.sleep(0.5)
+
+    monitor = run_with_monitor(blocks_the_loop, budget=0.1)
+    [row] = monitor.blocking_report()
+    assert row["callsite"].endswith(" blocks_the_loop")
+    assert 0.3 < row["seconds"] < 1.0
+    assert row["stalls"] == 1 and 0.3 < row["max_stall"] < 1.0
+    assert monitor.stalls == 1 and monitor.max_lag > 0.3
+    assert row["callsite"] in monitor._over_budget
+    assert "1 stalls" in monitor.report()
+
+
+def test_awaiting_loop_is_clean():
+    async def awaits():
+        await asyncio.sleep(0.3)
+
+    monitor = run_with_monitor(awaits)
+    assert monitor.blocking_report() == [] and monitor.stalls == 0
+
+
+def test_callsite_prefers_app_frames():
+    import traceback
+    stack = traceback.StackSummary.from_list([
+        ("/usr/lib/python3.11/asyncio/events.py", 80, "_run", None),
+        (__import__("app.bot.job_scheduler", fromlist=["x"]).__file__, 42, "_run_job", None),
+        ("/usr/lib/python3.11/ssl.py", 1100, "read", None),
+    ])
+    assert _callsite(stack) == ("app/bot/job_scheduler.py:42 _run_job", "/usr/lib/python3.11/ssl.py:1100 read")
+    assert _callsite([]) == ("<unknown>", "<unknown>")
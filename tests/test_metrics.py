@@ -0,0 +1,119 @@
+# tests/test_metrics.py
+#
+# Metrics registry: text exposition of counters / gauges / histograms,
+# label handling, the /metrics endpoint and the JobScheduler export.
+import socket
+import urllib.request
+from datetime import datetime
+
+import pytest
+
+from app.config.settings import IST
+from app.utils import clock
+from app.utils import metrics
+from app.utils.metrics import Counter, Gauge, Histogram, render_all
+
+
+def samples(name):
+    return [line for line in render_all().splitlines() if line.startswith(name)]
+
+
+def test_counter_exposition():
+    c = Counter("test_requests_total", "Requests", ("endpoint",))
+    c.labels("quote").inc()
+    c.labels("quote").inc(2)
+    c.labels('a"b').inc()
+
+    text = render_all()
+    assert "# HELP test_requests_total Requests\n# TYPE test_requests_total counter" in text
+    assert samples("test_requests_total") == [
+        'test_requests_total{endpoint="a\\"b"} 1',
+        'test_requests_total{endpoint="quote"} 3',
+    ]
+
+
+def test_unlabelled_gauge_is_exported_from_the_start():
+    g = Gauge("test_open_positions", "Open positions")
+    assert samples("test_open_positions") == ["test_open_positions 0"]
+    g.inc(3)
+    g.dec()
+    assert samples("test_open_positions") == ["test_open_positions 2"]
+    g.set(7.5)
+    assert samples("test_open_positions") == ["test_open_positions 7.5"]
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram("test_latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 3.0):
+        h.observe(v)
+
+    assert samples("test_latency_seconds") == [
+        'test_latency_seconds_bucket{le="0.1"} 2',
+        'test_latency_seconds_bucket{le="1"} 3',
+        'test_latency_seconds_bucket{le="+Inf"} 4',
+        "test_latency_seconds_sum 3.65",
+        "test_latency_seconds_count 4",
+    ]
+
+
+def test_histogram_timer_observes_once():
+    h = Histogram("test_timed_seconds", "Timed", ("op",))
+    with h.labels("place").time():
+        pass
+    assert 'test_timed_seconds_count{op="place"} 1' in samples("test_timed_seconds")
+
+
+def test_registration_and_label_errors():
+    Counter("test_dup_total", "x")
+    with pytest.raises(ValueError):
+        Counter("test_dup_total", "x")
+    with pytest.raises(ValueError):
+        Counter("test_labels_total", "x", ("a", "b")).labels("only-one")
+
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        metrics._Metric("test_abstract", "x")
+
+
+def test_http_endpoint_and_busy_port(monkeypatch):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    monkeypatch.setattr(metrics, "_SERVER", None)
+    server = metrics.start_metrics_server(port)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as resp:
+            assert resp.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert b"# TYPE orders_total counter" in resp.read()
+
+        monkeypatch.setattr(metrics, "_SERVER", None)
+        assert metrics.start_metrics_server(port) is None      # port taken: no endpoint, no crash
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_job_scheduler_runs_are_exported():
+    from app.bot.job_scheduler import IntervalTrigger, JobScheduler
+
+    def boom():
+        raise RuntimeError("job failed")
+
+    async def main():
+        jobs = JobScheduler()
+        jobs.add_job("test_ok", lambda: None, IntervalTrigger(60))
+        jobs.add_job("test_boom", boom, IntervalTrigger(60))
+        jobs.start()
+        await clock.asleep(150)
+        jobs.stop()
+
+    clock.run_simulated(main(), start=IST.localize(datetime(2025, 1, 30, 9, 0)))
+
+    runs = samples("scheduled_job_runs_total")
+    assert 'scheduled_job_runs_total{job="test_ok",result="ok"} 2' in runs
+    assert 'scheduled_job_runs_total{job="test_boom",result="failed"} 2' in runs
+    assert 'scheduled_job_duration_seconds_count{job="test_ok"} 2' in samples("scheduled_job_duration_seconds")
+    assert any(line.startswith('scheduled_job_lateness_seconds{job="test_ok"}')
+               for line in samples("scheduled_job_lateness_seconds"))
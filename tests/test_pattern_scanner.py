@@ -0,0 +1,107 @@
+# tests/test_pattern_scanner.py
+#
+# Inside-bar / opposite-candle detectors, PatternScanner on a CandleAggregator
+# (start time, dedupe across bars) and the bounded alerted-set.
+from datetime import datetime, time
+
+import numpy as np
+
+from app.config.settings import IST
+from app.strategy.candle_aggregator import CandleAggregator
+from app.strategy.pattern_scanner import (
+    BoundedAlertSet, PatternScanner, format_alerts, inside_bar, opposite_candle,
+)
+
+T0 = int(IST.localize(datetime(2025, 1, 31, 9, 15)).timestamp())
+
+
+def test_inside_bar():
+    high = np.array([[110, 108], [110, 110], [110, 112], [110, 110]], dtype=float)
+    low = np.array([[100, 102], [100, 100], [100, 101], [100, 101]], dtype=float)
+    # inside, identical range (not inside), breaks high, equal high / higher low
+    assert inside_bar(high, low).tolist() == [1, 0, 0, 1]
+
+
+def test_opposite_candle():
+    open_ = np.array([[100, 105], [105, 100], [100, 100], [100, np.nan]])
+    close = np.array([[105, 101], [100, 104], [105, 106], [105, 100]])
+    assert opposite_candle(open_, close).tolist() == [-1, 1, 0, 0]
+
+
+def test_bounded_alert_set_evicts_oldest():
+    seen = BoundedAlertSet(maxsize=3)
+    assert seen.add_many(["a", "b", "a", "c"]) == ["a", "b", "c"]
+    assert seen.add("d") and not seen.add("d")
+    assert len(seen) == 3 and "a" not in seen and "b" in seen
+    assert seen.add("a")                                     # forgotten, so new again
+    seen.clear()
+    assert len(seen) == 0
+
+
+def feed(agg, start, bars):
+    """bars: {sec_id: (open, high, low, close)} for the 5m bucket at `start`."""
+    for sec_id, prices in bars.items():
+        for offset, price in zip((0, 60, 120, 240), prices):
+            agg.update(sec_id, price, start + offset)
+
+
+def test_scanner_reports_new_hits_once_after_start_time():
+    agg = CandleAggregator([1, 2], timeframes=(5,))
+    batches = []
+    scanner = PatternScanner("InsideBar 5m", inside_bar, 5, batches.append,
+                             start_time=time(9, 30), names={1: "AAA"}).attach(agg)
+    assert scanner.fields == ("high", "low")
+
+    mother = {1: (100, 110, 90, 105), 2: (100, 110, 90, 105)}
+    inside = {1: (100, 108, 95, 101), 2: (100, 112, 95, 101)}
+    feed(agg, T0, mother)
+    feed(agg, T0 + 300, inside)                              # closes at 09:25: before start_time
+    feed(agg, T0 + 600, mother)
+    assert batches == []
+
+    feed(agg, T0 + 900, inside)
+    agg.flush(T0 + 1200)                                     # 09:30-09:35 is an inside bar for 1 only
+    assert len(batches) == 1
+    [signal] = batches[0]
+    assert (signal["Security ID"], signal["Stock Name"], signal["Direction"]) == (1, "AAA", 1)
+    assert (signal["High"], signal["Low"], signal["Prev High"], signal["Prev Low"]) == (108, 95, 110, 90)
+
+    assert scanner.scan(agg.buffers[5].last(2), T0 + 900) == []   # same bar again: deduped
+
+
+def test_disabled_scanner_and_other_timeframes_are_ignored():
+    agg = CandleAggregator([1], timeframes=(5, 15))
+    batches = []
+    scanner = PatternScanner("Opposite 15m", opposite_candle, 15, batches.append).attach(agg)
+    scanner.enabled = False
+    for i in range(6):
+        feed(agg, T0 + i * 300, {1: (100, 106, 99, 105) if i < 3 else (105, 106, 99, 100)})
+    agg.flush(T0 + 1800)
+    assert batches == []
+
+    scanner.enabled = True
+    feed(agg, T0 + 1800, {1: (100, 106, 99, 105)})
+    for i in range(1, 3):
+        feed(agg, T0 + 1800 + i * 300, {1: (105, 106, 99, 105)})
+    agg.flush(T0 + 2700)
+    assert [s["Direction"] for s in batches[0]] == [1]
+
+
+def signal(i):
+    return {"Pattern": "InsideBar 5m", "Stock Name": f"STOCK{i}", "Direction": 1,
+            "Bar Start": IST.localize(datetime(2025, 1, 31, 9, 30)),
+            "Open": 100.0, "High": 101.0, "Low": 99.0, "Close": 100.5,
+            "Prev High": 102.0, "Prev Low": 98.0}
+
+
+def test_alerts_are_one_message_per_scan():
+    [msg] = format_alerts([signal(i) for i in range(3)])
+    assert msg.splitlines()[0] == "🔍 InsideBar 5m @ 09:30 | 3 stock(s)"
+    assert len(msg.splitlines()) == 4 and "STOCK2" in msg
+    assert format_alerts([]) == []
+
+
+def test_large_scans_are_split_under_the_limit():
+    messages = format_alerts([signal(i) for i in range(200)], limit=1000)
+    assert len(messages) > 1 and all(len(m) <= 1000 for m in messages)
+    assert sum(len(m.splitlines()) - 1 for m in messages) == 200
@@ -0,0 +1,190 @@
+# tests/test_place_staged.py
+#
+# DhanSuperBroker.place_staged against a stubbed dhanhq client: definite
+# rejections vs. SDK-wrapped transport errors that may have created the order,
+# stale same-tag orders in the book, and the order index seeded after a restart.
+import pytest
+
+from app.config.dhan_auth import dhan
+from app.broker import dhan_super_client
+from app.broker.dhan_super_client import DhanSuperBroker
+from app.broker.order_idempotency import OrderIndex, PLACED, FAILED, IN_FLIGHT
+from app.execution import trade_journal as journal
+
+CID = "ABC_AUTO"
+
+STAGED = {
+    "name": "ABC",
+    "instrument_id": 1234,
+    "side": "BUY",
+    "qty": 10,
+    "sl": 95.0,
+    "target": 107.5,
+    "trailing_jump": 2.5,
+}
+
+
+class StubDhan:
+    """Enough of the dhanhq client for Super Order placement."""
+
+    BUY, SELL = "BUY", "SELL"
+    NSE = "NSE_EQ"
+    LIMIT, MARKET = "LIMIT", "MARKET"
+    INTRA = "INTRADAY"
+
+    def __init__(self, responses, book=None):
+        self.responses = list(responses)
+        self.book = book if book is not None else []
+        self.placed = 0
+        self.book_reads = 0
+
+    def place_super_order(self, **kwargs):
+        self.placed += 1
+        resp = self.responses.pop(0)
+        if isinstance(resp, Exception):
+            raise resp
+        return resp
+
+    def get_super_order_list(self):
+        self.book_reads += 1
+        return {"status": "success", "data": self.book}
+
+
+@pytest.fixture
+def index(monkeypatch):
+    idx = OrderIndex()
+    monkeypatch.setattr(dhan_super_client, "ORDER_INDEX", idx)
+    return idx
+
+
+def place(stub):
+    dhan._reset(stub)
+    try:
+        return DhanSuperBroker(stub).place_staged(dict(STAGED), 100.0, place_retry_sleep=0)
+    finally:
+        dhan._reset(None)
+
+
+def sdk_transport_error(text):
+    # What dhanhq returns when requests raises inside the SDK
+    return {"status": "failure", "remarks": text, "data": ""}
+
+
+def test_success(index):
+    stub = StubDhan([{"status": "success", "data": {"orderId": "OID1"}}])
+    info = place(stub)
+    assert info["order_id"] == "OID1"
+    assert index.get(CID)["state"] == PLACED
+    assert stub.book_reads == 0
+
+
+def test_broker_rejection_is_final(index):
+    reject = {
+        "status": "failure",
+        "remarks": {"error_code": "DH-906", "error_type": "Order_Error", "error_message": "Insufficient funds"},
+        "data": {"errorType": "Order_Error", "errorCode": "DH-906"},
+    }
+    stub = StubDhan([reject])
+    assert place(stub) is None
+    assert index.get(CID)["state"] == FAILED
+    assert stub.placed == 1 and stub.book_reads == 0
+
+
+@pytest.mark.parametrize("remarks", [
+    "HTTPSConnectionPool(host='api.dhan.co', port=443): Read timed out. (read timeout=30)",
+    "('Connection aborted.', RemoteDisconnected('Remote end closed connection without response'))",
+    "Expecting value: line 1 column 1 (char 0)",
+])
+def test_transport_failure_found_in_book(index, remarks):
+    stub = StubDhan(
+        [sdk_transport_error(remarks)],
+        book=[{"orderId": "OID7", "correlationId": CID, "orderStatus": "PENDING"}],
+    )
+    info = place(stub)
+    assert info["order_id"] == "OID7"
+    assert index.get(CID)["state"] == PLACED
+    assert stub.placed == 1 and stub.book_reads == 1
+
+
+def test_transport_failure_not_in_book_retries(index):
+    stub = StubDhan([
+        sdk_transport_error("Read timed out."),
+        {"status": "success", "data": {"orderId": "OID2"}},
+    ])
+    info = place(stub)
+    assert info["order_id"] == "OID2"
+    assert stub.placed == 2 and stub.book_reads == 1
+
+
+def test_unreadable_book_leaves_order_in_flight(index):
+    stub = StubDhan([sdk_transport_error("Read timed out.")])
+    stub.get_super_order_list = lambda: {"status": "failure", "remarks": "Read timed out.", "data": ""}
+    assert place(stub) is None
+    # Outcome unknown: nothing may re-send this correlation ID
+    assert index.get(CID)["state"] == IN_FLIGHT
+    assert place(StubDhan([{"status": "success", "data": {"orderId": "X"}}])) is None
+
+
+def test_duplicate_returns_existing_order(index):
+    stub = StubDhan([{"status": "success", "data": {"orderId": "OID1"}}])
+    first = place(stub)
+    again = place(StubDhan([]))
+    assert again["order_id"] == first["order_id"]
+    assert stub.placed == 1
+
+
+def test_dead_orders_in_book_are_not_matches(index):
+    stub = StubDhan(
+        [sdk_transport_error("Read timed out."), {"status": "success", "data": {"orderId": "OID9"}}],
+        book=[
+            {"orderId": "OLD1", "correlationId": CID, "orderStatus": "CANCELLED"},
+            {"orderId": "OLD2", "correlationId": CID, "orderStatus": "REJECTED"},
+            {"orderId": "OLD3", "correlationId": CID, "orderStatus": "TRADED",
+             "legDetails": [{"legName": "STOP_LOSS_LEG", "orderStatus": "TRADED"}]},
+        ],
+    )
+    info = place(stub)
+    assert info["order_id"] == "OID9"
+    assert stub.placed == 2
+
+
+def test_newest_live_match_wins(index):
+    stub = StubDhan(
+        [sdk_transport_error("Read timed out.")],
+        book=[
+            {"orderId": "NEW", "correlationId": CID, "orderStatus": "PENDING", "createTime": "2025-01-31 10:05:00"},
+            {"orderId": "OLD", "correlationId": CID, "orderStatus": "PENDING", "createTime": "2025-01-31 09:20:00"},
+        ],
+    )
+    assert place(stub)["order_id"] == "NEW"
+
+
+def _replayed(*events):
+    state = journal.JournalState()
+    for event in events:
+        state.apply(event)
+    return state
+
+
+def test_restart_after_cancelled_order_places_again(index):
+    state = _replayed(
+        {"event": journal.ORDER_PLACED, "correlation_id": CID, "order_id": "OID1",
+         "entry": 100.0, "sl": 95.0, "qty": 10, "side": "BUY"},
+        {"event": journal.ORDER_FAILED, "correlation_id": CID, "reason": "PARENT_CANCELLED"},
+    )
+    index.seed(state.positions)
+    assert index.get(CID) is None
+
+    stub = StubDhan([{"status": "success", "data": {"orderId": "OID2"}}])
+    assert place(stub)["order_id"] == "OID2"
+    assert stub.placed == 1
+
+
+def test_restart_with_live_order_does_not_resend(index):
+    state = _replayed({"event": journal.ORDER_PLACED, "correlation_id": CID, "order_id": "OID1",
+                       "entry": 100.0, "sl": 95.0, "qty": 10, "side": "BUY"})
+    index.seed(state.positions)
+
+    stub = StubDhan([])
+    assert place(stub)["order_id"] == "OID1"
+    assert stub.placed == 0
@@ -0,0 +1,47 @@
+# tests/test_position_sizing.py
+#
+# Single and batch position sizing: risk cap vs fund * leverage, invalid
+# SL / price rows, and the batch agreeing with the per-candidate path.
+import numpy as np
+import pytest
+
+from app.broker import position_sizing as ps
+from app.broker.position_sizing import calculate_position_size, calculate_position_size_batch
+
+LEVERAGE = {2885: 5.0, 1594: 1.0}
+
+
+@pytest.fixture(autouse=True)
+def account(monkeypatch):
+    monkeypatch.setattr(ps, "get_cached_fund", lambda: 20000.0)
+    monkeypatch.setattr(ps, "get_leverage", lambda sid: LEVERAGE.get(int(float(sid)), 1.0))
+    monkeypatch.setattr(ps, "get_leverage_batch",
+                        lambda ids: np.array([LEVERAGE.get(int(i), 1.0) for i in ids]))
+
+
+def test_single_sizing_takes_the_smaller_cap():
+    assert calculate_position_size(100.0, 100.0, 98.0, "2885") == (500, 1000.0, 50000.0)      # risk-capped
+    assert calculate_position_size(1000.0, 1000.0, 990.0, "1594") == (20, 200.0, 20000.0)     # fund-capped
+    assert calculate_position_size(100.0, 100.0, 100.0, "2885") == (0, 0.0, 0.0)
+
+
+def test_batch_matches_single():
+    prices, entries, sls, ids = [100.0, 1000.0, 250.0], [100.0, 1000.0, 249.0], [98.0, 990.0, 255.0], ["2885", 1594, "1594.0"]
+    qty, risk, exposure = calculate_position_size_batch(prices, entries, sls, ids)
+    for i in range(3):
+        assert (qty[i], risk[i], exposure[i]) == pytest.approx(calculate_position_size(prices[i], entries[i], sls[i], ids[i]))
+
+
+def test_batch_invalid_rows_and_fixed_inputs():
+    qty, risk, exposure = calculate_position_size_batch(
+        [100.0, 0.0, 100.0], [100.0, 100.0, 100.0], [98.0, 98.0, 100.0], [1, 2, 3],
+        max_loss=500, fund=1000.0, leverage=2.0,
+    )
+    assert qty.tolist() == [20, 0, 0]                         # fund 1000 x 2 / 100; bad price; zero SL
+    assert risk.tolist() == [40.0, 0.0, 0.0]
+    assert exposure.tolist() == [2000.0, 0.0, 0.0]
+
+
+def test_empty_batch():
+    qty, risk, exposure = calculate_position_size_batch([], [], [], [], fund=1000.0, leverage=1.0)
+    assert qty.shape == risk.shape == exposure.shape == (0,)
@@ -0,0 +1,158 @@
+# tests/test_reconciler.py
+#
+# reconcile() against hand-built broker snapshots: adopting journal-less bot
+# orders, closing finished ones, marking fills, and failed snapshot sources.
+import pytest
+
+from app.execution import reconciler
+from app.execution import trade_journal as journal
+from app.execution.reconciler import reconcile
+
+CID = "ABC_AUTO"
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    events = []
+    monkeypatch.setattr(journal, "record", lambda event, **fields: events.append((event, fields)))
+    return events
+
+
+def super_order(cid=CID, status="PENDING", oid="OID1", sec_id=1234, sl_leg="PENDING", tgt_leg="PENDING"):
+    return {
+        "orderId": oid,
+        "correlationId": cid,
+        "orderStatus": status,
+        "securityId": str(sec_id),
+        "transactionType": "BUY",
+        "price": 100.0,
+        "quantity": 10,
+        "legDetails": [
+            {"legName": "STOP_LOSS_LEG", "orderStatus": sl_leg, "price": 95.0},
+            {"legName": "TARGET_LEG", "orderStatus": tgt_leg, "price": 107.5},
+        ],
+    }
+
+
+def snapshot(super_orders=(), orders=(), positions=()):
+    return {
+        "super_orders": None if super_orders is None else list(super_orders),
+        "orders": None if orders is None else list(orders),
+        "positions": None if positions is None else list(positions),
+    }
+
+
+def journaled(*events):
+    state = journal.JournalState()
+    for event in events:
+        state.apply(event)
+    return state
+
+
+PLACED = {"event": journal.ORDER_PLACED, "correlation_id": CID, "order_id": "OID1",
+          "stock": {"Stock Name": "ABC", "Security ID": 1234}, "entry": 100.0, "sl": 95.0, "qty": 10, "side": "BUY"}
+
+
+def test_adopts_pending_bot_order(recorded):
+    state = journal.JournalState()
+    live = reconcile(state, snapshot([super_order()]))
+
+    assert [p["correlation_id"] for p in live] == [CID]
+    assert state.positions[CID]["sl"] == 95.0
+    assert [e for e, _ in recorded] == [journal.ORDER_PLACED]
+    assert recorded[0][1]["source"] == "reconcile"
+
+
+def test_adopts_traded_order_with_open_position(recorded):
+    state = journal.JournalState()
+    live = reconcile(state, snapshot([super_order(status="TRADED")], positions=[{"securityId": "1234", "netQty": 10}]))
+
+    assert state.positions[CID]["status"] == journal.OPEN
+    assert [p["correlation_id"] for p in live] == [CID]
+    assert [e for e, _ in recorded] == [journal.ORDER_PLACED, journal.FILLED]
+
+
+@pytest.mark.parametrize("order", [
+    super_order(status="CANCELLED"),
+    super_order(status="REJECTED"),
+    super_order(status="EXPIRED"),
+    super_order(status="TRADED", sl_leg="TRADED"),
+    super_order(status="TRADED"),                         # flat: exited outside the legs
+])
+def test_does_not_adopt_finished_orders(recorded, order):
+    state = journal.JournalState()
+    live = reconcile(state, snapshot([order], positions=[{"securityId": "1234", "netQty": 0}]))
+
+    assert live == []
+    assert state.positions == {}
+    assert state.trades_filled() == 0
+    assert recorded == []
+
+
+def test_ignores_orders_of_other_tags(recorded):
+    state = journal.JournalState()
+    assert reconcile(state, snapshot([super_order(cid="MANUAL")])) == []
+    assert state.positions == {}
+
+
+def test_closes_position_whose_stop_loss_hit(recorded):
+    state = journaled(PLACED, {"event": journal.FILLED, "correlation_id": CID})
+    live = reconcile(state, snapshot([super_order(status="TRADED", sl_leg="TRADED")]))
+
+    assert live == []
+    assert state.positions[CID]["status"] == journal.CLOSED
+    assert state.positions[CID]["exit_reason"] == "STOP_LOSS_HIT"
+    assert recorded == [(journal.EXITED, {"correlation_id": CID, "reason": "STOP_LOSS_HIT", "source": "reconcile"})]
+
+
+def test_cancelled_entry_is_failed_not_filled(recorded):
+    state = journaled(PLACED)
+    assert reconcile(state, snapshot([super_order(status="CANCELLED")])) == []
+
+    assert state.positions[CID]["status"] == journal.CLOSED
+    assert state.trades_filled() == 0
+    assert [e for e, _ in recorded] == [journal.ORDER_FAILED]
+
+
+def test_marks_fill_of_pending_position(recorded):
+    state = journaled(PLACED)
+    live = reconcile(state, snapshot([super_order(status="TRADED")], positions=[{"securityId": "1234", "netQty": 10}]))
+
+    assert live == [state.positions[CID]]
+    assert state.positions[CID]["status"] == journal.OPEN
+    assert [e for e, _ in recorded] == [journal.FILLED]
+
+
+def test_falls_back_to_order_book_status(recorded):
+    state = journaled(PLACED)
+    live = reconcile(state, snapshot([], orders=[{"correlationId": CID, "orderStatus": "EXPIRED"}]))
+
+    assert live == []
+    assert state.positions[CID]["exit_reason"] == "EXPIRED"
+
+
+def test_unknown_at_broker_keeps_local_state(recorded):
+    state = journaled(PLACED)
+    assert reconcile(state, snapshot([])) == [state.positions[CID]]
+    assert recorded == []
+
+
+def test_missing_super_orders_skips_reconciliation(recorded):
+    state = journaled(PLACED)
+    live = reconcile(state, snapshot(None, orders=None, positions=None))
+
+    assert live == state.live_positions()
+    assert recorded == []
+
+
+def test_missing_positions_still_adopts_traded_order(recorded):
+    state = journal.JournalState()
+    live = reconcile(state, snapshot([super_order(status="TRADED")], positions=None))
+    assert [p["correlation_id"] for p in live] == [CID]
+
+
+def test_records_unwraps_sdk_responses():
+    assert reconciler._records({"status": "success", "data": [{"a": 1}]}) == [{"a": 1}]
+    assert reconciler._records('{"status": "success", "data": {"a": 1}}') == [{"a": 1}]
+    assert reconciler._records({"status": "success", "data": None}) == []
+    assert reconciler._records({"status": "failure", "remarks": "timeout"}) is None
@@ -0,0 +1,71 @@
+# tests/test_sampling_profiler.py
+#
+# SamplingProfiler: busy threads are sampled (whatever their functions are
+# called), threads parked in stdlib waits are not, and the collapsed output.
+import threading
+
+import pytest
+
+from app.utils.sampling_profiler import SamplingProfiler, ProfilerBusy
+
+
+@pytest.fixture
+def threads():
+    stop = threading.Event()
+    started = []
+
+    def start(target, name):
+        t = threading.Thread(target=target, args=(stop,), name=name, daemon=True)
+        t.start()
+        started.append(t)
+
+    yield start
+    stop.set()
+    for t in started:
+        t.join(5)
+
+
+def get(stop):
+    # App code that happens to share a name with queue.Queue.get
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def parked(stop):
+    stop.wait()
+
+
+def test_busy_app_function_named_get_is_sampled(threads, tmp_path):
+    threads(get, "busy-get")
+    threads(parked, "parked")
+
+    prof = SamplingProfiler(duration=0.3, rate=200).run()
+
+    busy = [s for s in prof.stacks if s.startswith("busy-get;")]
+    assert busy and all(";get (" in s for s in busy)
+    assert not any(s.startswith("parked;") for s in prof.stacks)
+    assert prof.samples > 0
+
+    path = prof.write_collapsed(str(tmp_path / "out" / "p.folded"))
+    with open(path) as fh:
+        line = fh.readline().rsplit(" ", 1)
+    assert int(line[1]) > 0
+
+
+def test_idle_option_keeps_waiting_threads(threads):
+    threads(parked, "parked")
+    prof = SamplingProfiler(duration=0.1, rate=200, idle=True).run()
+    assert any(s.startswith("parked;") for s in prof.stacks)
+
+
+def test_one_profile_at_a_time(threads):
+    first = SamplingProfiler(duration=0.3, rate=50)
+    runner = threading.Thread(target=first.run)
+    runner.start()
+    try:
+        while not first.samples:
+            pass
+        with pytest.raises(ProfilerBusy):
+            SamplingProfiler(duration=0.01).run()
+    finally:
+        runner.join()
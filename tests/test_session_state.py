@@ -0,0 +1,76 @@
+# tests/test_session_state.py
+#
+# SessionState: read-only snapshots, copy-on-write updates, persistence
+# across restarts and the fresh state on a new IST day.
+import json
+import threading
+
+import pytest
+
+from app.bot.session_state import SessionState
+
+
+@pytest.fixture
+def state_dir(tmp_path):
+    return str(tmp_path / "state")
+
+
+def test_defaults_and_readonly_snapshot(vclock, state_dir):
+    session = SessionState(state_dir)
+    snap = session.get()
+    assert snap["date"] == "20250131"
+    assert session["trade_executed"] is False
+    with pytest.raises(TypeError):
+        snap["trade_executed"] = True
+
+
+def test_update_swaps_snapshot_and_persists(vclock, state_dir):
+    session = SessionState(state_dir)
+    before = session.get()
+    after = session.update(trade_executed=True)
+
+    assert before["trade_executed"] is False        # old snapshot untouched
+    assert after["trade_executed"] is True
+    assert after["updated_at"].startswith("2025-01-31T09:15")
+    with open(session.path("20250131")) as fh:
+        assert json.load(fh)["trade_executed"] is True
+
+
+def test_restart_restores_todays_state(vclock, state_dir):
+    SessionState(state_dir).update(trade_executed=True, trades_taken=1)
+    restored = SessionState(state_dir)
+    assert restored["trade_executed"] is True
+    assert restored["trades_taken"] == 1
+
+
+def test_new_day_starts_fresh(vclock, state_dir):
+    session = SessionState(state_dir)
+    session.update(trade_executed=True, insidebar_done=True)
+
+    vclock.advance(24 * 3600)
+    assert session["date"] == "20250201"
+    assert session["trade_executed"] is False
+    assert session["insidebar_done"] is False
+
+
+def test_unreadable_file_starts_fresh(vclock, state_dir):
+    session = SessionState(state_dir)
+    session.update(trade_executed=True)
+    with open(session.path("20250131"), "w") as fh:
+        fh.write("{not json")
+    assert SessionState(state_dir)["trade_executed"] is False
+
+
+def test_concurrent_increments_are_not_lost(vclock, state_dir):
+    session = SessionState(state_dir)
+
+    def bump():
+        for _ in range(25):
+            session.increment("alerts_sent")
+
+    threads = [threading.Thread(target=bump) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert session["alerts_sent"] == 100
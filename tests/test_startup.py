@@ -0,0 +1,75 @@
+# tests/test_startup.py
+#
+# LazyObject (built once on first use, even under concurrent first access),
+# startup timings and background warm-up.
+import threading
+import time
+from concurrent.futures import wait
+
+from app.utils import startup
+from app.utils.startup import LazyObject, startup_report, timed, warm_up
+
+
+class Client:
+    timeout = 5
+
+    def ping(self):
+        return "pong"
+
+
+def test_lazy_object_builds_on_first_use():
+    built = []
+    lazy = LazyObject(lambda: built.append(1) or Client(), "test-client")
+    assert built == [] and "pending" in repr(lazy)
+
+    assert lazy.ping() == "pong"
+    lazy.timeout = 10                                          # attribute writes reach the client
+    assert lazy.timeout == 10 and built == [1] and "ready" in repr(lazy)
+
+
+def test_lazy_object_concurrent_first_access_builds_once():
+    built = []
+
+    def factory():
+        time.sleep(0.05)
+        built.append(1)
+        return Client()
+
+    lazy = LazyObject(factory, "test-slow")
+    threads = [threading.Thread(target=lazy.ping) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert built == [1]
+
+
+def test_lazy_object_reset():
+    lazy = LazyObject(Client, "test-reset")
+    first = lazy._resolve()
+    stub = Client()
+    lazy._reset(stub)
+    assert lazy._resolve() is stub
+    lazy._reset()
+    assert lazy._resolve() not in (first, stub)
+
+
+def test_timings_and_report(monkeypatch):
+    monkeypatch.setattr(startup, "_TIMINGS", [])
+    with timed("test-fast"):
+        pass
+    with timed("test-slow"):
+        time.sleep(0.02)
+    lines = startup_report().splitlines()
+    assert lines[0].startswith("⏱️ Startup report")
+    assert lines[1].endswith("| test-slow") and lines[2].endswith("| test-fast")
+
+
+def test_warm_up_runs_tasks_and_survives_failures(monkeypatch):
+    monkeypatch.setattr(startup, "_TIMINGS", [])
+    done = []
+    futures = warm_up({"ok": lambda: done.append("ok"), "boom": lambda: 1 / 0})
+    wait(futures, timeout=5)
+    assert done == ["ok"]
+    assert all(f.exception() is None for f in futures)
+    assert {t[0] for t in startup._TIMINGS} == {"warm-up ok", "warm-up boom"}
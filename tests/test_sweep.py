@@ -0,0 +1,83 @@
+# tests/test_sweep.py
+#
+# Sweep ranking per objective (direction and ties), parameter spaces, and
+# the shared-memory dataset round trip used by pool workers.
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.backtest import sweep
+from app.backtest.sweep import OBJECTIVES, DEFAULT_PARAMS, SharedOHLC, grid, random_search, rank
+
+
+@pytest.fixture
+def result():
+    return pd.DataFrame({
+        "trailing_multiplier": [0.25, 0.5, 1.0, 2.0],
+        "total_pnl": [1000.0, 3000.0, 2000.0, 3000.0],
+        "win_rate": [0.6, 0.5, 0.6, 0.4],
+        "max_drawdown": [500.0, 1500.0, 500.0, 800.0],
+    })
+
+
+def test_rank_maximises_by_default_direction(result):
+    assert rank(result, "total_pnl")["trailing_multiplier"].tolist() == [0.5, 2.0, 1.0, 0.25]   # stable on ties
+
+
+def test_rank_ties_go_to_higher_pnl(result):
+    assert rank(result, "win_rate")["trailing_multiplier"].tolist() == [1.0, 0.25, 0.5, 2.0]
+
+
+def test_rank_minimises_drawdown(result):
+    assert rank(result, "max_drawdown")["trailing_multiplier"].tolist() == [1.0, 0.25, 2.0, 0.5]
+
+
+def test_rank_rejects_unknown_objective_and_tolerates_missing_columns(result):
+    with pytest.raises(ValueError):
+        rank(result, "sharpe")
+    assert rank(result, "avg_r") is result
+    assert rank(pd.DataFrame(), "total_pnl").empty
+    assert set(OBJECTIVES.values()) == {"max", "min"}
+
+
+def test_grid():
+    sets = grid(trailing_multiplier=[0.25, 0.5], target_rr=[1.5, 2, 3])
+    assert len(sets) == 6
+    assert sets[0] == {"trailing_multiplier": 0.25, "target_rr": 1.5}
+    assert sets[-1] == {"trailing_multiplier": 0.5, "target_rr": 3}
+
+
+def test_random_search_is_seeded_and_in_range():
+    space = {"target_rr": (1.0, 3.0), "max_loss": (500, 1500), "buy_buffer": [0, 50]}
+    sets = random_search(space, n=50, seed=7)
+    assert sets == random_search(space, n=50, seed=7)
+    assert all(1.0 <= s["target_rr"] <= 3.0 for s in sets)
+    assert all(isinstance(s["max_loss"], int) and 500 <= s["max_loss"] <= 1500 for s in sets)
+    assert {s["buy_buffer"] for s in sets} == {0, 50}
+
+
+def test_shared_dataset_round_trip():
+    ohlc = {col: np.arange(3, dtype=float) + i for i, col in enumerate(("Open", "High", "Low", "Close"))}
+    shared = SharedOHLC(ohlc, {"candidates": [], "nifty": {"d": (1.0, 2.0)}, "fund": 5, "leverage": 2.0})
+    try:
+        data = sweep._attach(shared.spec)
+        assert data["nifty"] == {"d": (1.0, 2.0)} and data["fund"] == 5
+        assert data["ohlc"]["Close"].tolist() == [3.0, 4.0, 5.0]
+        assert not data["ohlc"]["High"].flags.writeable
+        assert sweep._attach(shared.spec) is data                       # same dataset: reused
+    finally:
+        sweep._detach()
+        shared.close()
+
+
+def test_sweep_prepared_fills_defaults_and_ranks():
+    ohlc = {col: np.ones(2) for col in ("Open", "High", "Low", "Close")}
+    with ThreadPoolExecutor(2) as pool:
+        result = sweep.sweep_prepared([], {}, ohlc, grid(target_rr=[1.5, 2.0]), executor=pool)
+        sweep._detach()
+    assert len(result) == 2 and (result["trades"] == 0).all()
+    assert (result["max_loss"] == DEFAULT_PARAMS["max_loss"]).all()
+    with pytest.raises(ValueError):
+        sweep.sweep_prepared([], {}, ohlc, [], sort_by="sharpe")
@@ -0,0 +1,137 @@
+# tests/test_trade_journal.py
+#
+# TradeJournal append -> replay round trip, torn-line recovery, and fsync
+# batching (appends don't sync inline; the flusher thread does).
+import os
+import json
+import time
+
+import pytest
+
+from app.execution import trade_journal as journal
+from app.execution.trade_journal import TradeJournal, replay
+
+CID = "ABC_AUTO"
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "journal" / "trades_20250131.jsonl")
+
+
+@pytest.fixture
+def fsyncs(monkeypatch):
+    calls = []
+    real = os.fsync
+
+    def counting(fd):
+        calls.append(fd)
+        real(fd)
+
+    monkeypatch.setattr(journal.os, "fsync", counting)
+    return calls
+
+
+def write(path, *events, **kwargs):
+    j = TradeJournal(path, **kwargs)
+    try:
+        for event, fields in events:
+            j.append(event, **fields)
+    finally:
+        j.close()
+
+
+def test_round_trip_rebuilds_positions(path):
+    stock = {"Stock Name": "ABC", "Security ID": 1234}
+    write(
+        path,
+        (journal.SIGNAL, {"stock": stock}),
+        (journal.ORDER_PLACED, {"correlation_id": CID, "stock": stock, "order_id": "OID1",
+                                "entry": 100.0, "sl": 95.0, "qty": 10, "side": "BUY"}),
+        (journal.FILLED, {"correlation_id": CID}),
+        (journal.MODIFIED, {"correlation_id": CID, "action": "TRAIL_SL", "sl": 100.0}),
+        (journal.ORDER_PLACED, {"correlation_id": "XYZ_AUTO", "order_id": "OID2", "qty": 5}),
+        (journal.ORDER_FAILED, {"correlation_id": "XYZ_AUTO", "reason": "PARENT_CANCELLED"}),
+    )
+
+    state = replay(path)
+    assert state.events == 6
+    assert len(state.signals) == 1
+
+    pos = state.positions[CID]
+    assert pos["status"] == journal.OPEN
+    assert pos["filled"] and pos["partial_done"]
+    assert (pos["sl"], pos["trail_sl"]) == (95.0, 100.0)       # 1R keeps the original SL
+    assert pos["stock"] == stock
+
+    assert state.positions["XYZ_AUTO"]["status"] == journal.CLOSED
+    assert state.live_positions() == [pos]
+    assert state.trades_filled() == 1
+
+
+def test_exit_closes_position(path):
+    write(
+        path,
+        (journal.ORDER_PLACED, {"correlation_id": CID, "order_id": "OID1"}),
+        (journal.FILLED, {"correlation_id": CID}),
+        (journal.EXITED, {"correlation_id": CID, "reason": "TARGET_HIT"}),
+    )
+    pos = replay(path).positions[CID]
+    assert pos["status"] == journal.CLOSED
+    assert pos["exit_reason"] == "TARGET_HIT"
+
+
+def test_missing_file_is_empty_state(path):
+    state = replay(path)
+    assert state.events == 0 and state.positions == {}
+
+
+def test_torn_last_line_is_skipped_and_terminated(path):
+    write(path, (journal.ORDER_PLACED, {"correlation_id": CID, "order_id": "OID1"}))
+    with open(path, "ab") as fh:
+        fh.write(b'{"event":"FILLED","correlation_id":"ABC')      # crash mid-write
+
+    assert replay(path).positions[CID]["status"] == journal.PENDING
+
+    write(path, (journal.FILLED, {"correlation_id": CID}))          # reopen after the crash
+    state = replay(path)
+    assert state.positions[CID]["status"] == journal.OPEN
+    with open(path, "rb") as fh:
+        lines = fh.read().splitlines()
+    assert json.loads(lines[-1])["event"] == journal.FILLED
+
+
+def test_append_does_not_fsync_inline(path, fsyncs):
+    j = TradeJournal(path, fsync_interval=3600, fsync_every=1000)
+    try:
+        for i in range(20):
+            j.append(journal.SIGNAL, n=i)
+        assert fsyncs == []
+        with open(path, "rb") as fh:
+            assert len(fh.read().splitlines()) == 20    # written through to the OS
+    finally:
+        j.close()
+    assert len(fsyncs) == 1                             # close() syncs what's pending
+
+
+def test_fsync_every_forces_inline_sync(path, fsyncs):
+    j = TradeJournal(path, fsync_interval=3600, fsync_every=5)
+    try:
+        for i in range(12):
+            j.append(journal.SIGNAL, n=i)
+        assert len(fsyncs) == 2
+    finally:
+        j.close()
+
+
+def test_flusher_thread_syncs_pending_writes(path, fsyncs):
+    j = TradeJournal(path, fsync_interval=0.02, fsync_every=1000)
+    try:
+        j.append(journal.SIGNAL, n=1)
+        deadline = time.monotonic() + 2
+        while j._pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert j._pending == 0
+        assert fsyncs
+    finally:
+        j.close()
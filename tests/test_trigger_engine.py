@@ -0,0 +1,113 @@
+# tests/test_trigger_engine.py
+#
+# TriggerEngine: arm / re-arm, fire and invalidate for BUY and SELL levels,
+# one-shot firing, the per-batch trigger limit and callbacks.
+import pytest
+
+from app.execution.trigger_engine import INVALIDATED, TRIGGERED, TriggerEngine
+
+
+@pytest.fixture
+def engine():
+    engine = TriggerEngine()
+    engine.fired, engine.dropped = [], []
+    engine.on_trigger(engine.fired.append)
+    engine.on_invalidate(engine.dropped.append)
+    return engine
+
+
+def test_arm_counts_and_ids(engine):
+    engine.arm(30, "buy", entry=101.5, invalidation=99.0, payload="a")
+    engine.arm("10", "SELL", entry=49.0, invalidation=52.0)
+    engine.arm(30, "SELL", entry=95.0, invalidation=103.0)         # same symbol, other side
+    assert engine.armed == 3
+    assert engine.armed_ids() == [10, 30]
+
+
+@pytest.mark.parametrize("side, entry, invalid, quiet, through", [
+    ("BUY", 101.5, 99.0, 101.4, 101.5),                            # fires at / above entry
+    ("SELL", 49.0, 52.0, 49.1, 48.0),                              # fires at / below entry
+])
+def test_fire_once_per_side(engine, side, entry, invalid, quiet, through):
+    engine.arm(7, side, entry, invalid, payload={"rank": 1})
+    assert engine.update([7], [quiet]) == []
+
+    [ev] = engine.update([7], [through])
+    assert ev["event"] == TRIGGERED
+    assert (ev["security_id"], ev["side"], ev["entry"], ev["invalidation"], ev["price"]) == (7, side, entry, invalid, through)
+    assert ev["payload"] == {"rank": 1}
+    assert engine.fired == [ev] and engine.armed == 0
+
+    assert engine.update([7], [through]) == []                     # disarmed after firing
+    assert len(engine.fired) == 1
+
+
+@pytest.mark.parametrize("side, entry, invalid, at_invalid", [
+    ("BUY", 101.5, 99.0, 99.0),
+    ("SELL", 49.0, 52.0, 52.5),
+])
+def test_invalidation_per_side(engine, side, entry, invalid, at_invalid):
+    engine.arm(7, side, entry, invalid)
+    assert engine.update([7], [at_invalid]) == []
+    [ev] = engine.dropped
+    assert (ev["event"], ev["side"], ev["price"]) == (INVALIDATED, side, at_invalid)
+    assert engine.armed == 0
+    assert engine.update([7], [entry]) == []                       # never fires afterwards
+
+
+def test_first_crossing_tick_in_a_batch_wins(engine):
+    engine.arm(7, "BUY", 101.5, 99.0)
+    # invalid first, then through entry: the invalidation applies
+    assert engine.update([7, 7], [98.0, 102.0]) == []
+    assert len(engine.dropped) == 1
+
+    engine.arm(8, "BUY", 101.5, 99.0)
+    [ev] = engine.update([8, 8], [102.0, 98.0])
+    assert ev["price"] == 102.0 and len(engine.dropped) == 1
+
+
+def test_rearm_replaces_levels(engine):
+    engine.arm(7, "BUY", 101.5, 99.0)
+    engine.arm(7, "BUY", 105.0, 100.0)
+    assert engine.armed == 1
+    assert engine.update([7], [102.0]) == []
+    [ev] = engine.update([7], [105.0])
+    assert ev["entry"] == 105.0
+
+
+def test_limit_keeps_later_triggers_armed(engine):
+    for sec_id, entry in [(1, 10.0), (2, 20.0), (3, 30.0)]:
+        engine.arm(sec_id, "BUY", entry, entry - 1)
+
+    [ev] = engine.update([3, 1, 2], [31.0, 11.0, 21.0], limit=1)
+    assert ev["security_id"] == 3                                  # earliest tick first
+    assert engine.armed == 2
+
+    assert engine.update([1, 2], [5.0, 21.0], limit=0) == []       # invalidations only
+    assert engine.armed_ids() == [2]
+    assert [e["security_id"] for e in engine.update([2], [21.0])] == [2]
+
+
+def test_disarm_and_unknown_ids(engine):
+    engine.arm(1, "BUY", 10.0, 9.0)
+    engine.arm(2, "SELL", 20.0, 21.0)
+    assert engine.update([99], [1.0]) == []
+    engine.disarm(1)
+    assert engine.armed_ids() == [2]
+    engine.disarm()
+    assert engine.armed == 0 and engine.update([1, 2], [10.0, 20.0]) == []
+
+
+def test_ingest_quotes_skips_missing_prices(engine):
+    engine.arm(1, "BUY", 10.0, 9.0)
+    engine.arm(2, "SELL", 20.0, 21.0)
+    events = engine.ingest_quotes({"1": {"last_price": 10.5}, "2": {}})
+    assert [e["security_id"] for e in events] == [1]
+    assert engine.ingest_quotes({}) == []
+
+
+def test_callback_can_rearm(engine):
+    engine.on_trigger(lambda ev: engine.arm(ev["security_id"], ev["side"], ev["entry"], ev["invalidation"]))
+    engine.arm(1, "BUY", 10.0, 9.0)
+    engine.update([1], [10.0])
+    assert engine.armed == 1
@@ -0,0 +1,62 @@
+# tests/test_walk_forward.py
+#
+# Walk-forward folds (window layout, step) and the per-fold dataset cache
+# (hit on unchanged inputs, miss on changes, unreadable files rebuilt).
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from app.backtest.engine import prepare_bars
+from app.backtest.walk_forward import fold_dataset, make_folds
+
+DAYS = [date(2025, 1, 1) + timedelta(days=i) for i in range(10)]
+
+
+def test_make_folds_back_to_back():
+    folds = make_folds(reversed(DAYS), in_sample=4, out_sample=2)
+    assert [(f[0][0], f[1]) for f in folds] == [
+        (DAYS[0], DAYS[4:6]), (DAYS[2], DAYS[6:8]), (DAYS[4], DAYS[8:10]),
+    ]
+    assert all(len(is_days) == 4 for is_days, _ in folds)
+
+
+def test_make_folds_step_and_short_history():
+    assert len(make_folds(DAYS, in_sample=4, out_sample=2, step=1)) == 5
+    assert make_folds(DAYS[:5], in_sample=4, out_sample=2) == []
+
+
+@pytest.fixture
+def data():
+    bars = prepare_bars(pd.DataFrame({
+        "datetime": [f"{d} 09:30" for d in DAYS[:3]],
+        "security id": [2885] * 3,
+        "open": [100.0, 101.0, 102.0], "high": [101.0] * 3, "low": [99.0] * 3, "close": [100.5] * 3,
+    }))
+    signals = pd.DataFrame({"Date": pd.Series([], dtype=object)})
+    nifty = {d: (22000.0, 21900.0) for d in DAYS[:3]}
+    return signals, bars, nifty
+
+
+def test_fold_dataset_is_cached(data, tmp_path):
+    signals, bars, nifty = data
+    first = fold_dataset(signals, bars, nifty, DAYS[:2], cache_dir=str(tmp_path))
+    assert first.get("built") and first["ohlc"]["Open"].tolist() == [100.0, 101.0]
+    assert set(first["nifty"]) == set(DAYS[:2]) and first["candidates"] == []
+
+    again = fold_dataset(signals, bars, nifty, DAYS[:2], cache_dir=str(tmp_path))
+    assert "built" not in again and again["key"] == first["key"]
+
+    other = fold_dataset(signals, bars, nifty, DAYS[1:3], cache_dir=str(tmp_path))
+    assert other.get("built") and other["key"] != first["key"]
+
+    bars.loc[0, "Close"] = 99.0                                # same days, changed input
+    assert fold_dataset(signals, bars, nifty, DAYS[:2], cache_dir=str(tmp_path)).get("built")
+
+
+def test_unreadable_fold_cache_is_rebuilt(data, tmp_path):
+    signals, bars, nifty = data
+    first = fold_dataset(signals, bars, nifty, DAYS[:2], cache_dir=str(tmp_path))
+    (tmp_path / f"fold_{first['key']}.pkl").write_bytes(b"not a pickle")
+    again = fold_dataset(signals, bars, nifty, DAYS[:2], cache_dir=str(tmp_path))
+    assert again.get("built") and again["key"] == first["key"]
@@ -0,0 +1,55 @@
+# tests/test_watchdog.py
+#
+# call_with_timeout: deadlines, per-lane workers, and calls still running
+# (not queued behind hung ones) when a lane's workers are all held.
+import threading
+
+import pytest
+
+from app.execution import watchdog
+from app.execution.watchdog import BrokerCallTimeout, call_with_timeout, ORDERS, QUOTES
+
+
+@pytest.fixture
+def lanes(monkeypatch):
+    small = {name: watchdog._CallLane(name, 2) for name in (watchdog.QUOTES, watchdog.ORDERS, watchdog.MONITOR)}
+    monkeypatch.setattr(watchdog, "_LANES", small)
+    return small
+
+
+@pytest.fixture
+def hang():
+    release = threading.Event()
+    yield lambda: release.wait(10)
+    release.set()
+
+
+def test_returns_result_and_raises_errors(lanes):
+    assert call_with_timeout(lambda x, y=0: x + y, 1, y=2) == 3
+    with pytest.raises(ZeroDivisionError):
+        call_with_timeout(lambda: 1 / 0)
+
+
+def test_timeout_leaves_call_running(lanes, hang):
+    with pytest.raises(BrokerCallTimeout):
+        call_with_timeout(hang, timeout=0.05, name="hung")
+    assert lanes[ORDERS].busy == 1
+
+
+def test_saturated_lane_still_runs_new_calls(lanes, hang):
+    for _ in range(3):      # two hold the pool, the third runs on an overflow thread
+        with pytest.raises(BrokerCallTimeout):
+            call_with_timeout(hang, timeout=0.05)
+    assert (lanes[ORDERS].busy, lanes[ORDERS].overflow) == (2, 1)
+
+    assert call_with_timeout(lambda: "ok", timeout=1) == "ok"
+    assert "2/2 orders workers busy" in lanes[ORDERS].occupancy()
+
+
+def test_lanes_are_independent(lanes, hang):
+    for _ in range(2):
+        with pytest.raises(BrokerCallTimeout):
+            call_with_timeout(hang, timeout=0.05, lane=ORDERS)
+
+    assert call_with_timeout(lambda: "quote", timeout=1, lane=QUOTES) == "quote"
+    assert lanes[QUOTES].busy == 0 and lanes[QUOTES].overflow == 0
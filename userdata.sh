@@ -70,6 +70,16 @@ mkdir -p logs outputs
 chmod -R 755 logs outputs
 chown -R $APP_USER:$APP_USER logs outputs
 
+# -----------------------------
+# Key for the encrypted SSM secret cache (fast restarts)
+# -----------------------------
+sudo mkdir -p /etc/trading-bot-algo
+if [ ! -f /etc/trading-bot-algo/env ]; then
+  SSM_CACHE_KEY=$(venv/bin/python -c "from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())")
+  echo "SSM_CACHE_KEY=$SSM_CACHE_KEY" | sudo tee /etc/trading-bot-algo/env > /dev/null
+  sudo chmod 600 /etc/trading-bot-algo/env
+fi
+
 # -----------------------------
 # PYTHONPATH
 # -----------------------------
@@ -78,42 +88,54 @@ grep -q "export PYTHONPATH=" /home/$APP_USER/.bashrc || \
   echo "export PYTHONPATH=$PWD" >> /home/$APP_USER/.bashrc
 
 # -----------------------------
-# Upload ONLY /var/log/trading-bot-algo.log to S3
+# Logs: the bot ships gzip chunks of its own log to
+# $S3_BUCKET/$S3_PREFIX/logs/dt=YYYY-MM-DD/<host>/ (app/utils/log_shipper.py).
+# Remove the old 5-minute full-file uploader if an older image has it.
 # -----------------------------
-sudo tee /usr/local/bin/upload-trading-bot-algo-log.sh > /dev/null <<EOF
-#!/bin/bash
-aws s3 cp /var/log/trading-bot-algo.log \
-  $S3_BUCKET/$S3_PREFIX/logs/trading-bot-algo.log \
-  --region $REGION || true
-EOF
-sudo chmod +x /usr/local/bin/upload-trading-bot-algo-log.sh
+sudo systemctl disable --now trading-bot-algo-log-upload.timer 2>/dev/null || true
+sudo rm -f /etc/systemd/system/trading-bot-algo-log-upload.timer \
+  /etc/systemd/system/trading-bot-algo-log-upload.service \
+  /usr/local/bin/upload-trading-bot-algo-log.sh
 
 # -----------------------------
-# systemd uploader service
+# Console log (stdout/stderr: startup errors, crash tracebacks the logger
+# never saw). Shipped when the service stops or crashes and before each
+# rotation - only the bytes written since the last upload, gzip'd, next
+# to the app's chunks.
 # -----------------------------
-sudo tee /etc/systemd/system/trading-bot-algo-log-upload.service > /dev/null <<EOF
-[Unit]
-Description=Upload trading-bot-algo.log to S3
-
-[Service]
-Type=oneshot
-ExecStart=/usr/local/bin/upload-trading-bot-algo-log.sh
+sudo tee /usr/local/bin/ship-trading-bot-algo-console.sh > /dev/null <<EOF
+#!/bin/bash
+LOG=/var/log/trading-bot-algo.log
+STATE=/var/lib/trading-bot-algo/console.offset
+[ -f "\$LOG" ] || exit 0
+mkdir -p "\$(dirname "\$STATE")"
+
+SIZE=\$(stat -c %s "\$LOG")
+OFFSET=\$(cat "\$STATE" 2>/dev/null || echo 0)
+[ "\$SIZE" -lt "\$OFFSET" ] && OFFSET=0    # truncated by logrotate
+[ "\$SIZE" -eq "\$OFFSET" ] && exit 0
+
+KEY="$S3_PREFIX/logs/dt=\$(date +%F)/\$(hostname)/console_\$(date +%Y%m%d_%H%M%S).log.gz"
+tail -c +\$((OFFSET + 1)) "\$LOG" | head -c \$((SIZE - OFFSET)) | gzip | \\
+  aws s3 cp - "$S3_BUCKET/\$KEY" --region $REGION --content-type application/gzip \\
+  && echo "\$SIZE" > "\$STATE"
+exit 0
 EOF
-
-# -----------------------------
-# systemd uploader timer (5 min)
-# -----------------------------
-sudo tee /etc/systemd/system/trading-bot-algo-log-upload.timer > /dev/null <<EOF
-[Unit]
-Description=Upload trading-bot-algo.log to S3 every 5 minutes
-
-[Timer]
-OnBootSec=2min
-OnUnitActiveSec=5min
-Persistent=true
-
-[Install]
-WantedBy=timers.target
+sudo chmod +x /usr/local/bin/ship-trading-bot-algo-console.sh
+
+sudo tee /etc/logrotate.d/trading-bot-algo > /dev/null <<EOF
+/var/log/trading-bot-algo.log {
+    daily
+    maxsize 50M
+    rotate 7
+    compress
+    missingok
+    notifempty
+    copytruncate
+    prerotate
+        /usr/local/bin/ship-trading-bot-algo-console.sh
+    endscript
+}
 EOF
 
 # -----------------------------
@@ -130,12 +152,16 @@ User=$APP_USER
 WorkingDirectory=$APP_HOME/$REPO_NAME
 Environment=PYTHONPATH=$APP_HOME/$REPO_NAME
 Environment=PYTHONUNBUFFERED=1
+EnvironmentFile=-/etc/trading-bot-algo/env
+Environment=SSM_CACHE_FILE=/run/trading-bot-algo/ssm_params.enc
+RuntimeDirectory=trading-bot-algo
+RuntimeDirectoryPreserve=yes
 ExecStart=$APP_HOME/$REPO_NAME/venv/bin/python app/main.py
 Restart=always
 RestartSec=10
 StandardOutput=append:/var/log/trading-bot-algo.log
 StandardError=append:/var/log/trading-bot-algo.log
-ExecStopPost=/usr/local/bin/upload-trading-bot-algo-log.sh
+ExecStopPost=+/usr/local/bin/ship-trading-bot-algo-console.sh
 
 [Install]
 WantedBy=multi-user.target
@@ -146,7 +172,6 @@ EOF
 # -----------------------------
 sudo systemctl daemon-reload
 sudo systemctl enable trading-bot-algo
-sudo systemctl enable --now trading-bot-algo-log-upload.timer
 sudo systemctl restart trading-bot-algo
 
-echo "✅ Trading Bot Algo started; /var/log/trading-bot-algo.log uploads to S3 only"
+echo "✅ Trading Bot Algo started; logs ship to $S3_BUCKET/$S3_PREFIX/logs/ in gzip chunks (console log on stop / rotation)"